@@ -0,0 +1,412 @@
+#!/usr/bin/env python
+"""
+Benchmarks of the client-side overhead of s3_response_time against a local
+moto server, so changes to the probe code can be compared without a network.
+
+    python -m benchmarks.benchmark run -o current.json
+    python -m benchmarks.benchmark compare baseline.json current.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+import s3_response_time
+
+# Endpoints the benchmarks run against: a moto server on localhost, or moto
+# mocking boto3 in process when moto[server] is not installed
+BACKENDS = ("auto", "server", "mock")
+
+# Benchmarks that need the moto server, as the async engine and the
+# processes of process-load talk to the endpoint over the network
+SERVER_BENCHMARKS = ("probe-async", "async-load", "process-load")
+
+
+def free_port():
+    """
+    Find a local TCP port that is not in use
+    :return: Port as int
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def moto_endpoint(_backend):
+    """
+    Run a local S3 endpoint for the duration of the benchmarks
+    :param _backend: Backend from BACKENDS as string
+    :return: s3_host of the endpoint and the backend used as tuple
+    """
+    if _backend in ("auto", "server"):
+        try:
+            # moto warns on import when the server dependencies are missing
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                from moto.server import ThreadedMotoServer
+        except ImportError:
+            if _backend == "server":
+                print("CRITICAL - moto[server] is not installed")
+                sys.exit(2)
+            # stdout may carry the results
+            print(
+                "WARNING - moto[server] is not installed, using the in-process "
+                "moto mock without the %s benchmarks" % ", ".join(SERVER_BENCHMARKS),
+                file=sys.stderr,
+            )
+        else:
+            # The server would log every request of the benchmarks
+            logging.getLogger("werkzeug").setLevel(logging.ERROR)
+            port = free_port()
+            server = ThreadedMotoServer("127.0.0.1", port, verbose=False)
+            server.start()
+            try:
+                yield "http://127.0.0.1:%s" % port, "server"
+            finally:
+                server.stop()
+            return
+
+    from moto import mock_s3
+
+    # The mock only intercepts requests to AWS hosts
+    with mock_s3():
+        yield "https://s3.amazonaws.com", "mock"
+
+
+def benchmark_configuration(_s3_host, _directory):
+    """
+    Read the configuration of the benchmarks like main() reads a
+    configuration file
+    :param _s3_host: S3 host of the local endpoint as string
+    :param _directory: Directory the configuration file is written to as string
+    :return: Configuration as dict
+    """
+    path = os.path.join(_directory, "benchmark.json")
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "s3_host": _s3_host,
+                "aws_access_key_id": "benchmark",
+                "aws_secret_access_key": "benchmark",
+                "addressing_style": "path",
+                # Benchmark cycles are not probes of a real endpoint
+                "history_path": "",
+            },
+            f,
+        )
+
+    return s3_response_time.read_configuration(path)
+
+
+def record(_results, _name, _seconds):
+    """
+    Add a sample to the results
+    :param _results: Samples in seconds of each benchmark as dict of list
+    :param _name: Name of the benchmark as string
+    :param _seconds: Sample in seconds as float
+    :return: None
+    """
+    _results.setdefault(_name, []).append(_seconds)
+
+    return None
+
+
+def benchmark_probe(_configuration, _results, _size, _engine):
+    """
+    Time each phase of a probe cycle as main() runs it
+    :param _configuration: Configuration as dict
+    :param _results: Samples in seconds of each benchmark as dict of list
+    :param _size: Object size as string
+    :param _engine: Engine from s3_response_time.ENGINES as string
+    :return: None
+    """
+    configuration = {**_configuration, "object_size": _size, "engine": _engine}
+    timings = {}
+    s3 = s3_response_time.endpoint_auth(configuration, timings)
+    total_time = s3_response_time.probe(s3, configuration, timings)
+
+    name = "probe" if _engine == "sync" else "probe-%s" % _engine
+    record(_results, "%s/%s/total_time" % (name, _size), total_time)
+    for phase, seconds in timings.items():
+        if phase not in s3_response_time.RESOURCE_FIELDS:
+            record(_results, "%s/%s/%s" % (name, _size, phase), seconds)
+
+    return None
+
+
+def benchmark_helpers(_results, _size, _directory):
+    """
+    Time creating and hashing a random file
+    :param _results: Samples in seconds of each benchmark as dict of list
+    :param _size: File size as string
+    :param _directory: Directory the file is written to as string
+    :return: None
+    """
+    path = os.path.join(_directory, "random")
+    size = s3_response_time.parse_size(_size) / 1024**2
+
+    start_time = time.perf_counter()
+    s3_response_time.create_random_file(path, size)
+    record(_results, "create_random_file/%s" % _size, time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    s3_response_time.md5(path)
+    record(_results, "md5/%s" % _size, time.perf_counter() - start_time)
+
+    os.remove(path)
+
+    return None
+
+
+def benchmark_load(_configuration, _results, _size, _mode, _operations):
+    """
+    Time the operations of a load mode
+    :param _configuration: Configuration as dict
+    :param _results: Samples in seconds of each benchmark as dict of list
+    :param _size: Object size as string
+    :param _mode: load, async-load or process-load as string
+    :param _operations: Number of operations of the load as int
+    :return: None
+    """
+    configuration = {
+        **_configuration,
+        "load_object_size": _size,
+        "load_operations": str(_operations),
+        "load_workers": "4",
+        "async_concurrency": "16",
+        "load_processes": "2",
+    }
+    load_tests = {
+        "load": s3_response_time.load_test,
+        "async-load": s3_response_time.async_load_test,
+        "process-load": s3_response_time.process_load_test,
+    }
+    s3 = s3_response_time.endpoint_auth(configuration, None, _mode)
+    results = load_tests[_mode](s3, configuration)
+
+    completed = sum(histogram.count for histogram in results["latencies"].values())
+    record(
+        _results,
+        "%s/%s/seconds_per_operation" % (_mode, _size),
+        results["duration"] / max(completed, 1),
+    )
+    for operation, histogram in results["latencies"].items():
+        if histogram.count == 0:
+            continue
+        for percentile in ("p50", "p99"):
+            record(
+                _results,
+                "%s/%s/%s_%s" % (_mode, _size, operation, percentile),
+                histogram.summary()[percentile],
+            )
+
+    return None
+
+
+def run(_sizes, _repeat, _operations, _backend):
+    """
+    Run every benchmark
+    :param _sizes: Object sizes as list of string
+    :param _repeat: Number of samples of each benchmark as int
+    :param _operations: Number of operations of each load as int
+    :param _backend: Backend from BACKENDS as string
+    :return: Metadata of the run and samples of each benchmark as dict
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        with moto_endpoint(_backend) as (s3_host, backend):
+            configuration = benchmark_configuration(s3_host, directory)
+
+            # The mock does not serve the SERVER_BENCHMARKS
+            engines = ["sync"]
+            modes = ["load"]
+            if backend == "server":
+                engines.append("async")
+                modes += ["async-load", "process-load"]
+
+            # The probe code prints every step; only the samples are kept
+            with contextlib.redirect_stdout(io.StringIO()):
+                for size in _sizes:
+                    for iteration in range(_repeat):
+                        benchmark_helpers(results, size, directory)
+                        for engine in engines:
+                            benchmark_probe(configuration, results, size, engine)
+                        for mode in modes:
+                            benchmark_load(
+                                configuration, results, size, mode, _operations
+                            )
+
+    return {
+        "metadata": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "backend": backend,
+            "requested_backend": _backend,
+            "skipped": [] if backend == "server" else list(SERVER_BENCHMARKS),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": _sizes,
+            "repeat": _repeat,
+            "load_operations": _operations,
+        },
+        "results": results,
+    }
+
+
+def compare(_baseline, _current, _threshold, _min_difference=0.0005):
+    """
+    Compare the median of each benchmark of two runs
+    :param _baseline: Results of the baseline run as dict
+    :param _current: Results of the current run as dict
+    :param _threshold: Slowdown in percent reported as a regression as float
+    :param _min_difference: Slowdown in seconds below which a benchmark is
+        not a regression however large the percentage, as float
+    :return: Name, baseline median, current median, change in percent and
+        whether it regressed of each benchmark in both runs as list of tuple
+    """
+    comparisons = []
+    for name in sorted(set(_baseline["results"]) & set(_current["results"])):
+        baseline = statistics.median(_baseline["results"][name])
+        current = statistics.median(_current["results"][name])
+        change = (current - baseline) / baseline * 100 if baseline > 0 else 0.0
+        regressed = change > _threshold and current - baseline > _min_difference
+        comparisons.append((name, baseline, current, change, regressed))
+
+    return comparisons
+
+
+def parse_arguments(_args):
+    """
+    Parse Commandline Arguments
+    :param _args: *args positional arguments
+    :return: Commandline arguments parsed by argparse
+    """
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks.")
+    run_parser.add_argument(
+        "-o",
+        metavar="results_file",
+        dest="output",
+        help="JSON file the results are written to (default: stdout).",
+    )
+    run_parser.add_argument(
+        "--sizes",
+        help="Comma separated object sizes (default: 4KB,1MB,16MB).",
+        default="4KB,1MB,16MB",
+    )
+    run_parser.add_argument(
+        "--repeat",
+        help="Samples of each benchmark (default: 5).",
+        type=int,
+        default=5,
+    )
+    run_parser.add_argument(
+        "--load-operations",
+        dest="load_operations",
+        help="Operations of each load (default: 200).",
+        type=int,
+        default=200,
+    )
+    run_parser.add_argument(
+        "--backend",
+        help="moto server, in-process moto mock, or the server when installed "
+        "(default: auto).",
+        choices=BACKENDS,
+        default="auto",
+    )
+
+    compare_parser = commands.add_parser(
+        "compare", help="Compare two runs and flag regressions."
+    )
+    compare_parser.add_argument("baseline", help="Results file of the baseline.")
+    compare_parser.add_argument("current", help="Results file to compare.")
+    compare_parser.add_argument(
+        "--threshold",
+        help="Slowdown in percent flagged as a regression (default: 10).",
+        type=float,
+        default=10.0,
+    )
+    compare_parser.add_argument(
+        "--min-difference",
+        dest="min_difference",
+        help="Slowdown in seconds ignored however large the percentage "
+        "(default: 0.0005).",
+        type=float,
+        default=0.0005,
+    )
+
+    return parser.parse_args(_args)
+
+
+def main():
+    args = parse_arguments(sys.argv[1:])
+
+    if args.command == "run":
+        results = run(
+            args.sizes.split(","), args.repeat, args.load_operations, args.backend
+        )
+        if args.output is None:
+            json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        else:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            print(
+                "OK - %s benchmarks written to %s"
+                % (len(results["results"]), args.output)
+            )
+        return 0
+
+    runs = []
+    for path in (args.baseline, args.current):
+        try:
+            with open(path, "r") as f:
+                runs.append(json.load(f))
+        except (FileNotFoundError, json.decoder.JSONDecodeError) as e:
+            print("CRITICAL - Could Not Read Results: %s" % e)
+            return 2
+
+    if runs[0]["metadata"]["backend"] != runs[1]["metadata"]["backend"]:
+        print(
+            "WARNING - Runs used different backends: %s %s"
+            % (runs[0]["metadata"]["backend"], runs[1]["metadata"]["backend"])
+        )
+
+    comparisons = compare(runs[0], runs[1], args.threshold, args.min_difference)
+    for name, baseline, current, change, regressed in comparisons:
+        print(
+            "%s: baseline: %s current: %s change: %+.1f%%%s"
+            % (name, baseline, current, change, " REGRESSION" if regressed else "")
+        )
+
+    regressions = [comparison[0] for comparison in comparisons if comparison[4]]
+    if regressions:
+        print(
+            "CRITICAL - %s of %s benchmarks regressed more than %s%%: %s"
+            % (
+                len(regressions),
+                len(comparisons),
+                args.threshold,
+                " ".join(regressions),
+            )
+        )
+        return 2
+
+    print("OK - %s benchmarks within %s%%" % (len(comparisons), args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
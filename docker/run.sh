@@ -7,8 +7,6 @@ LOCAL_CONFIG_DIR=/Users/culbertj/Development/python/s3-response-time/docker/conf
 CONTAINER_CONFIG_DIR=/config
 IMAGE=$DOCKER_REPO/s3_response_time:$TAG
 
-for cred in $LOCAL_CONFIG_DIR/*.json; do
-  echo $(basename -- $cred)
-  docker run --rm --volume $LOCAL_CONFIG_DIR:$CONTAINER_CONFIG_DIR $IMAGE $CONTAINER_CONFIG_DIR/$(basename -- $cred)
-done
+# Every *.json file in the configuration directory is probed concurrently
+docker run --rm --volume $LOCAL_CONFIG_DIR:$CONTAINER_CONFIG_DIR $IMAGE $CONTAINER_CONFIG_DIR
 
@@ -1,396 +1,6009 @@
 #!/usr/bin/env python
 
 import argparse
+import array
+import asyncio
 import boto3
+import boto3.s3.transfer
 import botocore
+import botocore.auth
+import botocore.awsrequest
+import botocore.compat
+import botocore.httpchecksum
+import concurrent.futures
+import bisect
+import contextlib
+import datetime
+import fcntl
+import itertools
+import glob
 import hashlib
+import io
 import json
 import logging
+import math
+import multiprocessing
 import os
+import queue
+import random
+import re
+import resource
+import s3transfer.manager
+import signal
+import socket
+import statistics
+import ssl
+import struct
 import sys
+import threading
 import time
+import urllib.parse
 import uuid
+import zlib
 
 from distutils import util
 from influxdb_client import InfluxDBClient, Point
 from influxdb_client.client.write_api import SYNCHRONOUS
 
+# Nagios status names by exit code
+NAGIOS_STATUS = {0: "OK", 1: "WARNING", 2: "CRITICAL", 3: "UNKNOWN"}
 
-def write_to_influxdb(_url, _token, _org, _bucket, _host, _seconds):
+# S3 operations that make up the reported response time
+S3_PHASES = (
+    "create_bucket",
+    "upload_object",
+    "get_object_etag",
+    "get_object_checksum",
+    "download_object",
+    "delete_object",
+    "delete_bucket",
+)
+
+# Latency of the individual requests that make up an S3 operation above
+REQUEST_PHASES = (
+    "upload_part_mean",
+    "upload_part_max",
+)
+
+# Operations repeated on a fresh and on a pooled connection when cold_warm is
+# enabled, reported as <phase>_cold and <phase>_warm
+COLD_WARM_PHASES = ("upload_object", "get_object_etag", "download_object")
+
+# Default part size of streamed uploads, the smallest part S3 accepts
+# except the last one and the most parts S3 accepts
+STREAMING_PART_SIZE = 8 * 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+# Request signing modes and the botocore configuration of each: SigV2,
+# SigV4 with a signed payload, SigV4 with UNSIGNED-PAYLOAD and SigV4 with an
+# aws-chunked body and checksum trailer, which botocore only sends over HTTPS
+SIGNATURES = {
+    "s3": {"signature_version": "s3"},
+    "s3v4": {"signature_version": "s3v4", "payload_signing_enabled": True},
+    "s3v4-unsigned": {"signature_version": "s3v4", "payload_signing_enabled": False},
+    "s3v4-streaming": {
+        "signature_version": "s3v4",
+        "payload_signing_enabled": False,
+        "request_checksum_calculation": "when_supported",
+    },
+}
+
+# S3 additional checksum algorithms and the botocore class computing each
+CHECKSUM_ALGORITHMS = {
+    "CRC32": botocore.httpchecksum.Crc32Checksum,
+    "CRC32C": botocore.httpchecksum.CrtCrc32cChecksum,
+    "SHA1": botocore.httpchecksum.Sha1Checksum,
+    "SHA256": botocore.httpchecksum.Sha256Checksum,
+}
+
+# Bytes hashed at a time; hashlib and zlib release the GIL for large buffers
+HASH_BUFFER_SIZE = 1024 * 1024
+
+# Prefix of the buckets and objects created by the probes, which
+# --mode cleanup removes when they are left behind
+PROBE_PREFIX = "s3-response-time-probe-"
+
+# Most keys a DeleteObjects request accepts
+DELETE_BATCH_SIZE = 1000
+
+# Resource usage reported with the phases
+RESOURCE_FIELDS = ("peak_rss",)
+
+# Sources of the payload of uploaded objects
+PAYLOAD_SOURCES = ("random", "seeded", "pool")
+
+# Pooled payloads by seed and size, kept for the life of the process
+PAYLOAD_POOL = {}
+PAYLOAD_POOL_LOCK = threading.Lock()
+
+# Engines that send the requests of a probe cycle: boto3 with a thread for
+# each request in flight, or one asyncio event loop
+ENGINES = ("sync", "async")
+
+# Operations of the load modes
+LOAD_OPERATIONS = ("put", "head", "get", "delete")
+
+# Layouts of the keys created by the load modes
+KEY_NAMINGS = ("uuid", "sequential", "hot", "hashed")
+
+# Modes that send each request once, without botocore retries, so every
+# throttled request is counted and no backoff sleep is added to the measured
+# latency, like the async engine
+UNRETRIED_MODES = ("load", "open-loop", "async-load", "process-load", "key-naming")
+
+# Error codes of a request the endpoint throttled, besides any 503 response
+THROTTLE_CODES = (
+    "SlowDown",
+    "ServiceUnavailable",
+    "Throttling",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+)
+
+# Connection level timings reported for each S3 phase when connection_timing
+# is enabled; the body is everything after the response headers
+CONNECTION_FIELDS = (
+    "dns",
+    "connect",
+    "tls",
+    "send",
+    "ttfb",
+    "body",
+    "requests",
+    "new_connections",
+)
+
+# Collector of the connection timings and request being timed by each thread
+CONNECTION_TIMINGS = threading.local()
+
+# Client side work that is timed but kept out of the response time
+LOCAL_PHASES = (
+    "s3_auth",
+    "create_random_file",
+    "create_random_payload",
+    "md5_random_file",
+    "md5_random_payload",
+    "md5_downloaded_file",
+    "md5_downloaded_payload",
+    "checksum_random_file",
+    "checksum_random_payload",
+    "checksum_downloaded_file",
+    "remove_file",
+)
+
+
+# Fields of each probe cycle in the history store after its timestamp,
+# endpoint, status and object size; phases a cycle did not run are NaN
+HISTORY_FIELDS = ("total_time",) + S3_PHASES + LOCAL_PHASES
+
+# First bytes of a history file, followed by a JSON header line
+HISTORY_MAGIC = b"S3RTHIST1 "
+
+# Serializes the appends of the endpoints probed by one process
+HISTORY_LOCK = threading.Lock()
+
+
+class InfluxDBWriter(object):
+    """
+    Write points to Influxdb in batches from a background thread. Points that
+    cannot be written are appended to a bounded spool file and replayed once
+    Influxdb can be reached again, so writing never blocks or fails a probe.
+    """
+
+    def __init__(
+        self,
+        _url,
+        _token,
+        _org,
+        _spool_path,
+        _spool_size=10 * 1024 * 1024,
+        _batch_size=500,
+        _flush_interval=5.0,
+    ):
+        """
+        :param _url: Influxdb server URL as string
+        :param _token: Influxdb auth token as string
+        :param _org: Influxdb organization as string
+        :param _spool_path: Path to the spool file as string
+        :param _spool_size: Maximum size of the spool file in bytes as int
+        :param _batch_size: Maximum number of points written at once as int
+        :param _flush_interval: Seconds points wait for a batch to fill as float
+        """
+        self.url = _url
+        self.token = _token
+        self.org = _org
+        self.spool_path = _spool_path
+        self.spool_size = _spool_size
+        self.batch_size = _batch_size
+        self.flush_interval = _flush_interval
+        self.queue = queue.Queue()
+        self.client = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, _bucket, _points):
+        """
+        Queue points to be written, returns immediately
+        :param _bucket: Influxdb bucket as string
+        :param _points: Influxdb points as list
+        :return: None
+        """
+        for point in _points:
+            self.queue.put((_bucket, point.to_line_protocol()))
+
+        return None
+
+    def close(self, _timeout=30.0):
+        """
+        Write the queued points and stop the background thread
+        :param _timeout: Seconds to wait for the queued points as float
+        :return: None
+        """
+        self.queue.put(None)
+        self.thread.join(_timeout)
+
+        return None
+
+    def run(self):
+        """
+        Background thread that batches the queued points
+        :return: None
+        """
+        batch = []
+        closing = False
+        while not closing:
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+
+            if len(batch) > 0:
+                self.flush(batch)
+                batch = []
+
+        if self.client is not None:
+            self.client.close()
+
+        return None
+
+    def flush(self, _batch):
+        """
+        Write a batch of points, spooling them if Influxdb cannot be reached
+        :param _batch: (bucket, line protocol) as list
+        :return: True if the batch was written as bool
+        """
+        if not self.send(_batch):
+            self.spool(_batch)
+            return False
+
+        # Influxdb can be reached; replay what was spooled while it was not
+        self.replay()
+
+        return True
+
+    def send(self, _batch):
+        """
+        Write a batch of points to Influxdb
+        :param _batch: (bucket, line protocol) as list
+        :return: True if the batch was written as bool
+        """
+        buckets = {}
+        for bucket, line in _batch:
+            buckets.setdefault(bucket, []).append(line)
+
+        try:
+            if self.client is None:
+                self.client = InfluxDBClient(
+                    url=self.url, token=self.token, org=self.org, verify_ssl=False
+                )
+            write_api = self.client.write_api(write_options=SYNCHRONOUS)
+            for bucket, lines in buckets.items():
+                write_api.write(bucket=bucket, record=lines)
+        except Exception as e:
+            logging.getLogger(__name__).warning(
+                "Failed to write to influxdb, spooling %s points: %s" % (len(_batch), e)
+            )
+            return False
+
+        return True
+
+    def spool(self, _batch):
+        """
+        Append points to the spool file, dropping the oldest points when the
+        file is full
+        :param _batch: (bucket, line protocol) as list
+        :return: None
+        """
+        try:
+            with open(self.spool_path, "a") as f:
+                for bucket, line in _batch:
+                    f.write("%s\t%s\n" % (bucket, line))
+
+            if os.path.getsize(self.spool_path) > self.spool_size:
+                with open(self.spool_path, "r") as f:
+                    lines = f.readlines()
+                with open(self.spool_path, "w") as f:
+                    f.writelines(lines[len(lines) // 2 :])
+        except OSError as e:
+            logging.getLogger(__name__).warning(
+                "Failed to spool %s points: %s" % (len(_batch), e)
+            )
+
+        return None
+
+    def replay(self):
+        """
+        Write the spooled points and remove them from the spool file
+        :return: None
+        """
+        try:
+            with open(self.spool_path, "r") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+
+        for start in range(0, len(lines), self.batch_size):
+            batch = [
+                tuple(line.split("\t", 1))
+                for line in lines[start : start + self.batch_size]
+                if "\t" in line
+            ]
+            if not self.send(batch):
+                # Keep what was not replayed for the next attempt
+                with open(self.spool_path, "w") as f:
+                    f.writelines("%s\n" % line for line in lines[start:])
+                return None
+
+        os.remove(self.spool_path)
+
+        return None
+
+
+def influxdb_writer(_configuration):
+    """
+    Create the InfluxDBWriter of a configuration
+    :param _configuration: Configuration as dict
+    :return: InfluxDBWriter object
+    """
+    # Each Influxdb server gets its own spool file
+    spool_id = hashlib.md5(
+        (
+            "%s %s" % (_configuration["influxdb_url"], _configuration["influxdb_org"])
+        ).encode()
+    ).hexdigest()[:8]
+
+    return InfluxDBWriter(
+        _configuration["influxdb_url"],
+        _configuration["influxdb_token"],
+        _configuration["influxdb_org"],
+        "%s-%s" % (_configuration["influxdb_spool"], spool_id),
+        parse_size(_configuration["influxdb_spool_size"]),
+        int(_configuration["influxdb_batch_size"]),
+        float(_configuration["influxdb_flush_interval"]),
+    )
+
+
+def write_to_influxdb(_configuration, _seconds, _phases=None, _writer=None):
+    """
+    Write the response time to Influxdb
+    :param _configuration: Configuration as dict
+    :param _seconds: Response time in seconds as float
+    :param _phases: Per phase response times in seconds as dict
+    :param _writer: InfluxDBWriter to reuse, a new writer is created if None
+    :return: None
+    """
+    point = (
+        Point("response_time")
+        .tag("host", _configuration["influxdb_host"])
+        .field("seconds", _seconds)
+    )
+
+    # Each phase is written as a separate field of the same point
+    if _phases is not None:
+        for phase, seconds in _phases.items():
+            point = point.field(phase, seconds)
+
+    return write_points_to_influxdb(_configuration, [point], _writer)
+
+
+def write_points_to_influxdb(_configuration, _points, _writer=None):
+    """
+    Write points to Influxdb without blocking or failing the caller
+    :param _configuration: Configuration as dict
+    :param _points: Influxdb points as list
+    :param _writer: InfluxDBWriter to reuse, a new writer is created and
+        closed if None
+    :return: None
+    """
+    if _writer is None:
+        writer = influxdb_writer(_configuration)
+        writer.write(_configuration["influxdb_bucket"], _points)
+        writer.close()
+    else:
+        _writer.write(_configuration["influxdb_bucket"], _points)
+
+    return None
+
+
+class HistoryStore(object):
+    """
+    Append-only binary history of probe cycles. Each file starts with a header
+    line naming the fields, followed by fixed size records in time order, so
+    a time window is found by binary search and each column of it decoded
+    with one strided struct.iter_unpack. A full file is rotated to <path>.1,
+    the oldest of the rotated files is dropped.
+    """
+
+    # Leading fields of every record and their struct formats
+    COLUMNS = (
+        ("timestamp", "d"),
+        ("endpoint", "I"),
+        ("status", "B"),
+        ("object_size", "d"),
+    )
+
+    def __init__(self, _path, _size=64 * 1024 * 1024, _files=4):
+        """
+        :param _path: Path to the current history file as string
+        :param _size: Maximum size of a history file in bytes as int
+        :param _files: Number of history files kept, including the current
+            one, as int
+        """
+        self.path = _path
+        self.size = _size
+        self.files = max(_files, 1)
+
+    @classmethod
+    def record(cls, _fields):
+        """
+        Layout of the records of a history file: timestamp, crc32 of the
+        endpoint, status, object size and a float32 for each field
+        :param _fields: Names of the fields as list
+        :return: struct.Struct object
+        """
+        return struct.Struct(
+            "<" + "".join(column[1] for column in cls.COLUMNS) + "f" * len(_fields)
+        )
+
+    def append(self, _endpoint, _status, _object_size, _timings, _timestamp=None):
+        """
+        Append a probe cycle. A failure is logged but does not fail the probe
+        :param _endpoint: Name of the endpoint as string
+        :param _status: Nagios exit code of the probe cycle as int
+        :param _object_size: Size of the probed object in bytes as int
+        :param _timings: Phase durations in seconds, and total_time, as dict
+        :param _timestamp: Seconds since the epoch, defaults to now
+        :return: None
+        """
+        if _timestamp is None:
+            _timestamp = time.time()
+        record = self.record(HISTORY_FIELDS).pack(
+            _timestamp,
+            zlib.crc32(_endpoint.encode()),
+            _status,
+            _object_size,
+            *(float(_timings.get(field, math.nan)) for field in HISTORY_FIELDS),
+        )
+
+        with HISTORY_LOCK:
+            try:
+                self.write(record)
+            except OSError as e:
+                logging.getLogger(__name__).warning(
+                    "Failed to write to history %s: %s" % (self.path, e)
+                )
+
+        return None
+
+    def write(self, _record):
+        """
+        Append a record, rotating the file first when it is full or written
+        with other fields. Other processes are locked out with flock
+        :param _record: Packed record as bytes
+        :return: None
+        """
+        while True:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+
+                # Another process may have rotated the file while this one
+                # waited for the lock
+                if os.fstat(fd).st_ino != os.stat(self.path).st_ino:
+                    continue
+
+                size = os.fstat(fd).st_size
+                if size > 0 and (
+                    size + len(_record) > self.size
+                    or self.header(self.path) != list(HISTORY_FIELDS)
+                ):
+                    self.rotate()
+                    continue
+
+                if size == 0:
+                    os.write(
+                        fd,
+                        HISTORY_MAGIC
+                        + json.dumps({"fields": list(HISTORY_FIELDS)}).encode()
+                        + b"\n",
+                    )
+                os.write(fd, _record)
+                return None
+            finally:
+                os.close(fd)
+
+    def rotate(self):
+        """
+        Move the current file to <path>.1 and each rotated file one further
+        :return: None
+        """
+        for index in range(self.files - 1, 0, -1):
+            source = self.path if index == 1 else "%s.%s" % (self.path, index - 1)
+            if os.path.exists(source):
+                os.replace(source, "%s.%s" % (self.path, index))
+        if self.files == 1:
+            os.remove(self.path)
+
+        return None
+
+    def paths(self):
+        """
+        History files that exist, oldest first
+        :return: Paths as list of string
+        """
+        paths = ["%s.%s" % (self.path, index) for index in range(self.files - 1, 0, -1)]
+        return [path for path in paths + [self.path] if os.path.exists(path)]
+
+    @staticmethod
+    def header(_path):
+        """
+        Fields of a history file
+        :param _path: Path to the history file as string
+        :return: Names of the fields as list, None if the file has no header
+        """
+        with open(_path, "rb") as f:
+            line = f.readline()
+        if not line.startswith(HISTORY_MAGIC):
+            return None
+
+        return json.loads(line[len(HISTORY_MAGIC) :])["fields"]
+
+    def read(self, _start, _end, _fields=None):
+        """
+        Read the probe cycles of a time window from every history file. Only
+        the requested columns are decoded, each with one strided
+        struct.iter_unpack over the window
+        :param _start: Start of the window in seconds since the epoch as float
+        :param _end: End of the window in seconds since the epoch as float
+        :param _fields: Fields to read as list, defaults to every field
+        :return: Columns of the probe cycles of each file as list of dict of
+            timestamp, endpoint, status, object_size and the fields the file
+            has, oldest first
+        """
+        windows = []
+        for path in self.paths():
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            if not data.startswith(HISTORY_MAGIC):
+                continue
+
+            offset = data.index(b"\n") + 1
+            fields = json.loads(data[len(HISTORY_MAGIC) : offset])["fields"]
+            record = self.record(fields)
+            # A record cut short by a crash is ignored
+            count = (len(data) - offset) // record.size
+
+            # Records are in time order, find the window by binary search
+            timestamps = _RecordTimestamps(data, offset, record.size, count)
+            first = bisect.bisect_left(timestamps, _start)
+            last = bisect.bisect_right(timestamps, _end)
+            if first >= last:
+                continue
+            window = memoryview(data)[
+                offset + first * record.size : offset + last * record.size
+            ]
+
+            columns = {}
+            position = 0
+            for name, fmt in list(self.COLUMNS) + [(field, "f") for field in fields]:
+                size = struct.calcsize("<" + fmt)
+                if name in dict(self.COLUMNS) or _fields is None or name in _fields:
+                    layout = struct.Struct(
+                        "<%dx%s%dx" % (position, fmt, record.size - position - size)
+                    )
+                    columns[name] = [value for (value,) in layout.iter_unpack(window)]
+                position += size
+            windows.append(columns)
+
+        return windows
+
+
+class _RecordTimestamps(object):
+    """
+    Sequence of the timestamps of the records of a history file, read on
+    demand for bisect
+    """
+
+    def __init__(self, _data, _offset, _size, _count):
+        self.data = _data
+        self.offset = _offset
+        self.size = _size
+        self.count = _count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, _index):
+        return struct.unpack_from("<d", self.data, self.offset + _index * self.size)[0]
+
+
+def history_store(_configuration):
+    """
+    Create the HistoryStore of a configuration
+    :param _configuration: Configuration as dict
+    :return: HistoryStore object, None if history_path is empty
+    """
+    if _configuration["history_path"] == "":
+        return None
+
+    return HistoryStore(
+        _configuration["history_path"],
+        parse_size(_configuration["history_size"]),
+        int(_configuration["history_files"]),
+    )
+
+
+def record_history(_configuration, _status, _total_time, _timings):
+    """
+    Append a probe cycle to the history store of the configuration
+    :param _configuration: Configuration as dict
+    :param _status: Nagios exit code of the probe cycle as int
+    :param _total_time: Total time of the S3 operations in seconds as float,
+        None if the probe failed
+    :param _timings: Phase durations in seconds as dict
+    :return: None
+    """
+    store = history_store(_configuration)
+    if store is None:
+        return None
+
+    timings = dict(_timings)
+    if _total_time is not None:
+        timings["total_time"] = _total_time
+    store.append(
+        endpoint_name(_configuration),
+        _status,
+        parse_size(_configuration["object_size"]),
+        timings,
+    )
+
+    return None
+
+
+def percentiles(_values):
+    """
+    Summarize values like LatencyHistogram.summary, with exact percentiles
+    :param _values: Values in seconds as list
+    :return: Count, mean, percentiles and max in seconds as dict
+    """
+    if len(_values) == 0:
+        return {"count": 0}
+
+    values = sorted(_values)
+    summary = {"count": len(values), "mean": statistics.fmean(values)}
+    for name, percentile in LatencyHistogram.PERCENTILES:
+        rank = max(1, math.ceil(len(values) * percentile / 100.0))
+        summary[name] = values[rank - 1]
+    summary["max"] = values[-1]
+
+    return summary
+
+
+def summarize_history(_configuration, _start, _end, _slices=4):
+    """
+    Summarize the probe cycles of an endpoint in a time window
+    :param _configuration: Configuration as dict
+    :param _start: Start of the window in seconds since the epoch as float
+    :param _end: End of the window in seconds since the epoch as float
+    :param _slices: Number of equal parts of the window the throughput
+        trend is reported for as int
+    :return: Number of probe cycles, warnings and errors, latency
+        percentiles of each S3 phase of the cycles that completed, slow or
+        not, and the mean upload and download throughput of each slice in
+        MB/s as dict
+    """
+    endpoint = endpoint_name(_configuration)
+    crc = zlib.crc32(endpoint.encode())
+    store = history_store(_configuration)
+
+    phases = ("total_time",) + S3_PHASES
+    values = {phase: [] for phase in phases}
+    throughputs = {
+        "upload_object": [[] for i in range(_slices)],
+        "download_object": [[] for i in range(_slices)],
+    }
+    cycles = 0
+    warnings = 0
+    errors = 0
+    slice_seconds = max(_end - _start, 1e-9) / _slices
+    windows = store.read(_start, _end, phases) if store is not None else []
+    for columns in windows:
+        endpoints = columns["endpoint"]
+        cycles += endpoints.count(crc)
+        # A WARNING cycle completed but breached a threshold; its timings
+        # are kept so the percentiles show the slowness
+        successful = [
+            endpoint == crc and status <= 1
+            for endpoint, status in zip(endpoints, columns["status"])
+        ]
+        errors += endpoints.count(crc) - successful.count(True)
+        warnings += sum(
+            1
+            for endpoint, status in zip(endpoints, columns["status"])
+            if endpoint == crc and status == 1
+        )
+        if not all(successful):
+            columns = {
+                name: list(itertools.compress(column, successful))
+                for name, column in columns.items()
+            }
+        if not columns["timestamp"]:
+            continue
+
+        for phase in phases:
+            if phase in columns:
+                # NaN marks a phase the cycle did not run
+                values[phase] += [value for value in columns[phase] if value == value]
+
+        bounds = [
+            bisect.bisect_left(columns["timestamp"], _start + index * slice_seconds)
+            for index in range(_slices)
+        ] + [len(columns["timestamp"])]
+        for phase, slices in throughputs.items():
+            if phase not in columns:
+                continue
+            for index in range(_slices):
+                slices[index] += [
+                    size / seconds / 1024**2
+                    for size, seconds in zip(
+                        columns["object_size"][bounds[index] : bounds[index + 1]],
+                        columns[phase][bounds[index] : bounds[index + 1]],
+                    )
+                    if seconds > 0
+                ]
+
+    summary = {
+        "endpoint": endpoint,
+        "cycles": cycles,
+        "warnings": warnings,
+        "errors": errors,
+    }
+    for phase in phases:
+        if values[phase]:
+            summary[phase] = percentiles(values[phase])
+    for phase, slices in throughputs.items():
+        summary["%s_mb_per_second" % phase] = [
+            statistics.fmean(samples) if samples else None for samples in slices
+        ]
+
+    return summary
+
+
+def run_summarize(_configurations, _window, _now=None):
+    """
+    Report the history of each endpoint over a time window
+    :param _configurations: Configurations as list of dict
+    :param _window: Length of the window ending now such as "24h" as string
+    :param _now: End of the window in seconds since the epoch, defaults to now
+    :return: Nagios exit code as int
+    """
+    if _now is None:
+        _now = time.time()
+    start = _now - parse_duration(_window)
+
+    cycles = 0
+    warnings = 0
+    errors = 0
+    for configuration in _configurations:
+        summary = summarize_history(configuration, start, _now)
+        cycles += summary["cycles"]
+        warnings += summary["warnings"]
+        errors += summary["errors"]
+
+        print(
+            "%s: cycles: %s warnings: %s errors: %s"
+            % (
+                summary["endpoint"],
+                summary["cycles"],
+                summary["warnings"],
+                summary["errors"],
+            )
+        )
+        for phase in ("total_time",) + S3_PHASES:
+            if phase in summary:
+                print(
+                    "%s %s: %s"
+                    % (
+                        summary["endpoint"],
+                        phase,
+                        " ".join(
+                            "%s: %s" % (name, value)
+                            for name, value in summary[phase].items()
+                        ),
+                    )
+                )
+        for phase in ("upload_object", "download_object"):
+            trend = summary["%s_mb_per_second" % phase]
+            print(
+                "%s %s_mb_per_second: %s"
+                % (
+                    summary["endpoint"],
+                    phase,
+                    " ".join(
+                        "-" if value is None else "%.3f" % value for value in trend
+                    ),
+                )
+            )
+
+    print(
+        "OK - history: %s endpoints %s cycles %s warnings %s errors in the last %s"
+        % (len(_configurations), cycles, warnings, errors, _window)
+    )
+
+    return 0
+
+
+def time_phase(_timings, _phase, _function, *_args, **_kwargs):
+    """
+    Call a function and record how long it took
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :param _phase: Name of the phase as string
+    :param _function: Function to call
+    :param _args: Positional arguments passed to _function
+    :param _kwargs: Keyword arguments passed to _function
+    :return: Return value of _function
+    """
+    # Collect the connection timings of the requests made by the phase,
+    # including those handed to worker threads
+    collector = ConnectionTimings()
+
+    with collect_connection_timings(collector):
+        start_time = time.perf_counter()
+        result = _function(*_args, **_kwargs)
+        end_time = time.perf_counter()
+    _timings[_phase] = _timings.get(_phase, 0.0) + end_time - start_time
+
+    requests = collector.requests
+    for field, value in connection_breakdown(_phase, requests, end_time).items():
+        _timings[field] = _timings.get(field, 0) + value
+
+    return result
+
+
+def format_timings(_timings):
+    """
+    Format phase durations for the Nagios output line
+    :param _timings: Phase durations in seconds as dict
+    :return: Phase durations as string
+    """
+    # The connection timings of each S3 phase follow its total
+    phases = list(S3_PHASES)
+    for phase in COLD_WARM_PHASES:
+        phases += ["%s_cold" % phase, "%s_warm" % phase]
+
+    fields = []
+    for phase in phases:
+        fields.append(phase)
+        fields += ["%s_%s" % (phase, field) for field in CONNECTION_FIELDS]
+
+    return " ".join(
+        "%s: %s" % (field, _timings[field])
+        for field in fields + list(REQUEST_PHASES + LOCAL_PHASES + RESOURCE_FIELDS)
+        if field in _timings
+    )
+
+
+def parse_range(_range):
+    """
+    Parse a Nagios threshold range such as "10", "10:", "~:10", "5:10" or
+    "@5:10". A value outside start:end breaches it, or inside with "@"
+    :param _range: Threshold range as string
+    :return: Start, end and whether values inside breach it as tuple
+    """
+    match = re.match(
+        r"^(@?)(?:(~|[-+]?[0-9]*\.?[0-9]+):)?([-+]?[0-9]*\.?[0-9]+)?$", _range.strip()
+    )
+    if match is None or (match.group(2) is None and match.group(3) is None):
+        print("CRITICAL - Invalid Threshold: %s" % _range)
+        sys.exit(2)
+
+    inside, start, end = match.groups()
+    if start is None:
+        start = 0.0
+    elif start == "~":
+        start = -math.inf
+    else:
+        start = float(start)
+    end = math.inf if end is None else float(end)
+    if start > end:
+        print("CRITICAL - Invalid Threshold: %s" % _range)
+        sys.exit(2)
+
+    return start, end, inside == "@"
+
+
+def parse_thresholds(_thresholds):
+    """
+    Parse per metric thresholds such as "total_time=2,upload_object=0.5" or
+    "download_object_mb_per_second=10:"
+    :param _thresholds: Comma separated metric=range pairs as string
+    :return: Threshold range as string keyed by metric as dict
+    """
+    thresholds = {}
+    for threshold in _thresholds.split(","):
+        if threshold.strip() == "":
+            continue
+        metric, separator, value = threshold.partition("=")
+        if separator == "":
+            print("CRITICAL - Invalid Threshold: %s" % threshold)
+            sys.exit(2)
+        parse_range(value)
+        thresholds[metric.strip()] = value.strip()
+
+    return thresholds
+
+
+def breached(_range, _value):
+    """
+    Check a value against a Nagios threshold range
+    :param _range: Threshold range as string
+    :param _value: Value as float
+    :return: True if the value breaches the range as bool
+    """
+    start, end, inside = parse_range(_range)
+    outside = _value < start or _value > end
+
+    return not outside if inside else outside
+
+
+def probe_metrics(_configuration, _total_time, _timings):
+    """
+    Metrics of a probe cycle that thresholds and perfdata apply to
+    :param _configuration: Configuration as dict
+    :param _total_time: Total time of the S3 operations in seconds as float
+    :param _timings: Phase durations in seconds as dict
+    :return: Name, value and Nagios unit of each metric as list of tuple
+    """
+    phases = list(S3_PHASES)
+    for phase in COLD_WARM_PHASES:
+        phases += ["%s_cold" % phase, "%s_warm" % phase]
+
+    metrics = [("total_time", _total_time, "s")]
+    metrics += [
+        (phase, _timings[phase], "s")
+        for phase in phases + list(REQUEST_PHASES + LOCAL_PHASES)
+        if phase in _timings
+    ]
+
+    # Throughput of the object transfers; lower values are worse, so their
+    # thresholds are usually of the form "10:"
+    object_size = parse_size(_configuration["object_size"])
+    for phase in ("upload_object", "download_object"):
+        if _timings.get(phase, 0) > 0:
+            metrics.append(
+                (
+                    "%s_mb_per_second" % phase,
+                    object_size / _timings[phase] / 1024**2,
+                    "",
+                )
+            )
+
+    metrics += [
+        (field, _timings[field], "B") for field in RESOURCE_FIELDS if field in _timings
+    ]
+
+    return metrics
+
+
+def check_thresholds(_configuration, _metrics):
+    """
+    Check the metrics of a probe cycle against the warning and critical
+    thresholds of the configuration
+    :param _configuration: Configuration as dict
+    :param _metrics: Name, value and unit of each metric as list of tuple
+    :return: Nagios exit code and the breached metrics as list of string
+    """
+    exit_code = 0
+    breaches = []
+    # Only the breaches of the worst status are reported
+    for status, key in ((2, "critical_thresholds"), (1, "warning_thresholds")):
+        thresholds = parse_thresholds(_configuration[key])
+        for name, value, unit in _metrics:
+            if name in thresholds and breached(thresholds[name], value):
+                if exit_code == 0:
+                    exit_code = status
+                if exit_code == status:
+                    breaches.append(
+                        "%s=%s%s (%s %s)"
+                        % (name, value, unit, key.split("_")[0], thresholds[name])
+                    )
+
+    return exit_code, breaches
+
+
+def format_perfdata(_configuration, _metrics):
+    """
+    Format the metrics of a probe cycle as Nagios perfdata
+    :param _configuration: Configuration as dict
+    :param _metrics: Name, value and unit of each metric as list of tuple
+    :return: Space separated label=value[unit];warn;crit;; as string
+    """
+    warning = parse_thresholds(_configuration["warning_thresholds"])
+    critical = parse_thresholds(_configuration["critical_thresholds"])
+
+    return " ".join(
+        "%s=%s%s;%s;%s;;"
+        % (name, value, unit, warning.get(name, ""), critical.get(name, ""))
+        for name, value, unit in _metrics
+    )
+
+
+def parse_size(_size):
+    """
+    Parse an object size such as "4KB", "16MB" or "1GB"
+    :param _size: Size with an optional B, KB, MB, GB or TB unit as string, a
+        number without a unit is in MB
+    :return: Size in bytes as int
+    """
+    multiples = {
+        "": 1024**2,
+        "B": 1,
+        "K": 1024,
+        "M": 1024**2,
+        "G": 1024**3,
+        "T": 1024**4,
+    }
+
+    match = re.match(
+        r"^\s*([0-9]*\.?[0-9]+)\s*(?:([KMGT]?)I?B|([KMGT]?))\s*$", str(_size), re.I
+    )
+    if match is None:
+        print("CRITICAL - Invalid object size: %s" % _size)
+        sys.exit(2)
+
+    if match.group(2) is not None:
+        unit = match.group(2).upper() or "B"
+    else:
+        unit = match.group(3).upper()
+
+    return int(float(match.group(1)) * multiples[unit])
+
+
+def parse_duration(_duration):
+    """
+    Parse a duration such as "90s", "30m", "24h" or "7d"
+    :param _duration: Duration with an optional s, m, h, d or w unit as
+        string, a number without a unit is in seconds
+    :return: Duration in seconds as float
+    """
+    multiples = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+    match = re.match(r"^\s*([0-9]*\.?[0-9]+)\s*([smhdw]?)\s*$", str(_duration), re.I)
+    if match is None:
+        print("CRITICAL - Invalid duration: %s" % _duration)
+        sys.exit(2)
+
+    return float(match.group(1)) * multiples[match.group(2).lower()]
+
+
+def format_size(_bytes):
+    """
+    Format a size in bytes with the largest unit that divides it
+    :param _bytes: Size in bytes as int
+    :return: Size such as "4KB" or "16MB" as string
+    """
+    for unit, multiple in (("GB", 1024**3), ("MB", 1024**2), ("KB", 1024)):
+        if _bytes >= multiple and _bytes % multiple == 0:
+            return "%s%s" % (_bytes // multiple, unit)
+
+    return "%sB" % _bytes
+
+
+class ConnectionTimings(object):
+    """
+    Connection timings of the requests made by a phase, shared by the calling
+    thread and the worker threads it hands requests to
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = []
+
+    def append(self, _record):
+        with self.lock:
+            self.requests.append(_record)
+
+
+@contextlib.contextmanager
+def collect_connection_timings(_collector):
+    """
+    Record the connection timings of the requests the current thread makes
+    into a collector
+    :param _collector: ConnectionTimings
+    :return: None
+    """
+    previous = (
+        getattr(CONNECTION_TIMINGS, "collector", None),
+        getattr(CONNECTION_TIMINGS, "record", None),
+    )
+    CONNECTION_TIMINGS.collector = _collector
+    CONNECTION_TIMINGS.record = None
+    try:
+        yield
+    finally:
+        # The body of the last request was read by the time the thread is done
+        record = CONNECTION_TIMINGS.record
+        if record is not None and "end_time" not in record:
+            record["end_time"] = time.perf_counter()
+        CONNECTION_TIMINGS.collector, CONNECTION_TIMINGS.record = previous
+
+
+def connection_timing_task(_function):
+    """
+    Wrap a function run on a worker thread so its requests are collected with
+    those of the phase of the thread that hands it over
+    :param _function: Function to run on the worker thread
+    :return: Function to run on the worker thread
+    """
+    collector = getattr(CONNECTION_TIMINGS, "collector", None)
+    if collector is None:
+        return _function
+
+    def task(*_args, **_kwargs):
+        with collect_connection_timings(collector):
+            return _function(*_args, **_kwargs)
+
+    return task
+
+
+class ConnectionTimingExecutor(concurrent.futures.ThreadPoolExecutor):
+    """
+    Thread pool whose tasks record connection timings into the phase of the
+    thread that submitted them
+    """
+
+    def submit(self, _function, *_args, **_kwargs):
+        return super().submit(connection_timing_task(_function), *_args, **_kwargs)
+
+
+def connection_timing_record():
+    """
+    Connection timings of the request the current thread is making
+    :return: Timings as dict, None if the thread is not collecting timings
+    """
+    collector = getattr(CONNECTION_TIMINGS, "collector", None)
+    if collector is None:
+        return None
+
+    record = CONNECTION_TIMINGS.record
+    if record is None or "headers_time" in record:
+        start_time = time.perf_counter()
+
+        # The body of the previous request was read until this one started
+        if record is not None:
+            record["end_time"] = start_time
+
+        record = {
+            "start_time": start_time,
+            "new_connection": False,
+            "dns": 0.0,
+            "connect": 0.0,
+            "tls": 0.0,
+            "send": 0.0,
+            "ttfb": 0.0,
+        }
+        CONNECTION_TIMINGS.record = record
+        collector.append(record)
+
+    return record
+
+
+def connection_breakdown(_phase, _requests, _end_time):
+    """
+    Sum the connection timings of the requests made by a phase
+    :param _phase: Name of the phase as string
+    :param _requests: Connection timings of each request, from any thread, as
+        list of dict
+    :param _end_time: time.perf_counter() at the end of the phase as float
+    :return: Seconds spent in each step, number of requests and number of new
+        connections keyed by phase and step as dict
+    """
+    if not _requests:
+        return {}
+
+    breakdown = {"%s_%s" % (_phase, field): 0.0 for field in CONNECTION_FIELDS}
+    breakdown["%s_requests" % _phase] = 0
+    breakdown["%s_new_connections" % _phase] = 0
+    for request in _requests:
+        for field in ("dns", "connect", "tls", "send", "ttfb"):
+            breakdown["%s_%s" % (_phase, field)] += request[field]
+
+        # The body is read after the response headers, until the thread
+        # starts its next request or is done
+        body_end_time = min(request.get("end_time", _end_time), _end_time)
+        breakdown["%s_body" % _phase] += body_end_time - request.get(
+            "headers_time", body_end_time
+        )
+
+        breakdown["%s_requests" % _phase] += 1
+        if request["new_connection"]:
+            breakdown["%s_new_connections" % _phase] += 1
+
+    return breakdown
+
+
+class TimedConnection(object):
+    """
+    Mixin for the botocore connection classes that records DNS resolution,
+    TCP connect, TLS handshake, request send and time to first byte of each
+    request into connection_timing_record()
+    """
+
+    def _new_conn(self):
+        record = connection_timing_record()
+        if record is None:
+            return super()._new_conn()
+
+        # Resolve the host separately so DNS is not part of the TCP connect
+        start_time = time.perf_counter()
+        try:
+            address = socket.getaddrinfo(
+                self._dns_host, self.port, 0, socket.SOCK_STREAM
+            )[0][4][0]
+        except socket.gaierror:
+            address = self._dns_host
+        dns_time = time.perf_counter()
+        record["dns"] += dns_time - start_time
+
+        dns_host = self._dns_host
+        self._dns_host = address
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+        record["connect"] += time.perf_counter() - dns_time
+
+        return sock
+
+    def connect(self):
+        record = connection_timing_record()
+        if record is None:
+            return super().connect()
+
+        start_time = time.perf_counter()
+        before = record["dns"] + record["connect"]
+        super().connect()
+        elapsed = time.perf_counter() - start_time
+
+        # What connect spent beyond DNS and TCP connect is the TLS handshake
+        record["new_connection"] = True
+        record["tls"] += elapsed - (record["dns"] + record["connect"] - before)
+
+        return None
+
+    def request(self, *_args, **_kwargs):
+        record = connection_timing_record()
+        if record is None:
+            return super().request(*_args, **_kwargs)
+
+        start_time = time.perf_counter()
+        before = record["dns"] + record["connect"] + record["tls"]
+        result = super().request(*_args, **_kwargs)
+        elapsed = time.perf_counter() - start_time
+
+        # Plain HTTP connects while sending the first request
+        record["send"] += elapsed - (
+            record["dns"] + record["connect"] + record["tls"] - before
+        )
+
+        return result
+
+    def getresponse(self, *_args, **_kwargs):
+        record = connection_timing_record()
+        if record is None:
+            return super().getresponse(*_args, **_kwargs)
+
+        start_time = time.perf_counter()
+        response = super().getresponse(*_args, **_kwargs)
+        record["headers_time"] = time.perf_counter()
+        record["ttfb"] += record["headers_time"] - start_time
+
+        return response
+
+
+class TimedHTTPConnection(TimedConnection, botocore.awsrequest.AWSHTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnection, botocore.awsrequest.AWSHTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(botocore.awsrequest.AWSHTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(botocore.awsrequest.AWSHTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+def instrument_connections(_client):
+    """
+    Record connection timings of the requests made by a boto3 client
+    :param _client: S3 boto3 client, before it made any request
+    :return: None
+    """
+    pool_classes = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+    http_session = _client._endpoint.http_session
+    http_session._pool_classes_by_scheme = pool_classes
+    http_session._manager.pool_classes_by_scheme = pool_classes
+
+    return None
+
+
+def remove_file(_path):
+    """
+    Remove file
+    :param _path: Path to file as string
+    :return: None
+    """
+    try:
+        os.remove(_path)
+    except Exception as e:
+        print("CRITICAL - Remove file error: %s" % e)
+        sys.exit(2)
+
+    return None
+
+
+def create_random_file(_path, _file_size):
+    """
+    Create a random file
+    :param _path: Path to file as string
+    :param _file_size: Size of the random file in MB as int or float
+    :return: None
+    """
+    try:
+        # Write the file one MB at a time so it is never held in memory
+        remaining = round(1024 * 1024 * _file_size)
+        with open(_path, "wb") as random_file:
+            while remaining > 0:
+                random_file.write(os.urandom(min(remaining, 1024 * 1024)))
+                remaining -= 1024 * 1024
+    except Exception as e:
+        print("CRITICAL - Create random file error: %s" % e)
+        sys.exit(2)
+
+    return None
+
+
+def create_random_payload(_file_size):
+    """
+    Create a random payload in memory
+    :param _file_size: Size of the random payload in MB as int or float
+    :return: Random payload as bytes
+    """
+    return os.urandom(round(1024 * 1024 * _file_size))
+
+
+class SeededPayload(object):
+    """
+    Pseudo-random payload generated lazily from a seed. Each chunk is a block
+    of random bytes rotated by a random offset, which is much cheaper than
+    generating every byte. The same seed and size always give the same bytes.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    # md5 hashes of the payloads by seed and size, and the md5 digests of
+    # their parts by seed, size and part size
+    md5sums = {}
+    part_digests = {}
+    md5sums_lock = threading.Lock()
+
+    def __init__(self, _seed, _size):
+        """
+        :param _seed: Seed of the payload as int
+        :param _size: Size of the payload in bytes as int
+        """
+        self.seed = _seed
+        self.size = _size
+        # Random.randbytes needs Python 3.9
+        self.block = (
+            random.Random(_seed)
+            .getrandbits(self.CHUNK_SIZE * 8)
+            .to_bytes(self.CHUNK_SIZE, "little")
+        )
+
+    def chunk(self, _index):
+        """
+        Generate a chunk of the payload
+        :param _index: Index of the chunk as int
+        :return: Chunk as bytes, the last chunk may be short
+        """
+        offset = random.Random("%s-%s" % (self.seed, _index)).randrange(self.CHUNK_SIZE)
+        length = min(self.CHUNK_SIZE, self.size - _index * self.CHUNK_SIZE)
+        if offset + length <= self.CHUNK_SIZE:
+            return self.block[offset : offset + length]
+        return self.block[offset:] + self.block[: offset + length - self.CHUNK_SIZE]
+
+    def chunks(self):
+        """
+        Generate the payload one chunk at a time
+        :return: Generator of chunks as bytes
+        """
+        for index in range(math.ceil(self.size / self.CHUNK_SIZE)):
+            yield self.chunk(index)
+
+    def read(self, _start, _length):
+        """
+        Generate part of the payload
+        :param _start: First byte as int
+        :param _length: Number of bytes as int
+        :return: Part of the payload as bytes
+        """
+        end = min(_start + _length, self.size)
+        first = _start // self.CHUNK_SIZE
+        last = math.ceil(end / self.CHUNK_SIZE)
+        data = b"".join(self.chunk(index) for index in range(first, last))
+        offset = first * self.CHUNK_SIZE
+
+        return data[_start - offset : end - offset]
+
+    def md5(self):
+        """
+        md5 hash of the payload, computed once for each seed and size
+        :return: md5 hash as string
+        """
+        return seeded_md5(self.seed, self.size)
+
+
+def seeded_md5(_seed, _size):
+    """
+    md5 hash of a seeded payload, memoized so it is hashed only once
+    :param _seed: Seed of the payload as int
+    :param _size: Size of the payload in bytes as int
+    :return: md5 hash as string
+    """
+    key = (_seed, _size)
+    with SeededPayload.md5sums_lock:
+        if key not in SeededPayload.md5sums:
+            hash_md5 = hashlib.md5()
+            for chunk in SeededPayload(_seed, _size).chunks():
+                hash_md5.update(chunk)
+            SeededPayload.md5sums[key] = hash_md5.hexdigest()
+
+        return SeededPayload.md5sums[key]
+
+
+def seeded_part_digests(_seed, _size, _part_size):
+    """
+    md5 digests of the parts of a seeded payload, memoized so a multipart
+    upload of the same payload does not hash it again
+    :param _seed: Seed of the payload as int
+    :param _size: Size of the payload in bytes as int
+    :param _part_size: Size of each part in bytes as int
+    :return: Binary md5 digest of each part, in order, as list
+    """
+    key = (_seed, _size, _part_size)
+    with SeededPayload.md5sums_lock:
+        if key not in SeededPayload.part_digests:
+            payload = SeededPayload(_seed, _size)
+            SeededPayload.part_digests[key] = [
+                hashlib.md5(payload.read(offset, _part_size)).digest()
+                for offset in range(0, max(_size, 1), _part_size)
+            ]
+
+        return SeededPayload.part_digests[key]
+
+
+def pooled_payload(_seed, _size):
+    """
+    Seeded payload kept in memory and reused by later probes, such as the
+    cycles of --daemon
+    :param _seed: Seed of the payload as int
+    :param _size: Size of the payload in bytes as int
+    :return: Payload as bytes
+    """
+    key = (_seed, _size)
+    with PAYLOAD_POOL_LOCK:
+        if key not in PAYLOAD_POOL:
+            PAYLOAD_POOL[key] = SeededPayload(_seed, _size).read(0, _size)
+
+        return PAYLOAD_POOL[key]
+
+
+def payload_source(_configuration):
+    """
+    Payload source and seed of the configuration
+    :param _configuration: Configuration as dict
+    :return: Payload source as string and seed as int
+    """
+    if _configuration["payload"] not in PAYLOAD_SOURCES:
+        print("CRITICAL - Unknown Payload: %s" % _configuration["payload"])
+        sys.exit(2)
+
+    return _configuration["payload"], int(_configuration["payload_seed"])
+
+
+def create_payload(_configuration, _size):
+    """
+    Create the payload of an object in memory
+    :param _configuration: Configuration as dict
+    :param _size: Size of the payload in bytes as int
+    :return: Payload as bytes
+    """
+    source, seed = payload_source(_configuration)
+    if source == "seeded":
+        return SeededPayload(seed, _size).read(0, _size)
+    if source == "pool":
+        return pooled_payload(seed, _size)
+
+    return create_random_payload(_size / (1024 * 1024))
+
+
+def create_payload_file(_configuration, _path, _size):
+    """
+    Create the payload of an object as a file
+    :param _configuration: Configuration as dict
+    :param _path: Path to file as string
+    :param _size: Size of the payload in bytes as int
+    :return: None
+    """
+    source, seed = payload_source(_configuration)
+    if source == "random":
+        return create_random_file(_path, _size / (1024 * 1024))
+
+    try:
+        with open(_path, "wb") as payload_file:
+            if source == "pool":
+                payload_file.write(pooled_payload(seed, _size))
+            else:
+                for chunk in SeededPayload(seed, _size).chunks():
+                    payload_file.write(chunk)
+    except Exception as e:
+        print("CRITICAL - Create payload file error: %s" % e)
+        sys.exit(2)
+
+    return None
+
+
+def payload_md5(_configuration, _size, _function, *_args):
+    """
+    md5 hash of a payload; random payloads are hashed with _function, the hash
+    of seeded payloads is memoized
+    :param _configuration: Configuration as dict
+    :param _size: Size of the payload in bytes as int
+    :param _function: Function that hashes a random payload
+    :param _args: Positional arguments passed to _function
+    :return: md5 hash as string
+    """
+    source, seed = payload_source(_configuration)
+    if source == "random":
+        return _function(*_args)
+
+    return seeded_md5(seed, _size)
+
+
+def payload_part_digests(_configuration, _payload, _part_size):
+    """
+    md5 digests of the parts of a payload in memory; random payloads are
+    hashed, the digests of seeded payloads are memoized
+    :param _configuration: Configuration as dict
+    :param _payload: Payload as bytes
+    :param _part_size: Size of each part in bytes as int
+    :return: Binary md5 digest of each part, in order, as list
+    """
+    source, seed = payload_source(_configuration)
+    if source != "random":
+        return seeded_part_digests(seed, len(_payload), _part_size)
+
+    view = memoryview(_payload)
+    return [
+        hashlib.md5(view[offset : offset + _part_size]).digest()
+        for offset in range(0, max(len(_payload), 1), _part_size)
+    ]
+
+
+def md5_data(_data):
+    """
+    Compute the md5 hash of data in memory
+    :param _data: Data as bytes or memoryview
+    :return: md5 hash of data as string
+    """
+    return hashlib.md5(_data).hexdigest()
+
+
+def hash_file(_path, _hash):
+    """
+    Feed a local file to a hash through a reused buffer
+    :param _path: local path to file as string
+    :param _hash: Object with an update method such as hashlib.md5()
+    :return: _hash
+    """
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(_path, "rb", buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            _hash.update(view[:size])
+
+    return _hash
+
+
+def md5(_path):
+    """
+    Compute the md5 hash of a local file
+    :param _path: local path to file as string
+    :return: md5 hash of file as string
+    """
+    try:
+        hash_md5 = hash_file(_path, hashlib.md5())
+    except Exception as e:
+        print("CRITICAL - MD5 error: %s" % e)
+        sys.exit(2)
+
+    return hash_md5.hexdigest()
+
+
+def new_checksum(_algorithm):
+    """
+    Create the hash of an S3 additional checksum algorithm
+    :param _algorithm: CRC32, CRC32C, SHA1 or SHA256 as string
+    :return: botocore checksum object
+    """
+    if _algorithm not in CHECKSUM_ALGORITHMS:
+        print("CRITICAL - Unknown Checksum Algorithm: %s" % _algorithm)
+        sys.exit(2)
+
+    # botocore only computes CRC32C with the optional awscrt package
+    if _algorithm == "CRC32C" and not botocore.compat.HAS_CRT:
+        print("CRITICAL - Checksum Algorithm CRC32C requires awscrt")
+        sys.exit(2)
+
+    return CHECKSUM_ALGORITHMS[_algorithm]()
+
+
+def checksum_data(_algorithm, _data):
+    """
+    Compute the S3 additional checksum of data in memory
+    :param _algorithm: CRC32, CRC32C, SHA1 or SHA256 as string
+    :param _data: Data as bytes or memoryview
+    :return: Base64 encoded checksum as string
+    """
+    checksum = new_checksum(_algorithm)
+    view = memoryview(_data)
+    for offset in range(0, len(view), HASH_BUFFER_SIZE):
+        checksum.update(view[offset : offset + HASH_BUFFER_SIZE])
+
+    return checksum.b64digest()
+
+
+def checksum_file(_algorithm, _path):
+    """
+    Compute the S3 additional checksum of a local file
+    :param _algorithm: CRC32, CRC32C, SHA1 or SHA256 as string
+    :param _path: local path to file as string
+    :return: Base64 encoded checksum as string
+    """
+    checksum = new_checksum(_algorithm)
+    try:
+        hash_file(_path, checksum)
+    except Exception as e:
+        print("CRITICAL - Checksum error: %s" % e)
+        sys.exit(2)
+
+    return checksum.b64digest()
+
+
+class Checksums(object):
+    """
+    md5 hash and optional S3 additional checksum of a download, computed
+    together as the data arrives, and the time spent hashing
+    """
+
+    def __init__(self, _algorithm=""):
+        """
+        :param _algorithm: S3 additional checksum algorithm as string, none if
+            empty
+        """
+        self.md5 = hashlib.md5()
+        self.checksum = new_checksum(_algorithm) if _algorithm else None
+        self.seconds = 0.0
+
+    def update(self, _data):
+        """
+        Hash more data
+        :param _data: Data as bytes or memoryview
+        :return: None
+        """
+        start_time = time.perf_counter()
+        self.md5.update(_data)
+        if self.checksum is not None:
+            self.checksum.update(_data)
+        self.seconds += time.perf_counter() - start_time
+
+        return None
+
+    def part_digest(self):
+        """
+        Binary md5 digest of the data since the previous part, starting the
+        md5 hash of the next part
+        :return: md5 digest as bytes
+        """
+        digest = self.md5.digest()
+        self.md5 = hashlib.md5()
+
+        return digest
+
+    def md5sum(self):
+        """
+        :return: md5 hash as string
+        """
+        return self.md5.hexdigest()
+
+    def checksum_value(self):
+        """
+        :return: Base64 encoded additional checksum as string, None if there
+            is no checksum algorithm
+        """
+        if self.checksum is None:
+            return None
+        return self.checksum.b64digest()
+
+
+def in_flight_seconds(_request_times):
+    """
+    Time during which at least one of a set of requests was in flight
+    :param _request_times: Start and end time.perf_counter() of each request
+        as list of tuple
+    :return: Seconds as float
+    """
+    seconds = 0.0
+    start_time = end_time = None
+    for request_start, request_end in sorted(_request_times):
+        if end_time is None or request_start > end_time:
+            if end_time is not None:
+                seconds += end_time - start_time
+            start_time = request_start
+        end_time = request_end if end_time is None else max(end_time, request_end)
+    if end_time is not None:
+        seconds += end_time - start_time
+
+    return seconds
+
+
+def separate_part_work(
+    _timings, _local_timings, _request_times, _read_phase, _md5_phase
+):
+    """
+    Keep only the time the requests of a multipart upload were in flight in
+    the upload phase and report reading and hashing the parts as local work
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :param _local_timings: Seconds spent reading and hashing each part as
+        list of tuple
+    :param _request_times: Start and end time.perf_counter() of each request
+        of the upload as list of tuple
+    :param _read_phase: Name of the phase the reads are added to as string
+    :param _md5_phase: Name of the phase the hashing is added to as string
+    :return: None
+    """
+    read_seconds = sum(seconds for seconds, md5_seconds in _local_timings)
+    md5_seconds = sum(md5_seconds for seconds, md5_seconds in _local_timings)
+
+    _timings["upload_object"] = in_flight_seconds(_request_times)
+    _timings[_read_phase] = _timings.get(_read_phase, 0.0) + read_seconds
+    _timings[_md5_phase] = _timings.get(_md5_phase, 0.0) + md5_seconds
+
+    return None
+
+
+def separate_hashing(_timings, _phase, _checksums):
+    """
+    Move the time spent hashing during a download out of the download phase
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :param _phase: Name of the hashing phase as string
+    :param _checksums: Checksums of the download
+    :return: None
+    """
+    _timings["download_object"] -= _checksums.seconds
+    _timings[_phase] = _timings.get(_phase, 0.0) + _checksums.seconds
+
+    return None
+
+
+def get_object_etag(_s3, _bucket_name, _object_name):
+    """
+    Get the etag (md5 hash) of an object
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket where the object is stored as string
+    :param _object_name: Name of the object as string
+    :return: etag as string
+    """
+    try:
+        etag = _s3.meta.client.head_object(Bucket=_bucket_name, Key=_object_name)[
+            "ETag"
+        ].replace('"', "")
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+
+    return etag
+
+
+def get_object_checksum(_s3, _bucket_name, _object_name, _algorithm):
+    """
+    Get the S3 additional checksum S3 stored for an object
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket where the object is stored as string
+    :param _object_name: Name of the object as string
+    :param _algorithm: CRC32, CRC32C, SHA1 or SHA256 as string
+    :return: Base64 encoded checksum as string, empty if S3 has none
+    """
+    try:
+        response = _s3.meta.client.head_object(
+            Bucket=_bucket_name, Key=_object_name, ChecksumMode="ENABLED"
+        )
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+
+    return response.get("Checksum%s" % _algorithm, "")
+
+
+def delete_object(_object):
+    """
+    Delete and object from S3
+    :param _object: boto3 object object
+    :return: None
+    """
+    try:
+        _object.delete()
+        print("delete_object: Ok")
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+
+    return None
+
+
+def delete_objects(_s3, _bucket_name, _keys, _workers=1):
+    """
+    Delete objects from S3 with as few DeleteObjects requests as possible
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket where the objects are stored as string
+    :param _keys: Names of the objects as list
+    :param _workers: Number of DeleteObjects requests sent at once as int
+    :return: Response time of each DeleteObjects request in seconds as list
+    """
+
+    def delete_batch(_start):
+        start_time = time.perf_counter()
+        try:
+            response = _s3.meta.client.delete_objects(
+                Bucket=_bucket_name,
+                Delete={
+                    "Objects": [
+                        {"Key": key}
+                        for key in _keys[_start : _start + DELETE_BATCH_SIZE]
+                    ],
+                    "Quiet": True,
+                },
+            )
+        except botocore.exceptions.ClientError as e:
+            print("CRITICAL - S3 ClientError: %s" % e)
+            sys.exit(2)
+
+        if response.get("Errors"):
+            print("CRITICAL - S3 DeleteObjects Error: %s" % response["Errors"][0])
+            sys.exit(2)
+
+        return time.perf_counter() - start_time
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_workers) as executor:
+        return list(executor.map(delete_batch, range(0, len(_keys), DELETE_BATCH_SIZE)))
+
+
+class Leftovers(object):
+    """
+    Buckets, objects and local files created by a run that have not been
+    deleted yet, so they can be removed when the run fails part way
+    """
+
+    def __init__(self, _s3, _bucket_name):
+        """
+        :param _s3: S3 boto3 resource
+        :param _bucket_name: Name of the bucket the run uses as string
+        """
+        self.s3 = _s3
+        self.bucket_name = _bucket_name
+        self.bucket = None
+        self.keys = []
+        self.paths = []
+
+    def clean(self):
+        """
+        Delete everything that is left. A failure is reported but does not
+        replace the result of the run
+        :return: None
+        """
+        try:
+            for path in self.paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            if self.keys:
+                delete_objects(self.s3, self.bucket_name, self.keys)
+            if self.bucket is not None:
+                delete_bucket(self.bucket)
+        except (SystemExit, Exception) as e:
+            print("WARNING - Cleanup Failed: %s" % e)
+
+        self.bucket = None
+        self.keys = []
+        self.paths = []
+
+        return None
+
+
+@contextlib.contextmanager
+def cleanup(_s3, _bucket_name):
+    """
+    Remove the leftovers of a run however it ends
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket the run uses as string
+    :return: Leftovers to register what the run creates
+    """
+    leftovers = Leftovers(_s3, _bucket_name)
+    try:
+        yield leftovers
+    finally:
+        leftovers.clean()
+
+
+def download_object_md5(
+    _s3, _bucket_name, _object_name, _chunk_size=1024 * 1024, _checksums=None
+):
+    """
+    Download an object from S3 into an md5 hash without writing it to disk
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket where the object is stored as string
+    :param _object_name: Name of the object as string
+    :param _chunk_size: Bytes read from the response body at a time as int
+    :param _checksums: Checksums updated with the object, a new one is used
+        if None
+    :return: md5 hash of the object as string
+    """
+    if _checksums is None:
+        _checksums = Checksums()
+    try:
+        body = _s3.meta.client.get_object(Bucket=_bucket_name, Key=_object_name)["Body"]
+        for chunk in body.iter_chunks(_chunk_size):
+            _checksums.update(chunk)
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+
+    return _checksums.md5sum()
+
+
+def download_object_multipart_etag(
+    _s3,
+    _bucket_name,
+    _object_name,
+    _part_size,
+    _chunk_size=1024 * 1024,
+    _checksums=None,
+):
+    """
+    Download an object from S3 into the md5 hashes of its parts without
+    keeping more than a chunk in memory
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket where the object is stored as string
+    :param _object_name: Name of the object as string
+    :param _part_size: Size of each part of the object in bytes as int
+    :param _chunk_size: Bytes read from the response body at a time as int
+    :param _checksums: Checksums updated with the object, a new one is used
+        if None
+    :return: Multipart etag of the downloaded object as string
+    """
+    if _checksums is None:
+        _checksums = Checksums()
+    part_digests = []
+    part_remaining = _part_size
+    try:
+        body = _s3.meta.client.get_object(Bucket=_bucket_name, Key=_object_name)["Body"]
+        for chunk in body.iter_chunks(_chunk_size):
+            view = memoryview(chunk)
+            while len(view) > 0:
+                _checksums.update(view[:part_remaining])
+                used = min(len(view), part_remaining)
+                view = view[used:]
+                part_remaining -= used
+                if part_remaining == 0:
+                    part_digests.append(_checksums.part_digest())
+                    part_remaining = _part_size
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+
+    # The last part is usually shorter than the others
+    if part_remaining != _part_size or len(part_digests) == 0:
+        part_digests.append(_checksums.part_digest())
+
+    return multipart_etag(part_digests)
+
+
+def peak_rss():
+    """
+    Peak resident set size of the process
+    :return: Peak RSS in bytes as int
+    """
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    if sys.platform == "darwin":
+        return max_rss
+    return max_rss * 1024
+
+
+def download_object(_s3, _bucket_name, _object_name, _download_name, _path="/tmp"):
+    """
+    Download an object from S3
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket where the object is stored as string
+    :param _object_name: Name of the object as string
+    :param _download_name: Local filename of the downloaded object as string
+    :param _path: Local path to store the downloaded object as string
+    :return: None
+    """
+    # The transfer threads record connection timings into the phase
+    manager = s3transfer.manager.TransferManager(
+        _s3.meta.client,
+        boto3.s3.transfer.TransferConfig(),
+        executor_cls=ConnectionTimingExecutor,
+    )
+    try:
+        with boto3.s3.transfer.S3Transfer(manager=manager) as transfer:
+            transfer.download_file(
+                _bucket_name, _object_name, "%s/%s" % (_path, _download_name)
+            )
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+
+    return None
+
+
+def upload_object(
+    _s3,
+    _bucket_name,
+    _object_name,
+    _path="/tmp",
+    _body=None,
+    _checksum_algorithm="",
+    _checksum=None,
+):
+    """
+    Upload object to S3
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket to store the object as string
+    :param _object_name: Filename of the object as string
+    :param _path: Local path to the object as string
+    :param _body: Contents of the object as bytes, read from _path if None
+    :param _checksum_algorithm: S3 additional checksum algorithm as string,
+        none if empty
+    :param _checksum: Base64 encoded checksum of the object as string, S3
+        rejects the upload if it does not match
+    :return: Boto3 object object
+    """
+    # The checksum is computed before the upload so it is not timed as part
+    # of the transfer
+    checksum = {}
+    if _checksum_algorithm:
+        checksum = {
+            "ChecksumAlgorithm": _checksum_algorithm,
+            "Checksum%s" % _checksum_algorithm: _checksum,
+        }
+
+    try:
+        if _body is None:
+            _body = open("%s/%s" % (_path, _object_name), "rb")
+        _s3.Object(_bucket_name, _object_name).put(Body=_body, **checksum)
+        uploaded_object = _s3.Object(_bucket_name, _object_name)
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+    except FileNotFoundError as e:
+        print("CRITICAL - FileNotFoundError: %s" % e)
+        sys.exit(2)
+
+    return uploaded_object
+
+
+def memory_part_reader(_data):
+    """
+    Read parts of an object from memory without copying
+    :param _data: Contents of the object as bytes
+    :return: Function of (offset, size) that returns a part as memoryview
+    """
+    view = memoryview(_data)
+
+    def read_part(_offset, _size):
+        return view[_offset : _offset + _size]
+
+    return read_part
+
+
+def file_part_reader(_path):
+    """
+    Read parts of an object from a local file
+    :param _path: Path to file as string
+    :return: Function of (offset, size) that returns a part as bytes
+    """
+
+    def read_part(_offset, _size):
+        try:
+            with open(_path, "rb") as f:
+                f.seek(_offset)
+                return f.read(_size)
+        except Exception as e:
+            print("CRITICAL - Read part error: %s" % e)
+            sys.exit(2)
+
+    return read_part
+
+
+def payload_part_reader(_configuration, _size):
+    """
+    Generate parts of a payload as they are read, so the object is never
+    held in memory
+    :param _configuration: Configuration as dict
+    :param _size: Size of the payload in bytes as int
+    :return: Function of (offset, size) that returns a part as bytes
+    """
+    source, seed = payload_source(_configuration)
+    if source != "random":
+        return SeededPayload(seed, _size).read
+
+    def read_part(_offset, _size):
+        return os.urandom(_size)
+
+    return read_part
+
+
+def streaming_part_size(_object_size, _part_size):
+    """
+    Part size of a streamed upload
+    :param _object_size: Size of the object in bytes as int
+    :param _part_size: Configured part size in bytes as int, 0 for the default
+    :return: Part size in bytes as int, large enough for at most
+        MAX_PARTS parts
+    """
+    if _part_size <= 0:
+        _part_size = STREAMING_PART_SIZE
+
+    return max(_part_size, math.ceil(_object_size / MAX_PARTS))
+
+
+def multipart_etag(_part_digests):
+    """
+    Compute the etag S3 assigns to a multipart object
+    :param _part_digests: Binary md5 digest of each part, in order, as list
+    :return: md5 hash of the part digests and the number of parts as string
+    """
+    return "%s-%s" % (
+        hashlib.md5(b"".join(_part_digests)).hexdigest(),
+        len(_part_digests),
+    )
+
+
+def multipart_upload_object(
+    _s3,
+    _bucket_name,
+    _object_name,
+    _object_size,
+    _read_part,
+    _part_size,
+    _max_concurrency=4,
+    _part_timings=None,
+    _local_timings=None,
+    _part_digests=None,
+    _request_times=None,
+):
+    """
+    Upload an object to S3 with a multipart upload
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket to store the object as string
+    :param _object_name: Name of the object as string
+    :param _object_size: Size of the object in bytes as int
+    :param _read_part: Function of (offset, size) that returns a part
+    :param _part_size: Size of each part in bytes as int
+    :param _max_concurrency: Number of parts uploaded at once as int
+    :param _part_timings: Response time of each part in seconds as list,
+        appended to in place
+    :param _local_timings: Seconds spent reading and hashing each part as
+        list of tuple, appended to in place
+    :param _part_digests: Binary md5 digest of each part when already known,
+        otherwise each part is hashed as it is sent
+    :param _request_times: Start and end time.perf_counter() of each request
+        as list of tuple, appended to in place
+    :return: Boto3 object object and the expected multipart etag as tuple
+    """
+    client = _s3.meta.client
+    parts_count = max(1, math.ceil(_object_size / _part_size))
+    part_digests = [None] * parts_count
+    if _part_digests is not None:
+        part_digests = list(_part_digests)
+    if _part_timings is None:
+        _part_timings = []
+    if _local_timings is None:
+        _local_timings = []
+    if _request_times is None:
+        _request_times = []
+
+    def timed_request(_function, **_kwargs):
+        start_time = time.perf_counter()
+        response = _function(**_kwargs)
+        end_time = time.perf_counter()
+        _request_times.append((start_time, end_time))
+
+        return response, end_time - start_time
+
+    def upload_part(_part_number, _upload_id):
+        offset = (_part_number - 1) * _part_size
+        # The part is read and hashed before its request starts, so the
+        # request times are S3 latency only
+        start_time = time.perf_counter()
+        part = bytes(_read_part(offset, min(_part_size, _object_size - offset)))
+        read_seconds = time.perf_counter() - start_time
+
+        # Hash the part as it is sent instead of rereading the object
+        start_time = time.perf_counter()
+        if _part_digests is None:
+            part_digests[_part_number - 1] = hashlib.md5(part).digest()
+        _local_timings.append((read_seconds, time.perf_counter() - start_time))
+
+        response, seconds = timed_request(
+            client.upload_part,
+            Bucket=_bucket_name,
+            Key=_object_name,
+            PartNumber=_part_number,
+            UploadId=_upload_id,
+            Body=part,
+        )
+        _part_timings.append(seconds)
+
+        return {"ETag": response["ETag"], "PartNumber": _part_number}
+
+    upload_id = None
+    try:
+        response, seconds = timed_request(
+            client.create_multipart_upload, Bucket=_bucket_name, Key=_object_name
+        )
+        upload_id = response["UploadId"]
+
+        with ConnectionTimingExecutor(max_workers=_max_concurrency) as executor:
+            parts = list(
+                executor.map(
+                    upload_part,
+                    range(1, parts_count + 1),
+                    [upload_id] * parts_count,
+                )
+            )
+
+        timed_request(
+            client.complete_multipart_upload,
+            Bucket=_bucket_name,
+            Key=_object_name,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+        uploaded_object = _s3.Object(_bucket_name, _object_name)
+    except botocore.exceptions.ClientError as e:
+        if upload_id is not None:
+            abort_multipart_upload(client, _bucket_name, _object_name, upload_id)
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+
+    return uploaded_object, multipart_etag(part_digests)
+
+
+def abort_multipart_upload(_client, _bucket_name, _object_name, _upload_id):
+    """
+    Abort a multipart upload so its parts are not left behind
+    :param _client: S3 boto3 client
+    :param _bucket_name: Name of the bucket of the upload as string
+    :param _object_name: Name of the object of the upload as string
+    :param _upload_id: Id of the multipart upload as string
+    :return: None
+    """
+    try:
+        _client.abort_multipart_upload(
+            Bucket=_bucket_name, Key=_object_name, UploadId=_upload_id
+        )
+    except botocore.exceptions.ClientError:
+        pass
+
+    return None
+
+
+def part_statistics(_name, _seconds):
+    """
+    Summarize the response times of the requests that make up a phase
+    :param _name: Prefix of the statistics as string
+    :param _seconds: Response times in seconds as list
+    :return: Mean and max response time keyed by name as dict
+    """
+    if len(_seconds) == 0:
+        return {}
+
+    return {
+        "%s_mean" % _name: sum(_seconds) / len(_seconds),
+        "%s_max" % _name: max(_seconds),
+    }
+
+
+def close_connections(_s3):
+    """
+    Close the pooled connections of an S3 boto3 resource so the next request
+    opens a new connection
+    :param _s3: S3 boto3 resource
+    :return: None
+    """
+    _s3.meta.client._endpoint.http_session.close()
+
+    return None
+
+
+def cold_warm(_s3, _bucket_name, _object_name, _body, _md5sum, _timings):
+    """
+    Time the put, head and get of an object first on a new connection and
+    then on the same connection reused from the pool
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket where the object is stored as string
+    :param _object_name: Name of the object as string
+    :param _body: Contents of the object as bytes, read from /tmp if None
+    :param _md5sum: md5 hash of the object as string
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :return: None
+    """
+    requests = {
+        "upload_object": (
+            upload_object,
+            (_s3, _bucket_name, _object_name),
+            {"_body": _body},
+        ),
+        "get_object_etag": (get_object_etag, (_s3, _bucket_name, _object_name), {}),
+        "download_object": (
+            download_object_md5,
+            (_s3, _bucket_name, _object_name),
+            {},
+        ),
+    }
+
+    for phase in COLD_WARM_PHASES:
+        function, args, kwargs = requests[phase]
+        results = []
+        close_connections(_s3)
+        for connection in ("cold", "warm"):
+            results.append(
+                time_phase(
+                    _timings, "%s_%s" % (phase, connection), function, *args, **kwargs
+                )
+            )
+
+        # The object must be unchanged by the repeated requests
+        if phase != "upload_object" and results != [_md5sum, _md5sum]:
+            print("CRITICAL - Cold/Warm %s Failed: %s %s" % (phase, _md5sum, results))
+            sys.exit(2)
+
+    return None
+
+
+def create_bucket(_s3, _name, configuration=None):
+    """
+    Create a S3 bucket
+    :param _s3: S3 boto3 resource
+    :param _name: name of bucket to create as string
+    :param configuration: CreateBucketConfiguration as dict
+    :return: S3 boto3 bucket object
+    """
+    try:
+        if configuration is None:
+            bucket = _s3.create_bucket(Bucket=_name)
+        else:
+            bucket = _s3.create_bucket(
+                Bucket=_name, CreateBucketConfiguration=configuration
+            )
+        print("create_bucket: Ok")
+    except botocore.exceptions.ParamValidationError as e:
+        print("CRITICAL - S3 ParamValidationError: %s" % e)
+        sys.exit(2)
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+    except TypeError as e:
+        print("CRITICAL - S3 bucket TypeError: %s" % e)
+        sys.exit(2)
+
+    return bucket
+
+
+def delete_bucket(_bucket):
+    """
+    Delete a S3 bucket
+    :param _bucket: boto3 Bucket object
+    :return: None
+    """
+    try:
+        _bucket.delete()
+        print("delete_bucket: Ok")
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+
+    return None
+
+
+class AsyncS3(object):
+    """
+    S3 client of the async engine: HTTP/1.1 over asyncio streams with each
+    request signed by botocore, so one event loop keeps thousands of
+    requests in flight without a thread for each
+    """
+
+    def __init__(self, _s3, _configuration, _connections=1):
+        """
+        :param _s3: S3 boto3 resource the credentials, region and signing
+            configuration are taken from
+        :param _configuration: Configuration as dict
+        :param _connections: Most connections open at once as int
+        """
+        url = urllib.parse.urlsplit(_configuration["s3_host"])
+        self.endpoint_url = _configuration["s3_host"]
+        self.scheme = url.scheme
+        self.netloc = url.netloc
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if url.scheme == "https" else None
+        self.virtual = _configuration["addressing_style"] == "virtual"
+        self.connect_timeout = float(_configuration["connect_timeout"])
+        self.read_timeout = float(_configuration["read_timeout"])
+
+        # Sign like the boto3 client of the sync engine, with its credentials
+        # frozen for each request so refreshed credentials are picked up
+        client = _s3.meta.client
+        self.client_config = client.meta.config
+        self.region_name = client.meta.region_name
+        self.credentials = client._get_credentials()
+        self.signer = botocore.auth.AUTH_TYPE_MAPS[
+            SIGNATURES[_configuration["signature"]]["signature_version"]
+        ]
+
+        self.connections = asyncio.Semaphore(_connections)
+        self.idle = []
+
+    async def read(self, _awaitable):
+        """
+        Wait for a read from a connection
+        :param _awaitable: Read or drain of an asyncio stream
+        :return: Data read as bytes
+        """
+        # Timeouts are raised as the botocore errors the sync engine raises
+        try:
+            return await asyncio.wait_for(_awaitable, self.read_timeout)
+        except asyncio.TimeoutError:
+            raise botocore.exceptions.ReadTimeoutError(
+                endpoint_url=self.endpoint_url
+            ) from None
+
+    async def request(
+        self, _operation, _method, _bucket_name, _key="", _body=b"", _sink=None
+    ):
+        """
+        Send a signed request and read its response
+        :param _operation: Name of the S3 operation reported in errors as string
+        :param _method: HTTP method as string
+        :param _bucket_name: Name of the bucket as string
+        :param _key: Name of the object as string, empty for the bucket
+        :param _body: Request body as bytes
+        :param _sink: Function called with each chunk of a successful response
+            body, the body is returned instead if None
+        :return: Response headers with lowercase names as dict and body as bytes
+        """
+        key = urllib.parse.quote(_key, safe="/~")
+        if self.virtual:
+            host = "%s.%s" % (_bucket_name, self.netloc)
+            path = "/%s" % key
+        else:
+            host = self.netloc
+            path = "/%s/%s" % (_bucket_name, key) if _key else "/%s" % _bucket_name
+
+        request = botocore.awsrequest.AWSRequest(
+            method=_method, url="%s://%s%s" % (self.scheme, host, path), data=_body
+        )
+        request.headers["Host"] = host
+        request.context["client_config"] = self.client_config
+
+        # The bucket of a virtual host request is signed as part of the path
+        # by the "s3" signature, like the sync engine does
+        if self.virtual:
+            request.auth_path = "/%s/%s" % (_bucket_name, key)
+        self.signer(
+            self.credentials.get_frozen_credentials(), "s3", self.region_name
+        ).add_auth(request)
+        request.headers["Content-Length"] = str(len(_body))
+        head = "%s %s HTTP/1.1\r\n%s\r\n" % (
+            _method,
+            path,
+            "".join("%s: %s\r\n" % header for header in request.headers.items()),
+        )
+
+        async with self.connections:
+            # A pooled connection the endpoint closed fails before the status
+            # line; the request is sent again on a new connection
+            while True:
+                reused = len(self.idle) > 0
+                if reused:
+                    reader, writer = self.idle.pop()
+                else:
+                    try:
+                        reader, writer = await asyncio.wait_for(
+                            asyncio.open_connection(
+                                self.host,
+                                self.port,
+                                ssl=self.ssl,
+                                limit=HASH_BUFFER_SIZE,
+                            ),
+                            self.connect_timeout,
+                        )
+                    except asyncio.TimeoutError:
+                        raise botocore.exceptions.ConnectTimeoutError(
+                            endpoint_url=self.endpoint_url
+                        ) from None
+                try:
+                    writer.write(head.encode("latin-1"))
+                    if _body:
+                        writer.write(_body)
+                    await self.read(writer.drain())
+                    status_line = await self.read(reader.readline())
+                    if not status_line:
+                        raise ConnectionResetError("Connection closed by the endpoint")
+                    status, headers, body = await self.response(
+                        reader, status_line, _method, _sink
+                    )
+                except ConnectionError:
+                    writer.close()
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                break
+
+            if headers.get("connection", "").lower() == "close":
+                writer.close()
+            else:
+                self.idle.append((reader, writer))
+
+        if status >= 300:
+            code = re.search(rb"<Code>(.*?)</Code>", body)
+            message = re.search(rb"<Message>(.*?)</Message>", body)
+            raise botocore.exceptions.ClientError(
+                {
+                    "Error": {
+                        "Code": code.group(1).decode() if code else str(status),
+                        "Message": message.group(1).decode() if message else "",
+                    },
+                    "ResponseMetadata": {"HTTPStatusCode": status},
+                },
+                _operation,
+            )
+
+        return headers, body
+
+    async def response(self, _reader, _status_line, _method, _sink):
+        """
+        Read the headers and body of a response
+        :param _reader: asyncio StreamReader of the connection
+        :param _status_line: Status line of the response as bytes
+        :param _method: HTTP method of the request as string
+        :param _sink: Function called with each chunk of a successful body
+        :return: Status as int, headers with lowercase names as dict and the
+            body as bytes when it was not passed to _sink
+        """
+        status = int(_status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.read(_reader.readline())
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        chunks = []
+        sink = _sink if _sink is not None and status < 300 else chunks.append
+        if _method == "HEAD" or status in (204, 304):
+            pass
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                size = int((await self.read(_reader.readline())).split(b";")[0], 16)
+                if size == 0:
+                    while (await self.read(_reader.readline())) not in (
+                        b"\r\n",
+                        b"\n",
+                        b"",
+                    ):
+                        pass
+                    break
+                await self.body(_reader, size, sink)
+                await self.read(_reader.readline())
+        elif "content-length" in headers:
+            await self.body(_reader, int(headers["content-length"]), sink)
+        else:
+            # The body ends when the endpoint closes the connection
+            headers["connection"] = "close"
+            chunk = await self.read(_reader.read(HASH_BUFFER_SIZE))
+            while chunk:
+                sink(chunk)
+                chunk = await self.read(_reader.read(HASH_BUFFER_SIZE))
+
+        return status, headers, b"".join(chunks)
+
+    async def body(self, _reader, _length, _sink):
+        """
+        Pass a body of known length to a function chunk by chunk
+        :param _reader: asyncio StreamReader of the connection
+        :param _length: Length of the body in bytes as int
+        :param _sink: Function called with each chunk
+        :return: None
+        """
+        while _length > 0:
+            chunk = await self.read(_reader.read(min(_length, HASH_BUFFER_SIZE)))
+            if not chunk:
+                raise ConnectionResetError("Connection closed by the endpoint")
+            _sink(chunk)
+            _length -= len(chunk)
+
+        return None
+
+    async def close(self):
+        """
+        Close the pooled connections
+        :return: None
+        """
+        while self.idle:
+            reader, writer = self.idle.pop()
+            writer.close()
+
+        return None
+
+
+async def async_time_phase(_timings, _phase, _awaitable):
+    """
+    Await a coroutine and record how long it took
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :param _phase: Name of the phase as string
+    :param _awaitable: Coroutine of the phase, it starts running when awaited
+    :return: Return value of _awaitable
+    """
+    start_time = time.perf_counter()
+    result = await _awaitable
+    _timings[_phase] = _timings.get(_phase, 0.0) + time.perf_counter() - start_time
+
+    return result
+
+
+async def async_create_bucket(_client, _name):
+    """
+    Create a S3 bucket with the async engine
+    :param _client: AsyncS3 object
+    :param _name: name of bucket to create as string
+    :return: None
+    """
+    try:
+        await _client.request("CreateBucket", "PUT", _name)
+        print("create_bucket: Ok")
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+    except botocore.exceptions.BotoCoreError as e:
+        print("CRITICAL - S3 %s: %s" % (type(e).__name__, e))
+        sys.exit(2)
+
+    return None
+
+
+async def async_upload_object(_client, _bucket_name, _object_name, _body):
+    """
+    Upload an object to S3 with the async engine
+    :param _client: AsyncS3 object
+    :param _bucket_name: Name of the bucket to store the object as string
+    :param _object_name: Name of the object as string
+    :param _body: Contents of the object as bytes
+    :return: None
+    """
+    try:
+        await _client.request("PutObject", "PUT", _bucket_name, _object_name, _body)
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+    except botocore.exceptions.BotoCoreError as e:
+        print("CRITICAL - S3 %s: %s" % (type(e).__name__, e))
+        sys.exit(2)
+
+    return None
+
+
+async def async_get_object_etag(_client, _bucket_name, _object_name):
+    """
+    Get the etag (md5 hash) of an object with the async engine
+    :param _client: AsyncS3 object
+    :param _bucket_name: Name of the bucket where the object is stored as string
+    :param _object_name: Name of the object as string
+    :return: etag as string
+    """
+    try:
+        headers, _ = await _client.request(
+            "HeadObject", "HEAD", _bucket_name, _object_name
+        )
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+    except botocore.exceptions.BotoCoreError as e:
+        print("CRITICAL - S3 %s: %s" % (type(e).__name__, e))
+        sys.exit(2)
+
+    return headers.get("etag", "").replace('"', "")
+
+
+async def async_download_object_md5(
+    _client, _bucket_name, _object_name, _checksums=None
+):
+    """
+    Download an object from S3 into an md5 hash with the async engine
+    :param _client: AsyncS3 object
+    :param _bucket_name: Name of the bucket where the object is stored as string
+    :param _object_name: Name of the object as string
+    :param _checksums: Checksums updated with the object, a new one is used
+        if None
+    :return: md5 hash of the object as string
+    """
+    if _checksums is None:
+        _checksums = Checksums()
+    try:
+        await _client.request(
+            "GetObject", "GET", _bucket_name, _object_name, _sink=_checksums.update
+        )
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+    except botocore.exceptions.BotoCoreError as e:
+        print("CRITICAL - S3 %s: %s" % (type(e).__name__, e))
+        sys.exit(2)
+
+    return _checksums.md5sum()
+
+
+async def async_delete_object(_client, _bucket_name, _object_name):
+    """
+    Delete an object from S3 with the async engine
+    :param _client: AsyncS3 object
+    :param _bucket_name: Name of the bucket where the object is stored as string
+    :param _object_name: Name of the object as string
+    :return: None
+    """
+    try:
+        await _client.request("DeleteObject", "DELETE", _bucket_name, _object_name)
+        print("delete_object: Ok")
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+    except botocore.exceptions.BotoCoreError as e:
+        print("CRITICAL - S3 %s: %s" % (type(e).__name__, e))
+        sys.exit(2)
+
+    return None
+
+
+async def async_delete_bucket(_client, _name):
+    """
+    Delete a S3 bucket with the async engine
+    :param _client: AsyncS3 object
+    :param _name: Name of the bucket as string
+    :return: None
+    """
+    try:
+        await _client.request("DeleteBucket", "DELETE", _name)
+        print("delete_bucket: Ok")
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
+        sys.exit(2)
+    except botocore.exceptions.BotoCoreError as e:
+        print("CRITICAL - S3 %s: %s" % (type(e).__name__, e))
+        sys.exit(2)
+
+    return None
+
+
+def read_configuration(_path):
+    """
+    Read the configuration JSON file
+    :param _path: local path to configuration JSON file as string
+    :return: Decoded contents of path as hash
+    """
+    default_configuration = {
+        "s3_host": "https://localhost:443",
+        "aws_access_key_id": "",
+        "aws_secret_access_key": "",
+        "addressing_style": "auto",
+        "signature": "s3",
+        "engine": "sync",
+        "object_size": "1",
+        "max_pool_connections": "10",
+        "connect_timeout": "60",
+        "read_timeout": "60",
+        "in_memory": "False",
+        "streaming": "False",
+        "checksum_algorithm": "",
+        "connection_timing": "False",
+        "payload": "random",
+        "payload_seed": "0",
+        "cold_warm": "False",
+        "part_size": "0",
+        "max_concurrency": "4",
+        "sweep_sizes": "4KB,64KB,1MB,16MB,256MB",
+        "sweep_iterations": "5",
+        "signatures": "s3,s3v4,s3v4-unsigned,s3v4-streaming",
+        "load_workers": "16",
+        "load_duration": "60",
+        "load_operations": "0",
+        "load_mix": "put:1,head:1,get:4,delete:1",
+        "load_object_size": "4KB",
+        "open_loop_rate": "100",
+        "load_key_naming": "uuid",
+        "key_namings": "uuid,sequential,hot,hashed",
+        "key_prefixes": "16",
+        "async_concurrency": "1000",
+        "load_processes": "0",
+        "range_object_size": "256MB",
+        "range_chunk_size": "8MB",
+        "range_concurrency": "1,2,4,8,16,32",
+        "list_keys": "10000",
+        "list_prefixes": "16",
+        "list_prefix": "s3-response-time-list/",
+        "list_page_size": "1000",
+        "list_workers": "16",
+        "cleanup_min_age": "3600",
+        "cleanup_workers": "8",
+        "create_bucket": "True",
+        "bucket_name": "",
+        "influxdb_enabled": "False",
+        "influxdb_url": "http://localhost:8086",
+        "influxdb_token": "",
+        "influxdb_org": "",
+        "influxdb_bucket": "",
+        "influxdb_host": "",
+        "influxdb_spool": "/tmp/s3_response_time.spool",
+        "influxdb_spool_size": "10MB",
+        "influxdb_batch_size": "500",
+        "influxdb_flush_interval": "5",
+        "history_path": "/tmp/s3_response_time.history",
+        "history_size": "64MB",
+        "history_files": "4",
+        "warning_thresholds": "",
+        "critical_thresholds": "",
+    }
+
+    # Read the configuration file
+    try:
+        with open(_path, "r") as f:
+            file_configuration = json.load(f)
+    except FileNotFoundError as e:
+        print("CRITICAL - No Credentials Found: %s" % e)
+        sys.exit(2)
+    except json.decoder.JSONDecodeError as e:
+        print("CRITICAL - Could Not Decode Credentials JSON: %s" % e)
+        sys.exit(2)
+
+    # Merge the default config with the file config
+    configuration = {**default_configuration, **file_configuration}
+
+    # S3 would only reject smaller parts once the upload is complete
+    part_size = parse_size(configuration["part_size"])
+    if 0 < part_size < MIN_PART_SIZE:
+        print(
+            "CRITICAL - Invalid part size: %s, parts must be at least %s"
+            % (configuration["part_size"], format_size(MIN_PART_SIZE))
+        )
+        sys.exit(2)
+
+    return configuration
+
+
+def s3_auth(
+    _aws_access_key_id,
+    _aws_secret_access_key,
+    _s3_host,
+    _addressing_style="auto",
+    _max_pool_connections=10,
+    _connect_timeout=60,
+    _read_timeout=60,
+    _connection_timing=False,
+    _signature="s3",
+    _max_attempts=None,
+):
+    """
+    Authenticate to S3
+    :param _aws_access_key_id: AWS access key
+    :param _aws_secret_access_key: AWS secret key
+    :param _s3_host: S3 host
+    :param _addressing_style: S3 addressing style: 'auto', 'path' or 'virtual'
+    :param _max_pool_connections: Size of the urllib3 connection pool as int
+    :param _connect_timeout: Seconds to wait for a connection as float
+    :param _read_timeout: Seconds to wait for a response as float
+    :param _connection_timing: Record connection timings of each request as bool
+    :param _signature: Request signing mode, a key of SIGNATURES, as string
+    :param _max_attempts: Attempts of each request including retries as int,
+        None for the botocore default
+    :return: S3 boto3 resource object
+    """
+    if _signature not in SIGNATURES:
+        print("CRITICAL - Unknown Signature: %s" % _signature)
+        sys.exit(2)
+    signature = SIGNATURES[_signature]
+
+    s3_configuration = {"addressing_style": _addressing_style}
+    if "payload_signing_enabled" in signature:
+        s3_configuration["payload_signing_enabled"] = signature[
+            "payload_signing_enabled"
+        ]
+
+    s3 = boto3.resource(
+        "s3",
+        aws_access_key_id=_aws_access_key_id,
+        aws_secret_access_key=_aws_secret_access_key,
+        endpoint_url=_s3_host,
+        config=botocore.client.Config(
+            signature_version=signature["signature_version"],
+            s3=s3_configuration,
+            max_pool_connections=_max_pool_connections,
+            tcp_keepalive=True,
+            connect_timeout=_connect_timeout,
+            read_timeout=_read_timeout,
+            # botocore would otherwise hash every body inside the timed
+            # transfer; checksum_algorithm adds checksums explicitly
+            request_checksum_calculation=signature.get(
+                "request_checksum_calculation", "when_required"
+            ),
+            response_checksum_validation="when_required",
+            retries=(
+                None if _max_attempts is None else {"total_max_attempts": _max_attempts}
+            ),
+        ),
+    )
+
+    if _connection_timing:
+        instrument_connections(s3.meta.client)
+
+    return s3
+
+
+def parse_arguments(_args):
+    """
+    Parse Commandline Arguments
+    :param _args: *args positional arguments
+    :return: Commandline arguments parsed by argparse
+    """
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "-c",
+        metavar="configuration_file",
+        dest="configuration_files",
+        help="Files, or directories of *.json files, that contain the "
+        "configuration. Multiple endpoints are probed concurrently.",
+        action="append",
+        nargs="+",
+        required=True,
+    )
+
+    parser.add_argument(
+        "--workers",
+        metavar="count",
+        dest="workers",
+        help="Maximum number of endpoints probed at once (default: 8).",
+        type=int,
+        default=8,
+    )
+
+    parser.add_argument(
+        "--mode",
+        dest="mode",
+        help="What to measure (default: probe).",
+        choices=sorted(MODES),
+        default="probe",
+    )
+
+    parser.add_argument(
+        "--daemon",
+        dest="daemon",
+        help="Keep running and probe every --interval seconds.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--interval",
+        metavar="seconds",
+        dest="interval",
+        help="Seconds between probe cycles in daemon mode (default: 60).",
+        type=float,
+        default=60.0,
+    )
+
+    parser.add_argument(
+        "--jitter",
+        metavar="seconds",
+        dest="jitter",
+        help="Maximum random offset of the daemon schedule "
+        "(default: 10%% of --interval).",
+        type=float,
+        default=None,
+    )
+
+    parser.add_argument(
+        "--summary-interval",
+        metavar="seconds",
+        dest="summary_interval",
+        help="Seconds of each window the daemon reports latency percentiles "
+        "for (default: 3600).",
+        type=float,
+        default=3600.0,
+    )
+
+    parser.add_argument(
+        "--summarize",
+        metavar="window",
+        dest="summarize",
+        help="Summarize the history of the endpoints over a window such as "
+        "24h or 7d instead of probing them.",
+        default=None,
+    )
+
+    args = parser.parse_args(_args)
+
+    # Flatten repeated -c options into a single list
+    args.configuration_files = [
+        path for paths in args.configuration_files for path in paths
+    ]
+
+    return args
+
+
+def probe_bucket_name(_configuration):
+    """
+    Name of the bucket used by a probe
+    :param _configuration: Configuration as dict
+    :return: bucket_name, or a random name when bucket_name is not set, as string
+    """
+    if _configuration["bucket_name"] == "":
+        return probe_object_name()
+
+    return _configuration["bucket_name"]
+
+
+def probe_object_name():
+    """
+    Random name of a bucket or object created by a probe, recognizable by
+    PROBE_PREFIX
+    :return: Name as string
+    """
+    return "%s%s" % (PROBE_PREFIX, uuid.uuid4())
+
+
+def probe(_s3, _configuration, _timings):
+    """
+    Run one probe cycle against S3, removing what it created even when it
+    fails
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :return: Total time of the S3 operations in seconds as float
+    """
+    engine = _configuration["engine"]
+    if engine not in ENGINES:
+        print("CRITICAL - Unknown Engine: %s" % engine)
+        sys.exit(2)
+
+    # A failed cycle is recorded in the history store here; a completed one
+    # is recorded by report() once the thresholds set its status
+    try:
+        with cleanup(_s3, probe_bucket_name(_configuration)) as leftovers:
+            if engine == "async":
+                total_time = asyncio.run(
+                    async_probe_operations(_s3, _configuration, _timings, leftovers)
+                )
+            else:
+                total_time = probe_operations(_s3, _configuration, _timings, leftovers)
+    except SystemExit as e:
+        record_history(
+            _configuration, e.code if isinstance(e.code, int) else 2, None, _timings
+        )
+        raise
+
+    return total_time
+
+
+def probe_operations(_s3, _configuration, _timings, _leftovers):
+    """
+    Run the operations of one probe cycle against S3
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :param _leftovers: Leftovers to register what the probe creates
+    :return: Total time of the S3 operations in seconds as float
+    """
+    bucket_name = _leftovers.bucket_name
+    object_name = probe_object_name()
+    download_name = "%s-downloaded" % object_name
+    object_size = parse_size(_configuration["object_size"])
+    create = bool(util.strtobool(_configuration["create_bucket"]))
+    in_memory = bool(util.strtobool(_configuration["in_memory"]))
+    streaming = bool(util.strtobool(_configuration["streaming"]))
+    part_size = parse_size(_configuration["part_size"])
+
+    # A streamed object is generated part by part as it is uploaded, so it is
+    # neither held in memory nor written to a file
+    if streaming:
+        in_memory = False
+        part_size = streaming_part_size(object_size, part_size)
+
+    # S3 additional checksums are added to single PUT uploads; multipart
+    # uploads are verified by their etag
+    checksum_algorithm = _configuration["checksum_algorithm"].upper()
+    if part_size > 0:
+        checksum_algorithm = ""
+    local_checksum = None
+    if checksum_algorithm:
+        new_checksum(checksum_algorithm)
+
+    # Create the s3 bucket if create_bucket is True
+    if create:
+        bucket = time_phase(_timings, "create_bucket", create_bucket, _s3, bucket_name)
+        _leftovers.bucket = bucket
+
+    # The object and local files are registered before they are created, in
+    # case creating them fails part way
+    _leftovers.keys.append(object_name)
+    _leftovers.paths += ["/tmp/%s" % object_name, "/tmp/%s" % download_name]
+
+    part_digests = None
+    local_md5sum = None
+    if streaming:
+        # The md5 hash of each part is computed as it is uploaded, except for
+        # seeded payloads whose part hashes are computed once and reused
+        read_part = payload_part_reader(_configuration, object_size)
+        source, seed = payload_source(_configuration)
+        if source != "random":
+            part_digests = time_phase(
+                _timings,
+                "md5_random_payload",
+                seeded_part_digests,
+                seed,
+                object_size,
+                part_size,
+            )
+    elif in_memory:
+        # Create the random payload in memory
+        payload = time_phase(
+            _timings,
+            "create_random_payload",
+            create_payload,
+            _configuration,
+            object_size,
+        )
+
+        if part_size > 0:
+            # The md5 hash of each part is computed once, for the upload and
+            # for the multipart etag the download is compared with
+            part_digests = time_phase(
+                _timings,
+                "md5_random_payload",
+                payload_part_digests,
+                _configuration,
+                payload,
+                part_size,
+            )
+        else:
+            # Get md5 hash of the random payload
+            local_md5sum = time_phase(
+                _timings,
+                "md5_random_payload",
+                payload_md5,
+                _configuration,
+                object_size,
+                md5_data,
+                payload,
+            )
+
+        # Get the additional checksum of the random payload
+        if checksum_algorithm:
+            local_checksum = time_phase(
+                _timings,
+                "checksum_random_payload",
+                checksum_data,
+                checksum_algorithm,
+                payload,
+            )
+        read_part = memory_part_reader(payload)
+    else:
+        # Create random file
+        time_phase(
+            _timings,
+            "create_random_file",
+            create_payload_file,
+            _configuration,
+            "/tmp/%s" % object_name,
+            object_size,
+        )
+
+        # Get md5 hash of the random file
+        local_md5sum = time_phase(
+            _timings,
+            "md5_random_file",
+            payload_md5,
+            _configuration,
+            object_size,
+            md5,
+            "/tmp/%s" % object_name,
+        )
+
+        # Get the additional checksum of the random file
+        if checksum_algorithm:
+            local_checksum = time_phase(
+                _timings,
+                "checksum_random_file",
+                checksum_file,
+                checksum_algorithm,
+                "/tmp/%s" % object_name,
+            )
+        read_part = file_part_reader("/tmp/%s" % object_name)
+
+    if part_size > 0:
+        # Upload the random data in parts; the etag of a multipart object is
+        # not the md5 hash of the object so the expected etag is returned
+        part_timings = []
+        local_timings = []
+        request_times = []
+        uploaded_object, expected_etag = time_phase(
+            _timings,
+            "upload_object",
+            multipart_upload_object,
+            _s3,
+            bucket_name,
+            object_name,
+            object_size,
+            read_part,
+            part_size,
+            int(_configuration["max_concurrency"]),
+            part_timings,
+            local_timings,
+            part_digests,
+            request_times,
+        )
+        _timings.update(part_statistics("upload_part", part_timings))
+
+        # Generating or reading and hashing the parts is local work
+        if in_memory or streaming:
+            phases = ("create_random_payload", "md5_random_payload")
+        else:
+            phases = ("create_random_file", "md5_random_file")
+        separate_part_work(_timings, local_timings, request_times, *phases)
+    elif in_memory:
+        # Upload the random payload
+        uploaded_object = time_phase(
+            _timings,
+            "upload_object",
+            upload_object,
+            _s3,
+            bucket_name,
+            object_name,
+            _body=payload,
+            _checksum_algorithm=checksum_algorithm,
+            _checksum=local_checksum,
+        )
+        expected_etag = local_md5sum
+    else:
+        # Upload the random file
+        uploaded_object = time_phase(
+            _timings,
+            "upload_object",
+            upload_object,
+            _s3,
+            bucket_name,
+            object_name,
+            _checksum_algorithm=checksum_algorithm,
+            _checksum=local_checksum,
+        )
+        expected_etag = local_md5sum
+
+    # Get the etag of the uploaded random file
+    etag = time_phase(
+        _timings, "get_object_etag", get_object_etag, _s3, bucket_name, object_name
+    )
+
+    # Verify the original and s3 md5 hashes match
+    if expected_etag == etag:
+        print("upload_object: Ok")
+    else:
+        print("CRITICAL - Upload Object Failed: %s %s" % (expected_etag, etag))
+        sys.exit(2)
+
+    # Verify the original and s3 additional checksums match
+    if checksum_algorithm:
+        checksum = time_phase(
+            _timings,
+            "get_object_checksum",
+            get_object_checksum,
+            _s3,
+            bucket_name,
+            object_name,
+            checksum_algorithm,
+        )
+        if local_checksum == checksum:
+            print("upload_checksum: Ok")
+        else:
+            print(
+                "CRITICAL - Upload Checksum Failed: %s %s" % (local_checksum, checksum)
+            )
+            sys.exit(2)
+
+    # Repeat the put, head and get on a fresh and on a pooled connection
+    if bool(util.strtobool(_configuration["cold_warm"])) and not streaming:
+        # The cold and warm requests upload the payload in a single PUT
+        if local_md5sum is None:
+            local_md5sum = time_phase(
+                _timings,
+                "md5_random_payload",
+                payload_md5,
+                _configuration,
+                object_size,
+                md5_data,
+                payload,
+            )
+        cold_warm(
+            _s3,
+            bucket_name,
+            object_name,
+            payload if in_memory else None,
+            local_md5sum,
+            _timings,
+        )
+
+    if in_memory:
+        del payload
+
+    if streaming or (in_memory and part_size > 0):
+        # Stream the object through the md5 hash of each part and compare
+        # the multipart etag they make with the etag of the upload
+        local_md5sum = expected_etag
+        checksums = Checksums()
+        download_md5sum = time_phase(
+            _timings,
+            "download_object",
+            download_object_multipart_etag,
+            _s3,
+            bucket_name,
+            object_name,
+            part_size,
+            _checksums=checksums,
+        )
+        separate_hashing(_timings, "md5_downloaded_payload", checksums)
+    elif in_memory:
+        # Stream the object through the md5 hash without writing it to disk
+        checksums = Checksums(checksum_algorithm)
+        download_md5sum = time_phase(
+            _timings,
+            "download_object",
+            download_object_md5,
+            _s3,
+            bucket_name,
+            object_name,
+            _checksums=checksums,
+        )
+        separate_hashing(_timings, "md5_downloaded_payload", checksums)
+        download_checksum = checksums.checksum_value()
+    else:
+        # Remove random file
+        time_phase(_timings, "remove_file", remove_file, "/tmp/%s" % object_name)
+
+        # Download the object
+        time_phase(
+            _timings,
+            "download_object",
+            download_object,
+            _s3,
+            bucket_name,
+            object_name,
+            download_name,
+        )
+
+        # Get md5 hash of the downloaded file
+        download_md5sum = time_phase(
+            _timings, "md5_downloaded_file", md5, "/tmp/%s" % download_name
+        )
+
+        # Get the additional checksum of the downloaded file
+        if checksum_algorithm:
+            download_checksum = time_phase(
+                _timings,
+                "checksum_downloaded_file",
+                checksum_file,
+                checksum_algorithm,
+                "/tmp/%s" % download_name,
+            )
+
+        # Remove downloaded file
+        time_phase(_timings, "remove_file", remove_file, "/tmp/%s" % download_name)
+
+    # Verify the original and downloaded md5 hashes match
+    if local_md5sum == download_md5sum:
+        print("download_object: Ok")
+    else:
+        print("CRITICAL - Download Object Failed: %s %s" % (local_md5sum, etag))
+        sys.exit(2)
+
+    # Verify the original and downloaded additional checksums match
+    if checksum_algorithm:
+        if local_checksum == download_checksum:
+            print("download_checksum: Ok")
+        else:
+            print(
+                "CRITICAL - Download Checksum Failed: %s %s"
+                % (local_checksum, download_checksum)
+            )
+            sys.exit(2)
+
+    # Delete Object
+    time_phase(_timings, "delete_object", delete_object, uploaded_object)
+    _leftovers.keys.remove(object_name)
+
+    # Delete Bucket if create_bucket is True
+    if create:
+        time_phase(_timings, "delete_bucket", delete_bucket, bucket)
+        _leftovers.bucket = None
+
+    # The total time only includes the S3 operations; local work such as
+    # creating and hashing the random file is reported separately
+    total_time = sum(_timings[phase] for phase in S3_PHASES if phase in _timings)
+
+    _timings["peak_rss"] = peak_rss()
+
+    return total_time
+
+
+async def async_probe_operations(_s3, _configuration, _timings, _leftovers):
+    """
+    Run the operations of one probe cycle with the async engine. The cycle
+    uploads an in-memory payload with a single PUT and records the same
+    phases as the sync engine
+    :param _s3: S3 boto3 resource the async client is configured from
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :param _leftovers: Leftovers to register what the probe creates
+    :return: Total time of the S3 operations in seconds as float
+    """
+    bucket_name = _leftovers.bucket_name
+    object_name = probe_object_name()
+    object_size = parse_size(_configuration["object_size"])
+    create = bool(util.strtobool(_configuration["create_bucket"]))
+    client = AsyncS3(_s3, _configuration)
+
+    try:
+        # Create the s3 bucket if create_bucket is True
+        if create:
+            await async_time_phase(
+                _timings, "create_bucket", async_create_bucket(client, bucket_name)
+            )
+            _leftovers.bucket = _s3.Bucket(bucket_name)
+        _leftovers.keys.append(object_name)
+
+        # Create the random payload in memory and get its md5 hash
+        payload = time_phase(
+            _timings,
+            "create_random_payload",
+            create_payload,
+            _configuration,
+            object_size,
+        )
+        local_md5sum = time_phase(
+            _timings,
+            "md5_random_payload",
+            payload_md5,
+            _configuration,
+            object_size,
+            md5_data,
+            payload,
+        )
+
+        # Upload the random payload
+        await async_time_phase(
+            _timings,
+            "upload_object",
+            async_upload_object(client, bucket_name, object_name, payload),
+        )
+        del payload
+
+        # Get the etag of the uploaded random payload
+        etag = await async_time_phase(
+            _timings,
+            "get_object_etag",
+            async_get_object_etag(client, bucket_name, object_name),
+        )
+
+        # Verify the original and s3 md5 hashes match
+        if local_md5sum == etag:
+            print("upload_object: Ok")
+        else:
+            print("CRITICAL - Upload Object Failed: %s %s" % (local_md5sum, etag))
+            sys.exit(2)
+
+        # Stream the object through the md5 hash without writing it to disk
+        checksums = Checksums()
+        download_md5sum = await async_time_phase(
+            _timings,
+            "download_object",
+            async_download_object_md5(client, bucket_name, object_name, checksums),
+        )
+        separate_hashing(_timings, "md5_downloaded_payload", checksums)
+
+        # Verify the original and downloaded md5 hashes match
+        if local_md5sum == download_md5sum:
+            print("download_object: Ok")
+        else:
+            print(
+                "CRITICAL - Download Object Failed: %s %s"
+                % (local_md5sum, download_md5sum)
+            )
+            sys.exit(2)
+
+        # Delete Object
+        await async_time_phase(
+            _timings,
+            "delete_object",
+            async_delete_object(client, bucket_name, object_name),
+        )
+        _leftovers.keys.remove(object_name)
+
+        # Delete Bucket if create_bucket is True
+        if create:
+            await async_time_phase(
+                _timings, "delete_bucket", async_delete_bucket(client, bucket_name)
+            )
+            _leftovers.bucket = None
+    finally:
+        await client.close()
+
+    # The total time only includes the S3 operations; local work such as
+    # creating and hashing the random payload is reported separately
+    total_time = sum(_timings[phase] for phase in S3_PHASES if phase in _timings)
+
+    _timings["peak_rss"] = peak_rss()
+
+    return total_time
+
+
+def report(_configuration, _total_time, _timings, _influxdb_writer=None):
+    """
+    Report the result of a probe cycle to Influxdb and stdout, with its
+    status set by the warning and critical thresholds
+    :param _configuration: Configuration as dict
+    :param _total_time: Total time of the S3 operations in seconds as float
+    :param _timings: Phase durations in seconds as dict
+    :param _influxdb_writer: InfluxDBWriter to reuse between probe cycles
+    :return: Nagios exit code as int
+    """
+    # If influxdb_enabled is True in the config file the write the response
+    # time to influxdb
+    if bool(util.strtobool(_configuration["influxdb_enabled"])):
+        write_to_influxdb(_configuration, _total_time, _timings, _influxdb_writer)
+
+    metrics = probe_metrics(_configuration, _total_time, _timings)
+    exit_code, breaches = check_thresholds(_configuration, metrics)
+    record_history(_configuration, exit_code, _total_time, _timings)
+    print(
+        "%s - %stotal_time: %s %s | %s"
+        % (
+            NAGIOS_STATUS[exit_code],
+            "".join("%s " % breach for breach in breaches),
+            _total_time,
+            format_timings(_timings),
+            format_perfdata(_configuration, metrics),
+        )
+    )
+
+    return exit_code
+
+
+def run_probe(_s3, _configuration, _timings, _influxdb_writer=None):
+    """
+    Run and report one probe cycle
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :param _influxdb_writer: InfluxDBWriter to reuse between probe cycles
+    :return: None
+    """
+    total_time = probe(_s3, _configuration, _timings)
+    exit_code = report(_configuration, total_time, _timings, _influxdb_writer)
+
+    # A breached threshold fails the cycle like any other failure
+    if exit_code != 0:
+        sys.exit(exit_code)
+
+    return None
+
+
+def size_sweep(_s3, _configuration):
+    """
+    Measure upload and download latency and throughput for a range of sizes
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :return: Results of each size as list of dict
+    """
+    bucket_name = probe_bucket_name(_configuration)
+    object_name = probe_object_name()
+    create = bool(util.strtobool(_configuration["create_bucket"]))
+    iterations = int(_configuration["sweep_iterations"])
+    sizes = [parse_size(size) for size in _configuration["sweep_sizes"].split(",")]
+
+    with cleanup(_s3, bucket_name) as leftovers:
+        if create:
+            bucket = create_bucket(_s3, bucket_name)
+            leftovers.bucket = bucket
+        leftovers.keys.append(object_name)
+
+        results = []
+        for size in sizes:
+            payload = create_payload(_configuration, size)
+            local_md5sum = payload_md5(_configuration, size, md5_data, payload)
+
+            timings = {}
+            for iteration in range(iterations):
+                uploaded_object = time_phase(
+                    timings,
+                    "upload_object",
+                    upload_object,
+                    _s3,
+                    bucket_name,
+                    object_name,
+                    _body=payload,
+                )
+
+                download_md5sum = time_phase(
+                    timings,
+                    "download_object",
+                    download_object_md5,
+                    _s3,
+                    bucket_name,
+                    object_name,
+                )
+
+                if local_md5sum != download_md5sum:
+                    print(
+                        "CRITICAL - Download Object Failed: %s %s"
+                        % (local_md5sum, download_md5sum)
+                    )
+                    sys.exit(2)
+            del payload
+
+            delete_object(uploaded_object)
+
+            result = {"size": size}
+            for phase in ("upload_object", "download_object"):
+                result[phase] = timings[phase] / iterations
+                result["%s_mbps" % phase] = (
+                    size * iterations / timings[phase] / (1024 * 1024)
+                )
+            results.append(result)
+        leftovers.keys.remove(object_name)
+
+        if create:
+            delete_bucket(bucket)
+            leftovers.bucket = None
+
+    return results
+
+
+def run_size_sweep(_s3, _configuration, _timings, _influxdb_writer=None):
+    """
+    Run and report an object size sweep
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, unused
+    :param _influxdb_writer: InfluxDBWriter to reuse between sweeps
+    :return: None
+    """
+    results = size_sweep(_s3, _configuration)
+
+    points = []
+    for result in results:
+        print(
+            "size: %s upload_object: %s upload_mbps: %s "
+            "download_object: %s download_mbps: %s"
+            % (
+                format_size(result["size"]),
+                result["upload_object"],
+                result["upload_object_mbps"],
+                result["download_object"],
+                result["download_object_mbps"],
+            )
+        )
+        point = (
+            Point("size_sweep")
+            .tag("host", _configuration["influxdb_host"])
+            .tag("size", format_size(result["size"]))
+        )
+        for field, value in result.items():
+            point = point.field(field, value)
+        points.append(point)
+
+    if bool(util.strtobool(_configuration["influxdb_enabled"])):
+        write_points_to_influxdb(_configuration, points, _influxdb_writer)
+
+    print("OK - size_sweep: %s sizes" % len(results))
+
+    return None
+
+
+def signing_timer(_client):
+    """
+    Measure how long botocore takes to sign each request of a client,
+    including hashing the payload of a signed payload
+    :param _client: S3 boto3 client
+    :return: Signing time of each request in seconds as list, appended to
+        in place
+    """
+    seconds = []
+    start_time = threading.local()
+
+    def before_sign(**_kwargs):
+        start_time.value = time.perf_counter()
+
+    # Requests are signed by a request-created handler registered with the
+    # client, so a handler registered last runs once signing is done
+    def after_sign(**_kwargs):
+        if getattr(start_time, "value", None) is not None:
+            seconds.append(time.perf_counter() - start_time.value)
+            start_time.value = None
+
+    _client.meta.events.register("before-sign.s3", before_sign)
+    _client.meta.events.register_last("request-created", after_sign)
+
+    return seconds
+
+
+def signature_compare(_configuration):
+    """
+    Measure upload and download latency and the time spent signing under each
+    request signing mode for a range of sizes
+    :param _configuration: Configuration as dict
+    :return: Results of each signing mode and size as list of dict
+    """
+    bucket_name = probe_bucket_name(_configuration)
+    object_name = probe_object_name()
+    create = bool(util.strtobool(_configuration["create_bucket"]))
+    iterations = int(_configuration["sweep_iterations"])
+    sizes = [parse_size(size) for size in _configuration["sweep_sizes"].split(",")]
+    signatures = [
+        signature.strip() for signature in _configuration["signatures"].split(",")
+    ]
+
+    # One client, and connection pool, for each signing mode
+    clients = {}
+    for signature in signatures:
+        clients[signature] = endpoint_auth({**_configuration, "signature": signature})
+    signing = {
+        signature: signing_timer(s3.meta.client) for signature, s3 in clients.items()
+    }
+
+    with cleanup(clients[signatures[0]], bucket_name) as leftovers:
+        if create:
+            bucket = create_bucket(clients[signatures[0]], bucket_name)
+            leftovers.bucket = bucket
+        leftovers.keys.append(object_name)
+
+        results = []
+        for size in sizes:
+            payload = create_payload(_configuration, size)
+            local_md5sum = payload_md5(_configuration, size, md5_data, payload)
+
+            for signature in signatures:
+                s3 = clients[signature]
+                timings = {}
+                for iteration in range(iterations):
+                    del signing[signature][:]
+                    uploaded_object = time_phase(
+                        timings,
+                        "upload_object",
+                        upload_object,
+                        s3,
+                        bucket_name,
+                        object_name,
+                        _body=payload,
+                    )
+                    timings["upload_signing"] = timings.get(
+                        "upload_signing", 0.0
+                    ) + sum(signing[signature])
+
+                    del signing[signature][:]
+                    download_md5sum = time_phase(
+                        timings,
+                        "download_object",
+                        download_object_md5,
+                        s3,
+                        bucket_name,
+                        object_name,
+                    )
+                    timings["download_signing"] = timings.get(
+                        "download_signing", 0.0
+                    ) + sum(signing[signature])
+
+                    if local_md5sum != download_md5sum:
+                        print(
+                            "CRITICAL - Download Object Failed: %s %s %s"
+                            % (signature, local_md5sum, download_md5sum)
+                        )
+                        sys.exit(2)
+
+                result = {"signature": signature, "size": size}
+                for phase, seconds in timings.items():
+                    result[phase] = seconds / iterations
+                results.append(result)
+            del payload
+
+            delete_object(uploaded_object)
+        leftovers.keys.remove(object_name)
+
+        if create:
+            delete_bucket(bucket)
+            leftovers.bucket = None
+
+    return results
+
+
+def run_signature_compare(_s3, _configuration, _timings, _influxdb_writer=None):
+    """
+    Run and report a comparison of the request signing modes
+    :param _s3: S3 boto3 resource, unused as each signing mode has its own
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, unused
+    :param _influxdb_writer: InfluxDBWriter to reuse between comparisons
+    :return: None
+    """
+    results = signature_compare(_configuration)
+
+    points = []
+    for result in results:
+        print(
+            "signature: %s size: %s upload_object: %s upload_signing: %s "
+            "download_object: %s download_signing: %s"
+            % (
+                result["signature"],
+                format_size(result["size"]),
+                result["upload_object"],
+                result["upload_signing"],
+                result["download_object"],
+                result["download_signing"],
+            )
+        )
+        point = (
+            Point("signature_compare")
+            .tag("host", _configuration["influxdb_host"])
+            .tag("signature", result["signature"])
+            .tag("size", format_size(result["size"]))
+        )
+        for field, value in result.items():
+            if field not in ("signature", "size"):
+                point = point.field(field, value)
+        points.append(point)
+
+    if bool(util.strtobool(_configuration["influxdb_enabled"])):
+        write_points_to_influxdb(_configuration, points, _influxdb_writer)
+
+    print("OK - signature_compare: %s results" % len(results))
+
+    return None
+
+
+def parse_mix(_mix):
+    """
+    Parse a weighted operation mix such as "put:1,get:4"
+    :param _mix: Comma separated operation:weight pairs as string
+    :return: Weight of each operation as dict
+    """
+    mix = {}
+    try:
+        for pair in _mix.split(","):
+            operation, weight = pair.split(":")
+            operation = operation.strip().lower()
+            if operation not in LOAD_OPERATIONS:
+                raise ValueError("unknown operation %s" % operation)
+            mix[operation] = float(weight)
+    except ValueError as e:
+        print("CRITICAL - Invalid load_mix %s: %s" % (_mix, e))
+        sys.exit(2)
+
+    return mix
+
+
+class LatencyHistogram(object):
+    """
+    Fixed size histogram of response times with log-linear buckets, in the
+    style of an HDR histogram. Values from 1 microsecond to about 71 minutes
+    are recorded with a relative error below 1%, in 3328 counters, however
+    many values are recorded. Histograms can be merged and serialized.
+    """
+
+    # Each power of two is split into SUB_BUCKETS linear buckets
+    SUB_BUCKET_BITS = 7
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    MAX_VALUE = (1 << 32) - 1
+    BUCKETS = (32 - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+
+    PERCENTILES = (("p50", 50.0), ("p90", 90.0), ("p99", 99.0), ("p99_9", 99.9))
+
+    def __init__(self, _counts=None):
+        """
+        :param _counts: Counter of each bucket as array of int64, a new array
+            is allocated if None
+        """
+        if _counts is None:
+            _counts = array.array("q", bytes(8 * self.BUCKETS))
+        self.counts = _counts
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @classmethod
+    def index(cls, _microseconds):
+        """
+        Bucket of a value
+        :param _microseconds: Value in microseconds as int
+        :return: Index of the bucket as int
+        """
+        value = min(max(_microseconds, 0), cls.MAX_VALUE)
+        if value < cls.SUB_BUCKETS:
+            return value
+
+        exponent = value.bit_length() - cls.SUB_BUCKET_BITS - 1
+        return (exponent + 1) * cls.SUB_BUCKETS + (value >> exponent) - cls.SUB_BUCKETS
+
+    @classmethod
+    def value(cls, _index):
+        """
+        Value in the middle of a bucket
+        :param _index: Index of the bucket as int
+        :return: Value in microseconds as float
+        """
+        if _index < cls.SUB_BUCKETS:
+            return float(_index)
+
+        exponent = _index // cls.SUB_BUCKETS - 1
+        lowest = (_index % cls.SUB_BUCKETS + cls.SUB_BUCKETS) << exponent
+        return lowest + ((1 << exponent) - 1) / 2.0
+
+    def record(self, _seconds):
+        """
+        Record a response time
+        :param _seconds: Response time in seconds as float
+        :return: None
+        """
+        microseconds = int(_seconds * 1000000)
+        self.counts[self.index(microseconds)] += 1
+        self.count += 1
+        self.total += microseconds
+        self.max = max(self.max, microseconds)
+
+        return None
+
+    def merge(self, _other):
+        """
+        Add the values recorded by another histogram to this one
+        :param _other: LatencyHistogram object
+        :return: None
+        """
+        for index, count in enumerate(_other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += _other.count
+        self.total += _other.total
+        self.max = max(self.max, _other.max)
+
+        return None
+
+    def percentile(self, _percentile):
+        """
+        Response time below which a percentage of the values fall
+        :param _percentile: Percentage between 0 and 100 as float
+        :return: Response time in seconds as float
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = max(1, math.ceil(self.count * _percentile / 100.0))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.value(index), self.max) / 1000000.0
+
+        return self.max / 1000000.0
+
+    def summary(self):
+        """
+        Summarize the recorded response times
+        :return: Count, mean, percentiles and max in seconds as dict
+        """
+        if self.count == 0:
+            return {"count": 0}
+
+        summary = {"count": self.count, "mean": self.total / self.count / 1000000.0}
+        for name, percentile in self.PERCENTILES:
+            summary[name] = self.percentile(percentile)
+        summary["max"] = self.max / 1000000.0
+
+        return summary
+
+    def to_dict(self):
+        """
+        Serialize the histogram, only non-empty buckets are included
+        :return: Histogram as dict of JSON types
+        """
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "buckets": [
+                [index, count] for index, count in enumerate(self.counts) if count
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, _dict):
+        """
+        Deserialize a histogram created by to_dict
+        :param _dict: Histogram as dict
+        :return: LatencyHistogram object
+        """
+        histogram = cls()
+        for index, count in _dict["buckets"]:
+            histogram.counts[index] = count
+        histogram.count = _dict["count"]
+        histogram.total = _dict["total"]
+        histogram.max = _dict["max"]
+
+        return histogram
+
+
+class LoadOperations(object):
+    """
+    Shared state of the workers of a load: the objects they created and the
+    response times and errors of each operation
+    """
+
+    def __init__(
+        self,
+        _s3,
+        _bucket_name,
+        _mix,
+        _payload,
+        _payload_md5sum=None,
+        _key_naming="uuid",
+        _key_prefixes=16,
+    ):
+        """
+        :param _s3: S3 boto3 resource
+        :param _bucket_name: Name of the bucket the load runs in as string
+        :param _mix: Weight of each operation as dict
+        :param _payload: Contents of the objects uploaded by the load as bytes
+        :param _payload_md5sum: md5 hash of _payload as string, computed if None
+        :param _key_naming: Layout of the created keys from KEY_NAMINGS as string
+        :param _key_prefixes: Number of prefixes hashed keys are spread over as int
+        """
+        self.s3 = _s3
+        self.bucket_name = _bucket_name
+        self.mix = _mix
+        self.payload = _payload
+        if _payload_md5sum is None:
+            _payload_md5sum = md5_data(_payload)
+        self.payload_md5sum = _payload_md5sum
+        self.key_naming = _key_naming
+        self.key_prefixes = _key_prefixes
+        self.lock = threading.Lock()
+        self.keys = []
+        self.issued = 0
+        self.created = 0
+        self.latencies = {
+            operation: LatencyHistogram() for operation in LOAD_OPERATIONS
+        }
+        self.errors = {operation: 0 for operation in LOAD_OPERATIONS}
+        self.throttles = {operation: 0 for operation in LOAD_OPERATIONS}
+        self.bytes = {operation: 0 for operation in LOAD_OPERATIONS}
+
+    def next_operation(self, _limit=0):
+        """
+        Pick the next operation from the mix and the object it works on
+        :param _limit: Total number of operations to issue as int, 0 for no limit
+        :return: Operation and object name as tuple, (None, None) once _limit
+            operations have been issued
+        """
+        with self.lock:
+            if _limit > 0 and self.issued >= _limit:
+                return None, None
+            self.issued += 1
+
+            operation = random.choices(list(self.mix), list(self.mix.values()))[0]
+            # Operations on existing objects need an object to work on
+            if operation != "put" and len(self.keys) == 0:
+                operation = "put"
+
+            if operation == "put":
+                key = load_key(self.key_naming, self.created, self.key_prefixes)
+                self.created += 1
+            elif operation == "delete":
+                key = self.keys.pop(random.randrange(len(self.keys)))
+            else:
+                key = random.choice(self.keys)
+
+        return operation, key
+
+    def run(self, _operation, _key, _start_time=None):
+        """
+        Run an operation and record its response time or error
+        :param _operation: Operation from LOAD_OPERATIONS as string
+        :param _key: Name of the object as string
+        :param _start_time: time.perf_counter() the response time is measured
+            from, defaults to when the operation starts
+        :return: None
+        """
+        if _start_time is None:
+            _start_time = time.perf_counter()
+
+        try:
+            if _operation == "put":
+                upload_object(self.s3, self.bucket_name, _key, _body=self.payload)
+            elif _operation == "head":
+                get_object_etag(self.s3, self.bucket_name, _key)
+            elif _operation == "get":
+                md5sum = download_object_md5(self.s3, self.bucket_name, _key)
+                if md5sum != self.payload_md5sum:
+                    print("CRITICAL - Download Object Failed: %s" % _key)
+                    sys.exit(2)
+            else:
+                delete_object(self.s3.Object(self.bucket_name, _key))
+        except (SystemExit, Exception) as e:
+            return self.record(_operation, _key, _error=e)
+
+        return self.record(_operation, _key, time.perf_counter() - _start_time)
+
+    async def run_async(self, _client, _operation, _key, _start_time=None):
+        """
+        Run an operation with the async engine and record its response time
+        or error
+        :param _client: AsyncS3 object
+        :param _operation: Operation from LOAD_OPERATIONS as string
+        :param _key: Name of the object as string
+        :param _start_time: time.perf_counter() the response time is measured
+            from, defaults to when the operation starts
+        :return: None
+        """
+        if _start_time is None:
+            _start_time = time.perf_counter()
+
+        try:
+            if _operation == "put":
+                await async_upload_object(_client, self.bucket_name, _key, self.payload)
+            elif _operation == "head":
+                await async_get_object_etag(_client, self.bucket_name, _key)
+            elif _operation == "get":
+                md5sum = await async_download_object_md5(
+                    _client, self.bucket_name, _key
+                )
+                if md5sum != self.payload_md5sum:
+                    print("CRITICAL - Download Object Failed: %s" % _key)
+                    sys.exit(2)
+            else:
+                await async_delete_object(_client, self.bucket_name, _key)
+        except (SystemExit, Exception) as e:
+            return self.record(_operation, _key, _error=e)
+
+        return self.record(_operation, _key, time.perf_counter() - _start_time)
+
+    def record(self, _operation, _key, _seconds=None, _error=None):
+        """
+        Record the response time or error of an operation
+        :param _operation: Operation from LOAD_OPERATIONS as string
+        :param _key: Name of the object as string
+        :param _seconds: Response time in seconds as float
+        :param _error: Exception the operation failed with, None if it succeeded
+        :return: None
+        """
+        with self.lock:
+            if _error is not None:
+                self.errors[_operation] += 1
+                if throttled(_error):
+                    self.throttles[_operation] += 1
+                return None
+
+            self.latencies[_operation].record(_seconds)
+            if _operation == "put":
+                self.keys.append(_key)
+            if _operation in ("put", "get"):
+                self.bytes[_operation] += len(self.payload)
+
+        return None
+
+    def cleanup(self):
+        """
+        Delete the objects left by the load
+        :return: Response time of each DeleteObjects request in seconds as list
+        """
+        seconds = delete_objects(self.s3, self.bucket_name, self.keys)
+        del self.keys[:]
+
+        return seconds
+
+
+def load_key(_key_naming, _index, _key_prefixes=16):
     """
-    Write the response time to Influxdb
-    :param _url: Influxdb server URL as string
-    :param _token: Influxdb auth token as string
-    :param _org: Influxdb organization as string
-    :param _bucket: Influxdb bucket as string
-    :param _host: Name of the host being as string
-    :param _seconds: Response time in seconds as float
-    :return: None
+    Name of an object created by a load. Every layout starts with
+    PROBE_PREFIX, the part after it decides how the keys spread over the
+    endpoint's partitions
+    :param _key_naming: Layout from KEY_NAMINGS: uuid for random keys,
+        sequential for keys that increase with time, hot for random keys under
+        one shared prefix and hashed for sequential keys spread over
+        _key_prefixes hashed prefixes
+    :param _index: Number of objects the load created before as int
+    :param _key_prefixes: Number of prefixes hashed keys are spread over as int
+    :return: Name as string
     """
-    point = Point("response_time").tag("host", _host).field("seconds", _seconds)
+    sequence = "%013d-%08d" % (time.time() * 1000, _index)
+    if _key_naming == "sequential":
+        return "%s%s" % (PROBE_PREFIX, sequence)
+    if _key_naming == "hot":
+        return "%shot/%s" % (PROBE_PREFIX, uuid.uuid4())
+    if _key_naming == "hashed":
+        digest = hashlib.md5(sequence.encode()).digest()
+        prefix = int.from_bytes(digest[:4], "big") % _key_prefixes
+        return "%s%04x/%s" % (PROBE_PREFIX, prefix, sequence)
 
-    try:
-        client = InfluxDBClient(url=_url, token=_token, org=_org, verify_ssl=False)
-        write_api = client.write_api(write_options=SYNCHRONOUS)
-        write_api.write(bucket=_bucket, record=point)
-        client.close()
-    except Exception as e:
-        print("CRITICAL - Failed to write to influxdb: %s" % e)
+    return probe_object_name()
+
+
+def throttled(_exception):
+    """
+    Whether a request failed because the endpoint throttled it
+    :param _exception: Exception raised by the request, or the SystemExit
+        raised after reporting it
+    :return: True for a 503 or SlowDown response
+    """
+    # The primitives exit while handling the ClientError, which is kept as
+    # the context of the SystemExit
+    while _exception is not None:
+        if isinstance(_exception, botocore.exceptions.ClientError):
+            return (
+                _exception.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+                == 503
+                or _exception.response.get("Error", {}).get("Code") in THROTTLE_CODES
+            )
+        _exception = _exception.__context__
+
+    return False
+
+
+def load_operations(_s3, _configuration, _bucket_name):
+    """
+    Create the shared state of a load from the configuration
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _bucket_name: Name of the bucket the load runs in as string
+    :return: LoadOperations object
+    """
+    key_naming = _configuration["load_key_naming"]
+    if key_naming not in KEY_NAMINGS:
+        print("CRITICAL - Unknown load_key_naming: %s" % key_naming)
         sys.exit(2)
 
+    object_size = parse_size(_configuration["load_object_size"])
+    payload = create_payload(_configuration, object_size)
+
+    return LoadOperations(
+        _s3,
+        _bucket_name,
+        parse_mix(_configuration["load_mix"]),
+        payload,
+        payload_md5(_configuration, object_size, md5_data, payload),
+        key_naming,
+        int(_configuration["key_prefixes"]),
+    )
+
+
+def load_test(_s3, _configuration):
+    """
+    Run a closed-loop load of small objects with a weighted operation mix
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :return: Duration in seconds, response times and errors of each
+        operation as dict. Runs for load_duration seconds, or until
+        load_operations operations completed when it is set
+    """
+    bucket_name = probe_bucket_name(_configuration)
+    create = bool(util.strtobool(_configuration["create_bucket"]))
+    workers = int(_configuration["load_workers"])
+    duration = float(_configuration["load_duration"])
+    operations_limit = int(_configuration["load_operations"])
+    operations = load_operations(_s3, _configuration, bucket_name)
+
+    with cleanup(_s3, bucket_name) as leftovers:
+        if create:
+            bucket = create_bucket(_s3, bucket_name)
+            leftovers.bucket = bucket
+        leftovers.keys = operations.keys
+
+        def worker(_output, _deadline):
+            # The primitives print each result; discard them while under load
+            _output.capture()
+            while time.perf_counter() < _deadline:
+                operation, key = operations.next_operation(operations_limit)
+                if operation is None:
+                    break
+                operations.run(operation, key)
+            _output.release()
+
+        with thread_output() as output:
+            # A fixed number of operations runs to completion regardless of time
+            start_time = time.perf_counter()
+            if operations_limit > 0:
+                deadline = math.inf
+            else:
+                deadline = start_time + duration
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in [
+                    executor.submit(worker, output, deadline) for i in range(workers)
+                ]:
+                    future.result()
+            elapsed = time.perf_counter() - start_time
+
+            # Remove the objects left by the load
+            output.capture()
+            bulk_deletes = LatencyHistogram()
+            for seconds in operations.cleanup():
+                bulk_deletes.record(seconds)
+            if create:
+                delete_bucket(bucket)
+                leftovers.bucket = None
+            output.release()
+
+    return {
+        "duration": elapsed,
+        "latencies": operations.latencies,
+        "errors": operations.errors,
+        "throttles": operations.throttles,
+        "bytes": operations.bytes,
+        "bulk_delete": bulk_deletes,
+    }
+
+
+def open_loop_test(_s3, _configuration):
+    """
+    Issue operations at a constant rate whether or not earlier ones completed
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :return: Duration in seconds, response times and errors of each
+        operation, and how far behind schedule each request was sent as dict
+    """
+    bucket_name = probe_bucket_name(_configuration)
+    create = bool(util.strtobool(_configuration["create_bucket"]))
+    workers = int(_configuration["load_workers"])
+    duration = float(_configuration["load_duration"])
+    rate = float(_configuration["open_loop_rate"])
+    operations = load_operations(_s3, _configuration, bucket_name)
+
+    with cleanup(_s3, bucket_name) as leftovers:
+        if create:
+            bucket = create_bucket(_s3, bucket_name)
+            leftovers.bucket = bucket
+        leftovers.keys = operations.keys
+
+        def worker(_output, _operation, _key, _intended_time):
+            # The lag is taken when a worker picks the request up, so the time
+            # it waited for a free worker shows as being behind schedule
+            with lags_lock:
+                lags.record(time.perf_counter() - _intended_time)
+            _output.capture()
+            try:
+                operations.run(_operation, _key, _intended_time)
+            finally:
+                _output.release()
+
+        lags = LatencyHistogram()
+        lags_lock = threading.Lock()
+        with thread_output() as output:
+            start_time = time.perf_counter()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                for request in range(int(duration * rate)):
+                    # Requests are scheduled from the start of the load, not from
+                    # when the previous request completed, and the response time
+                    # is measured from the intended send time. Requests waiting for
+                    # a free worker are therefore measured as the user sees them
+                    intended_time = start_time + request / rate
+                    delay = intended_time - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                    executor.submit(
+                        worker, output, *operations.next_operation(), intended_time
+                    )
+            elapsed = time.perf_counter() - start_time
+
+            # Remove the objects left by the load
+            output.capture()
+            bulk_deletes = LatencyHistogram()
+            for seconds in operations.cleanup():
+                bulk_deletes.record(seconds)
+            if create:
+                delete_bucket(bucket)
+                leftovers.bucket = None
+            output.release()
+
+    return {
+        "duration": elapsed,
+        "latencies": operations.latencies,
+        "errors": operations.errors,
+        "throttles": operations.throttles,
+        "bytes": operations.bytes,
+        "bulk_delete": bulk_deletes,
+        "lags": lags,
+    }
+
+
+def report_load(_configuration, _results, _measurement, _influxdb_writer=None):
+    """
+    Report the results of a load to Influxdb and stdout
+    :param _configuration: Configuration as dict
+    :param _results: Results of load_test or open_loop_test as dict
+    :param _measurement: Name of the Influxdb measurement as string
+    :param _influxdb_writer: InfluxDBWriter to reuse between loads
+    :return: None
+    """
+    duration = _results["duration"]
+
+    points = []
+    total_operations = 0
+    for operation in LOAD_OPERATIONS:
+        summary = _results["latencies"][operation].summary()
+        summary["errors"] = _results["errors"][operation]
+        summary["throttles"] = _results["throttles"][operation]
+        summary["ops_per_second"] = summary["count"] / duration
+        if "bytes" in _results:
+            summary["bytes"] = _results["bytes"][operation]
+            summary["mb_per_second"] = summary["bytes"] / duration / 1024**2
+        total_operations += summary["count"]
+
+        print(
+            "%s: %s"
+            % (
+                operation,
+                " ".join("%s: %s" % (name, value) for name, value in summary.items()),
+            )
+        )
+        point = (
+            Point(_measurement)
+            .tag("host", _configuration["influxdb_host"])
+            .tag("operation", operation)
+        )
+        for field, value in summary.items():
+            point = point.field(field, value)
+        points.append(point)
+
+    for result, operation in (("lags", "schedule_lag"), ("bulk_delete", "bulk_delete")):
+        if result not in _results:
+            continue
+        summary = _results[result].summary()
+        print(
+            "%s: %s"
+            % (
+                operation,
+                " ".join("%s: %s" % (name, value) for name, value in summary.items()),
+            )
+        )
+        point = (
+            Point(_measurement)
+            .tag("host", _configuration["influxdb_host"])
+            .tag("operation", operation)
+        )
+        for field, value in summary.items():
+            point = point.field(field, value)
+        points.append(point)
+
+    if bool(util.strtobool(_configuration["influxdb_enabled"])):
+        write_points_to_influxdb(_configuration, points, _influxdb_writer)
+
+    errors = sum(_results["errors"].values())
+    print(
+        "OK - %s: %s operations in %s seconds ops_per_second: %s errors: %s"
+        % (
+            _measurement,
+            total_operations,
+            duration,
+            total_operations / duration,
+            errors,
+        )
+    )
+
     return None
 
 
-def remove_file(_path):
+def run_load(_s3, _configuration, _timings, _influxdb_writer=None):
     """
-    Remove file
-    :param _path: Path to file as string
+    Run and report a closed-loop load
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, unused
+    :param _influxdb_writer: InfluxDBWriter to reuse between loads
     :return: None
     """
-    try:
-        os.remove(_path)
-    except Exception as e:
-        print("CRITICAL - Remove file error: %s" % e)
-        sys.exit(2)
+    results = load_test(_s3, _configuration)
+    report_load(_configuration, results, "load", _influxdb_writer)
 
     return None
 
 
-def create_random_file(_path, _file_size):
+def run_open_loop(_s3, _configuration, _timings, _influxdb_writer=None):
     """
-    Create a random file
-    :param _path: Path to file as string
-    :param _file_size: Size of the random file in MB as int
+    Run and report a constant arrival rate load
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, unused
+    :param _influxdb_writer: InfluxDBWriter to reuse between loads
     :return: None
     """
-    try:
-        with open(_path, "wb") as random_file:
-            random_file.write(os.urandom(1024 * 1024 * _file_size))
-        random_file.close()
-    except Exception as e:
-        print("CRITICAL - Create random file error: %s" % e)
-        sys.exit(2)
+    results = open_loop_test(_s3, _configuration)
+    report_load(_configuration, results, "open_loop", _influxdb_writer)
 
     return None
 
 
-def md5(_path):
+def async_load_test(_s3, _configuration):
     """
-    Compute the md5 hash of a local file
-    :param _path: local path to file as string
-    :return: md5 hash of file as string
+    Run a closed-loop load from one asyncio event loop with
+    async_concurrency requests in flight
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :return: Duration in seconds, response times and errors of each
+        operation as dict. Runs for load_duration seconds, or until
+        load_operations operations completed when it is set
+    """
+    bucket_name = probe_bucket_name(_configuration)
+    create = bool(util.strtobool(_configuration["create_bucket"]))
+    concurrency = int(_configuration["async_concurrency"])
+    duration = float(_configuration["load_duration"])
+    operations_limit = int(_configuration["load_operations"])
+    operations = load_operations(_s3, _configuration, bucket_name)
+
+    async def load(_deadline):
+        client = AsyncS3(_s3, _configuration, concurrency)
+
+        async def worker():
+            while time.perf_counter() < _deadline:
+                operation, key = operations.next_operation(operations_limit)
+                if operation is None:
+                    break
+                await operations.run_async(client, operation, key)
+
+        try:
+            await asyncio.gather(*(worker() for i in range(concurrency)))
+        finally:
+            await client.close()
+
+    with cleanup(_s3, bucket_name) as leftovers:
+        if create:
+            bucket = create_bucket(_s3, bucket_name)
+            leftovers.bucket = bucket
+        leftovers.keys = operations.keys
+
+        with thread_output() as output:
+            # The primitives print each result; discard them while under load
+            output.capture()
+
+            # A fixed number of operations runs to completion regardless of time
+            start_time = time.perf_counter()
+            if operations_limit > 0:
+                deadline = math.inf
+            else:
+                deadline = start_time + duration
+            asyncio.run(load(deadline))
+            elapsed = time.perf_counter() - start_time
+
+            # Remove the objects left by the load
+            bulk_deletes = LatencyHistogram()
+            for seconds in operations.cleanup():
+                bulk_deletes.record(seconds)
+            if create:
+                delete_bucket(bucket)
+                leftovers.bucket = None
+            output.release()
+
+    return {
+        "duration": elapsed,
+        "latencies": operations.latencies,
+        "errors": operations.errors,
+        "throttles": operations.throttles,
+        "bytes": operations.bytes,
+        "bulk_delete": bulk_deletes,
+    }
+
+
+def run_async_load(_s3, _configuration, _timings, _influxdb_writer=None):
+    """
+    Run and report a closed-loop load from one asyncio event loop
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, unused
+    :param _influxdb_writer: InfluxDBWriter to reuse between loads
+    :return: None
+    """
+    results = async_load_test(_s3, _configuration)
+    report_load(_configuration, results, "async_load", _influxdb_writer)
+
+    return None
+
+
+class SharedLoadResults(object):
+    """
+    Results of the processes of a multi-process load in one block of shared
+    memory. Each process has a slot for each operation holding its count,
+    total and max response time, errors, throttles and bytes followed by
+    the counters of its LatencyHistogram. A process only writes its own
+    slots, so results are combined without pickling samples or locking
+    """
+
+    OPERATIONS = LOAD_OPERATIONS + ("bulk_delete",)
+    FIELDS = ("count", "total", "max", "errors", "throttles", "bytes")
+    SLOT = len(FIELDS) + LatencyHistogram.BUCKETS
+
+    def __init__(self, _processes, _context=multiprocessing):
+        """
+        :param _processes: Number of processes of the load as int
+        :param _context: multiprocessing context the processes are started with
+        """
+        self.processes = _processes
+        self.values = _context.RawArray(
+            "q", _processes * len(self.OPERATIONS) * self.SLOT
+        )
+        self.durations = _context.RawArray("d", _processes)
+
+    def offset(self, _process, _operation):
+        """
+        Start of the slot of an operation of a process
+        :param _process: Index of the process as int
+        :param _operation: Operation from OPERATIONS as string
+        :return: Offset in values as int
+        """
+        return (
+            _process * len(self.OPERATIONS) + self.OPERATIONS.index(_operation)
+        ) * self.SLOT
+
+    def store(self, _process, _results):
+        """
+        Write the results of the load of a process to its slots
+        :param _process: Index of the process as int
+        :param _results: Results of load_test as dict
+        :return: None
+        """
+        for operation in self.OPERATIONS:
+            if operation == "bulk_delete":
+                histogram = _results["bulk_delete"]
+                counters = [0, 0, 0]
+            else:
+                histogram = _results["latencies"][operation]
+                counters = [
+                    _results[field][operation]
+                    for field in ("errors", "throttles", "bytes")
+                ]
+
+            start = self.offset(_process, operation)
+            fields = [histogram.count, histogram.total, histogram.max] + counters
+            self.values[start : start + len(self.FIELDS)] = fields
+            self.values[start + len(self.FIELDS) : start + self.SLOT] = histogram.counts
+        self.durations[_process] = _results["duration"]
+
+        return None
+
+    def results(self):
+        """
+        Combine the results of every process
+        :return: Duration in seconds of the longest process, response times,
+            errors, throttles and bytes of each operation and the response
+            times of the DeleteObjects requests as dict
+        """
+        results = {
+            "duration": max(self.durations),
+            "latencies": {},
+            "errors": {},
+            "throttles": {},
+            "bytes": {},
+        }
+        for operation in self.OPERATIONS:
+            combined = LatencyHistogram()
+            counters = {"errors": 0, "throttles": 0, "bytes": 0}
+            for process in range(self.processes):
+                start = self.offset(process, operation)
+                fields = dict(
+                    zip(self.FIELDS, self.values[start : start + len(self.FIELDS)])
+                )
+                histogram = LatencyHistogram(
+                    array.array(
+                        "q", self.values[start + len(self.FIELDS) : start + self.SLOT]
+                    )
+                )
+                histogram.count = fields["count"]
+                histogram.total = fields["total"]
+                histogram.max = fields["max"]
+                combined.merge(histogram)
+                for field in counters:
+                    counters[field] += fields[field]
+
+            if operation == "bulk_delete":
+                results["bulk_delete"] = combined
+                continue
+            results["latencies"][operation] = combined
+            for field, value in counters.items():
+                results[field][operation] = value
+
+        return results
+
+
+def load_process(_configuration, _process, _shared, _barrier):
+    """
+    Run the load of one process of a multi-process load with its own boto3
+    session
+    :param _configuration: Configuration of the process as dict
+    :param _process: Index of the process as int
+    :param _shared: SharedLoadResults the results are written to
+    :param _barrier: multiprocessing Barrier that starts every process at once
+    :return: None
+    """
+    s3 = endpoint_auth(_configuration, None, "process-load")
+    _barrier.wait()
+    _shared.store(_process, load_test(s3, _configuration))
+
+    return None
+
+
+def process_load_test(_s3, _configuration):
     """
-    hash_md5 = hashlib.md5()
+    Run a closed-loop load spread over load_processes processes, each with
+    load_workers workers, so hashing and payload generation are not limited
+    to one core
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :return: Duration in seconds, response times, errors and bytes of each
+        operation combined over the processes as dict
+    """
+    bucket_name = probe_bucket_name(_configuration)
+    create = bool(util.strtobool(_configuration["create_bucket"]))
+    processes = int(_configuration["load_processes"]) or os.cpu_count()
+    operations_limit = int(_configuration["load_operations"])
+    if operations_limit > 0:
+        processes = min(processes, operations_limit)
+
+    # Processes are spawned rather than forked so none inherits the threads
+    # and connections of this one
+    context = multiprocessing.get_context("spawn")
+    shared = SharedLoadResults(processes, context)
+    barrier = context.Barrier(processes + 1)
+
+    with cleanup(_s3, bucket_name) as leftovers:
+        if create:
+            bucket = create_bucket(_s3, bucket_name)
+            leftovers.bucket = bucket
+
+        children = []
+        for process in range(processes):
+            # A fixed number of operations is shared between the processes
+            limit = 0
+            if operations_limit > 0:
+                limit = operations_limit // processes
+                limit += process < operations_limit % processes
+            configuration = {
+                **_configuration,
+                "bucket_name": bucket_name,
+                "create_bucket": "False",
+                "load_operations": str(limit),
+            }
+            children.append(
+                context.Process(
+                    target=load_process,
+                    args=(configuration, process, shared, barrier),
+                )
+            )
+
+        for child in children:
+            child.start()
+        try:
+            barrier.wait(float(_configuration["connect_timeout"]))
+        except threading.BrokenBarrierError:
+            # The processes waiting to start fail and are reported below
+            pass
+        for child in children:
+            child.join()
+
+        failed = [child.exitcode for child in children if child.exitcode != 0]
+        if failed:
+            print("CRITICAL - Load Processes Failed: %s" % len(failed))
+            sys.exit(2)
+
+        # Each process removed its own objects
+        if create:
+            delete_bucket(bucket)
+            leftovers.bucket = None
+
+    return shared.results()
+
+
+def run_process_load(_s3, _configuration, _timings, _influxdb_writer=None):
+    """
+    Run and report a closed-loop load spread over several processes
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, unused
+    :param _influxdb_writer: InfluxDBWriter to reuse between loads
+    :return: None
+    """
+    results = process_load_test(_s3, _configuration)
+    report_load(_configuration, results, "process_load", _influxdb_writer)
+
+    return None
+
+
+def key_naming(_s3, _configuration):
+    """
+    Run the load once with each key naming strategy of key_namings
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :return: Throughput, latency percentiles and throttling rate of each
+        strategy as list of dict
+    """
+    results = []
+    for strategy in _configuration["key_namings"].split(","):
+        strategy = strategy.strip()
+        load = load_test(_s3, {**_configuration, "load_key_naming": strategy})
+
+        latencies = LatencyHistogram()
+        for histogram in load["latencies"].values():
+            latencies.merge(histogram)
+        errors = sum(load["errors"].values())
+        throttles = sum(load["throttles"].values())
+        requests = latencies.count + errors
+
+        result = {
+            "strategy": strategy,
+            "operations": latencies.count,
+            "ops_per_second": latencies.count / load["duration"],
+            "errors": errors,
+            "throttles": throttles,
+            "throttle_rate": throttles / requests if requests else 0.0,
+        }
+        summary = latencies.summary()
+        del summary["count"]
+        result.update(summary)
+        results.append(result)
+
+    return results
+
+
+def run_key_naming(_s3, _configuration, _timings, _influxdb_writer=None):
+    """
+    Run and report a comparison of key naming strategies under load
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, unused
+    :param _influxdb_writer: InfluxDBWriter to reuse between comparisons
+    :return: None
+    """
+    results = key_naming(_s3, _configuration)
+
+    points = []
+    for result in results:
+        print(" ".join("%s: %s" % (name, value) for name, value in result.items()))
+        point = (
+            Point("key_naming")
+            .tag("host", _configuration["influxdb_host"])
+            .tag("strategy", result["strategy"])
+        )
+        for field, value in result.items():
+            if field != "strategy":
+                point = point.field(field, value)
+        points.append(point)
+
+    if bool(util.strtobool(_configuration["influxdb_enabled"])):
+        write_points_to_influxdb(_configuration, points, _influxdb_writer)
+
+    best = max(results, key=lambda result: result["ops_per_second"])
+    print(
+        "OK - key_naming: fastest %s ops_per_second: %s throttle_rate: %s"
+        % (best["strategy"], best["ops_per_second"], best["throttle_rate"])
+    )
+
+    return None
+
+
+def download_range(_s3, _bucket_name, _object_name, _buffer, _start, _end):
+    """
+    Download a byte range of an object into a buffer
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket where the object is stored as string
+    :param _object_name: Name of the object as string
+    :param _buffer: memoryview of the whole object, written in place
+    :param _start: First byte of the range as int
+    :param _end: Last byte of the range as int
+    :return: Response time of the range in seconds as float
+    """
+    start_time = time.perf_counter()
     try:
-        with open(_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-    except Exception as e:
-        print("CRITICAL - MD5 error: %s" % e)
+        body = _s3.meta.client.get_object(
+            Bucket=_bucket_name,
+            Key=_object_name,
+            Range="bytes=%s-%s" % (_start, _end),
+        )["Body"]
+        offset = _start
+        for chunk in body.iter_chunks(1024 * 1024):
+            # More bytes than the range would overwrite the next range
+            if offset + len(chunk) > _end + 1:
+                offset += len(chunk)
+                body.close()
+                break
+            _buffer[offset : offset + len(chunk)] = chunk
+            offset += len(chunk)
+    except botocore.exceptions.ClientError as e:
+        print("CRITICAL - S3 ClientError: %s" % e)
         sys.exit(2)
 
-    return hash_md5.hexdigest()
+    if offset != _end + 1:
+        print("CRITICAL - Range Download Failed: bytes=%s-%s" % (_start, _end))
+        sys.exit(2)
 
+    return time.perf_counter() - start_time
 
-def get_object_etag(_s3, _bucket_name, _object_name):
+
+def ranged_download(
+    _s3, _bucket_name, _object_name, _object_size, _chunk_size, _concurrency
+):
     """
-    Get the etag (md5 hash) of an object
+    Download an object with concurrent byte range GETs into a preallocated
+    buffer
     :param _s3: S3 boto3 resource
     :param _bucket_name: Name of the bucket where the object is stored as string
     :param _object_name: Name of the object as string
-    :return: etag as string
+    :param _object_size: Size of the object in bytes as int
+    :param _chunk_size: Size of each range in bytes as int
+    :param _concurrency: Number of ranges downloaded at once as int
+    :return: Contents of the object as bytearray and the response time of
+        each range as LatencyHistogram
+    """
+    data = bytearray(_object_size)
+    buffer = memoryview(data)
+    latencies = LatencyHistogram()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_concurrency) as executor:
+        futures = [
+            executor.submit(
+                download_range,
+                _s3,
+                _bucket_name,
+                _object_name,
+                buffer,
+                start,
+                min(start + _chunk_size, _object_size) - 1,
+            )
+            for start in range(0, _object_size, _chunk_size)
+        ]
+        for future in futures:
+            latencies.record(future.result())
+
+    buffer.release()
+
+    return data, latencies
+
+
+def ranged_get(_s3, _configuration):
+    """
+    Measure the download throughput of concurrent byte range GETs for a range
+    of concurrency levels
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :return: Results of each concurrency level as list of dict
+    """
+    bucket_name = probe_bucket_name(_configuration)
+    object_name = probe_object_name()
+    create = bool(util.strtobool(_configuration["create_bucket"]))
+    object_size = parse_size(_configuration["range_object_size"])
+    chunk_size = parse_size(_configuration["range_chunk_size"])
+    concurrencies = [
+        int(concurrency)
+        for concurrency in _configuration["range_concurrency"].split(",")
+    ]
+
+    with cleanup(_s3, bucket_name) as leftovers:
+        if create:
+            bucket = create_bucket(_s3, bucket_name)
+            leftovers.bucket = bucket
+
+        payload = create_payload(_configuration, object_size)
+        local_md5sum = payload_md5(_configuration, object_size, md5_data, payload)
+        leftovers.keys.append(object_name)
+        uploaded_object = upload_object(_s3, bucket_name, object_name, _body=payload)
+        del payload
+
+        results = []
+        for concurrency in concurrencies:
+            start_time = time.perf_counter()
+            data, latencies = ranged_download(
+                _s3, bucket_name, object_name, object_size, chunk_size, concurrency
+            )
+            seconds = time.perf_counter() - start_time
+
+            # Verify the reassembled object against the uploaded md5 hash
+            download_md5sum = md5_data(data)
+            del data
+            if local_md5sum != download_md5sum:
+                print(
+                    "CRITICAL - Ranged Download Failed: %s %s"
+                    % (local_md5sum, download_md5sum)
+                )
+                sys.exit(2)
+
+            result = {
+                "concurrency": concurrency,
+                "seconds": seconds,
+                "mbps": object_size / seconds / (1024 * 1024),
+            }
+            for name, value in latencies.summary().items():
+                result["range_%s" % name] = value
+            results.append(result)
+
+        delete_object(uploaded_object)
+        leftovers.keys.remove(object_name)
+
+        if create:
+            delete_bucket(bucket)
+            leftovers.bucket = None
+
+    return results
+
+
+def run_ranged_get(_s3, _configuration, _timings, _influxdb_writer=None):
+    """
+    Run and report a ranged download at each concurrency level
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, unused
+    :param _influxdb_writer: InfluxDBWriter to reuse between runs
+    :return: None
+    """
+    results = ranged_get(_s3, _configuration)
+
+    points = []
+    for result in results:
+        print(" ".join("%s: %s" % (name, value) for name, value in result.items()))
+        point = (
+            Point("ranged_get")
+            .tag("host", _configuration["influxdb_host"])
+            .tag("concurrency", str(result["concurrency"]))
+        )
+        for field, value in result.items():
+            point = point.field(field, value)
+        points.append(point)
+
+    if bool(util.strtobool(_configuration["influxdb_enabled"])):
+        write_points_to_influxdb(_configuration, points, _influxdb_writer)
+
+    best = max(results, key=lambda result: result["mbps"])
+    print(
+        "OK - ranged_get: %s concurrency levels max_mbps: %s at concurrency: %s"
+        % (len(results), best["mbps"], best["concurrency"])
+    )
+
+    return None
+
+
+def listing_keys(_configuration):
+    """
+    Keys of a listing bucket, spread evenly over list_prefixes prefixes
+    :param _configuration: Configuration as dict
+    :return: Names of the objects as list
+    """
+    prefixes = int(_configuration["list_prefixes"])
+
+    return [
+        "%s%04x/%08d" % (_configuration["list_prefix"], index % prefixes, index)
+        for index in range(int(_configuration["list_keys"]))
+    ]
+
+
+def list_pages(_s3, _bucket_name, _prefix, _page_size, _delimiter=None):
+    """
+    List a prefix page by page with ListObjectsV2
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket as string
+    :param _prefix: Prefix to list as string
+    :param _page_size: Keys requested per page as int
+    :param _delimiter: Delimiter that groups keys into common prefixes as
+        string, None to list every key
+    :return: Keys as list, common prefixes as list and the response time of
+        each page in seconds as list
     """
+    arguments = {"Bucket": _bucket_name, "Prefix": _prefix, "MaxKeys": _page_size}
+    if _delimiter is not None:
+        arguments["Delimiter"] = _delimiter
+
+    keys = []
+    common_prefixes = []
+    page_seconds = []
     try:
-        etag = _s3.meta.client.head_object(Bucket=_bucket_name, Key=_object_name)[
-            "ETag"
-        ].replace('"', "")
+        while True:
+            start_time = time.perf_counter()
+            response = _s3.meta.client.list_objects_v2(**arguments)
+            page_seconds.append(time.perf_counter() - start_time)
+
+            keys += [item["Key"] for item in response.get("Contents", [])]
+            common_prefixes += [
+                item["Prefix"] for item in response.get("CommonPrefixes", [])
+            ]
+            if not response.get("IsTruncated"):
+                break
+            arguments["ContinuationToken"] = response["NextContinuationToken"]
     except botocore.exceptions.ClientError as e:
         print("CRITICAL - S3 ClientError: %s" % e)
         sys.exit(2)
 
-    return etag
+    return keys, common_prefixes, page_seconds
+
+
+def fill_bucket(_s3, _bucket_name, _prefix, _keys, _workers):
+    """
+    Create the empty objects of a listing bucket that do not exist yet
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket as string
+    :param _prefix: Prefix of the objects as string
+    :param _keys: Names of the objects as list
+    :param _workers: Number of objects created at once as int
+    :return: Number of objects created as int
+    """
+    existing = set(list_pages(_s3, _bucket_name, _prefix, 1000)[0])
+    missing = [key for key in _keys if key not in existing]
+
+    def put_key(_key):
+        try:
+            _s3.meta.client.put_object(Bucket=_bucket_name, Key=_key, Body=b"")
+        except botocore.exceptions.ClientError as e:
+            print("CRITICAL - S3 ClientError: %s" % e)
+            sys.exit(2)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_workers) as executor:
+        list(executor.map(put_key, missing))
+
+    return len(missing)
+
+
+def parallel_list(_s3, _bucket_name, _prefix, _page_size, _workers):
+    """
+    List a prefix by finding its common prefixes with a delimiter and then
+    listing each of them in parallel
+    :param _s3: S3 boto3 resource
+    :param _bucket_name: Name of the bucket as string
+    :param _prefix: Prefix to list as string
+    :param _page_size: Keys requested per page as int
+    :param _workers: Number of prefixes listed at once as int
+    :return: Keys as list and the response time of each page in seconds as
+        list
+    """
+    keys, prefixes, page_seconds = list_pages(
+        _s3, _bucket_name, _prefix, _page_size, "/"
+    )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_workers) as executor:
+        for prefix_keys, _, prefix_seconds in executor.map(
+            lambda prefix: list_pages(_s3, _bucket_name, prefix, _page_size),
+            prefixes,
+        ):
+            keys += prefix_keys
+            page_seconds += prefix_seconds
+
+    return keys, page_seconds
+
+
+def listing_result(_method, _seconds, _keys, _page_seconds):
+    """
+    Summarize a listing
+    :param _method: Name of the listing method as string
+    :param _seconds: Total time of the listing in seconds as float
+    :param _keys: Keys listed as list
+    :param _page_seconds: Response time of each page in seconds as list
+    :return: Result of the listing as dict
+    """
+    latencies = LatencyHistogram()
+    for seconds in _page_seconds:
+        latencies.record(seconds)
+
+    result = {
+        "method": _method,
+        "seconds": _seconds,
+        "keys": len(_keys),
+        "pages": len(_page_seconds),
+        "keys_per_second": len(_keys) / _seconds,
+    }
+    for name, value in latencies.summary().items():
+        result["page_%s" % name] = value
+
+    return result
 
 
-def delete_object(_object):
+def listing(_s3, _configuration):
     """
-    Delete and object from S3
-    :param _object: boto3 object object
-    :return: None
+    Measure listing a bucket page by page and listing it in parallel by prefix
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :return: Results of each listing method as list of dict
     """
-    try:
-        _object.delete()
-        print("delete_object: Ok")
-    except botocore.exceptions.ClientError as e:
-        print("CRITICAL - S3 ClientError: %s" % e)
-        sys.exit(2)
+    bucket_name = probe_bucket_name(_configuration)
+    create = bool(util.strtobool(_configuration["create_bucket"]))
+    prefix = _configuration["list_prefix"]
+    page_size = int(_configuration["list_page_size"])
+    workers = int(_configuration["list_workers"])
+    keys = listing_keys(_configuration)
 
-    return None
+    with cleanup(_s3, bucket_name) as leftovers:
+        # An existing bucket keeps its keys so later runs do not refill it
+        if create:
+            bucket = create_bucket(_s3, bucket_name)
+            leftovers.bucket = bucket
+            leftovers.keys = keys
+        created = fill_bucket(_s3, bucket_name, prefix, keys, workers)
+        print("fill_bucket: %s keys created" % created)
 
+        results = []
+        start_time = time.perf_counter()
+        listed_keys, _, page_seconds = list_pages(_s3, bucket_name, prefix, page_size)
+        results.append(
+            listing_result(
+                "paginated", time.perf_counter() - start_time, listed_keys, page_seconds
+            )
+        )
 
-def download_object(_s3, _bucket_name, _object_name, _download_name, _path="/tmp"):
+        start_time = time.perf_counter()
+        parallel_keys, page_seconds = parallel_list(
+            _s3, bucket_name, prefix, page_size, workers
+        )
+        results.append(
+            listing_result(
+                "parallel",
+                time.perf_counter() - start_time,
+                parallel_keys,
+                page_seconds,
+            )
+        )
+
+        # Both methods must find every key
+        if sorted(parallel_keys) != sorted(listed_keys) or len(listed_keys) < len(keys):
+            print(
+                "CRITICAL - Listing Failed: %s keys paginated %s keys parallel %s keys"
+                % (len(keys), len(listed_keys), len(parallel_keys))
+            )
+            sys.exit(2)
+
+        if create:
+            delete_objects(_s3, bucket_name, listed_keys)
+            leftovers.keys = []
+            delete_bucket(bucket)
+            leftovers.bucket = None
+
+    return results
+
+
+def run_listing(_s3, _configuration, _timings, _influxdb_writer=None):
     """
-    Download an object from S3
+    Run and report a bucket listing comparison
     :param _s3: S3 boto3 resource
-    :param _bucket_name: Name of the bucket where the object is stored as string
-    :param _object_name: Name of the object as string
-    :param _download_name: Local filename of the downloaded object as string
-    :param _path: Local path to store the downloaded object as string
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, unused
+    :param _influxdb_writer: InfluxDBWriter to reuse between listings
     :return: None
     """
-    try:
-        _s3.Object(_bucket_name, _object_name).download_file(
-            "%s/%s" % (_path, _download_name)
+    results = listing(_s3, _configuration)
+
+    points = []
+    for result in results:
+        print(" ".join("%s: %s" % (name, value) for name, value in result.items()))
+        point = (
+            Point("listing")
+            .tag("host", _configuration["influxdb_host"])
+            .tag("method", result["method"])
         )
-    except botocore.exceptions.ClientError as e:
-        print("CRITICAL - S3 ClientError: %s" % e)
-        sys.exit(2)
+        for field, value in result.items():
+            if field != "method":
+                point = point.field(field, value)
+        points.append(point)
+
+    if bool(util.strtobool(_configuration["influxdb_enabled"])):
+        write_points_to_influxdb(_configuration, points, _influxdb_writer)
+
+    print(
+        "OK - listing: %s keys paginated: %s parallel: %s"
+        % (results[0]["keys"], results[0]["seconds"], results[1]["seconds"])
+    )
 
     return None
 
 
-def upload_object(_s3, _bucket_name, _object_name, _path="/tmp"):
+def sweep_bucket(_s3, _bucket_name, _prefix, _cutoff, _workers=1):
     """
-    Upload object to S3
+    Delete the objects and abort the multipart uploads of a bucket that are
+    under a prefix and older than a cutoff
     :param _s3: S3 boto3 resource
-    :param _bucket_name: Name of the bucket to store the object as string
-    :param _object_name: Filename of the object as string
-    :param _path: Local path to the object as string
-    :return: Boto3 object object
+    :param _bucket_name: Name of the bucket as string
+    :param _prefix: Prefix of the objects as string
+    :param _cutoff: Newest creation time swept as datetime
+    :param _workers: Number of DeleteObjects requests sent at once as int
+    :return: Number of objects deleted as int and the response time of each
+        DeleteObjects request in seconds as list
     """
+    bucket = _s3.Bucket(_bucket_name)
     try:
-        _s3.Object(_bucket_name, _object_name).put(
-            Body=open("%s/%s" % (_path, _object_name), "rb")
-        )
-        uploaded_object = _s3.Object(_bucket_name, _object_name)
+        for upload in bucket.multipart_uploads.filter(Prefix=_prefix):
+            if upload.initiated < _cutoff:
+                upload.abort()
+        keys = [
+            item.key
+            for item in bucket.objects.filter(Prefix=_prefix)
+            if item.last_modified < _cutoff
+        ]
     except botocore.exceptions.ClientError as e:
         print("CRITICAL - S3 ClientError: %s" % e)
         sys.exit(2)
-    except FileNotFoundError as e:
-        print("CRITICAL - FileNotFoundError: %s" % e)
-        sys.exit(2)
 
-    return uploaded_object
+    return len(keys), delete_objects(_s3, _bucket_name, keys, _workers)
 
 
-def create_bucket(_s3, _name, configuration=None):
+def cleanup_probes(_s3, _configuration):
     """
-    Create a S3 bucket
+    Delete the buckets and objects that probes left behind, recognized by
+    PROBE_PREFIX and older than cleanup_min_age
     :param _s3: S3 boto3 resource
-    :param _name: name of bucket to create as string
-    :param configuration: CreateBucketConfiguration as dict
-    :return: S3 boto3 bucket object
+    :param _configuration: Configuration as dict
+    :return: Names of the buckets deleted as list, number of objects deleted
+        as int and the response times of the DeleteObjects requests as
+        LatencyHistogram
     """
+    workers = int(_configuration["cleanup_workers"])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cutoff = now - datetime.timedelta(seconds=float(_configuration["cleanup_min_age"]))
+
     try:
-        if configuration is None:
-            bucket = _s3.create_bucket(Bucket=_name)
-        else:
-            bucket = _s3.create_bucket(
-                Bucket=_name, CreateBucketConfiguration=configuration
-            )
-        print("create_bucket: Ok")
-    except botocore.exceptions.ParamValidationError as e:
-        print("CRITICAL - S3 ParamValidationError: %s" % e)
-        sys.exit(2)
+        bucket_names = [
+            bucket["Name"]
+            for bucket in _s3.meta.client.list_buckets()["Buckets"]
+            if bucket["Name"].startswith(PROBE_PREFIX)
+            and bucket["CreationDate"] < cutoff
+        ]
     except botocore.exceptions.ClientError as e:
         print("CRITICAL - S3 ClientError: %s" % e)
         sys.exit(2)
-    except TypeError as e:
-        print("CRITICAL - S3 bucket TypeError: %s" % e)
-        sys.exit(2)
 
-    return bucket
+    def sweep_probe_bucket(_bucket_name):
+        # Everything in an abandoned probe bucket goes so it can be deleted
+        deleted, seconds = sweep_bucket(_s3, _bucket_name, "", now)
+        delete_bucket(_s3.Bucket(_bucket_name))
+        return deleted, seconds
 
+    bulk_deletes = LatencyHistogram()
+    objects = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for deleted, seconds in executor.map(sweep_probe_bucket, bucket_names):
+            objects += deleted
+            for value in seconds:
+                bulk_deletes.record(value)
 
-def delete_bucket(_bucket):
+    # Probe objects are also left in a configured bucket, which is kept
+    if _configuration["bucket_name"] != "":
+        deleted, seconds = sweep_bucket(
+            _s3, _configuration["bucket_name"], PROBE_PREFIX, cutoff, workers
+        )
+        objects += deleted
+        for value in seconds:
+            bulk_deletes.record(value)
+
+    return bucket_names, objects, bulk_deletes
+
+
+def run_cleanup(_s3, _configuration, _timings, _influxdb_writer=None):
     """
-    Delete a S3 bucket
-    :param _bucket: boto3 Bucket object
+    Run and report a sweep of the buckets and objects left behind by probes
+    :param _s3: S3 boto3 resource
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, unused
+    :param _influxdb_writer: InfluxDBWriter to reuse between sweeps
     :return: None
     """
-    try:
-        _bucket.delete()
-        print("delete_bucket: Ok")
-    except botocore.exceptions.ClientError as e:
-        print("CRITICAL - S3 ClientError: %s" % e)
-        sys.exit(2)
+    bucket_names, objects, bulk_deletes = cleanup_probes(_s3, _configuration)
+
+    summary = bulk_deletes.summary()
+    print(
+        "bulk_delete: %s"
+        % " ".join("%s: %s" % (name, value) for name, value in summary.items())
+    )
+    point = (
+        Point("cleanup")
+        .tag("host", _configuration["influxdb_host"])
+        .field("buckets", len(bucket_names))
+        .field("objects", objects)
+    )
+    for field, value in summary.items():
+        point = point.field("bulk_delete_%s" % field, value)
+
+    if bool(util.strtobool(_configuration["influxdb_enabled"])):
+        write_points_to_influxdb(_configuration, [point], _influxdb_writer)
+
+    print("OK - cleanup: %s buckets %s objects deleted" % (len(bucket_names), objects))
 
     return None
 
 
-def read_configuration(_path):
+class ThreadOutput(object):
     """
-    Read the configuration JSON file
-    :param _path: local path to configuration JSON file as string
-    :return: Decoded contents of path as hash
+    Replacement for sys.stdout that captures what each worker thread prints
     """
-    default_configuration = {
-        "s3_host": "https://localhost:443",
-        "aws_access_key_id": "",
-        "aws_secret_access_key": "",
-        "addressing_style": "auto",
-        "object_size": "1",
-        "create_bucket": "True",
-        "bucket_name": "",
-        "influxdb_enabled": "False",
-        "influxdb_url": "http://localhost:8086",
-        "influxdb_token": "",
-        "influxdb_org": "",
-        "influxdb_bucket": "",
-        "influxdb_host": "",
-    }
 
-    # Read the configuration file
+    def __init__(self, _stream):
+        """
+        :param _stream: Stream written to by threads that are not capturing
+        """
+        self.stream = _stream
+        self.local = threading.local()
+
+    def capture(self):
+        """
+        Start capturing the output of the current thread. Captures nest, so a
+        load mode can discard its output inside a worker of probe_endpoints
+        :return: None
+        """
+        if not hasattr(self.local, "buffers"):
+            self.local.buffers = []
+        self.local.buffers.append(io.StringIO())
+
+    def release(self):
+        """
+        Stop the innermost capture of the current thread, restoring the one
+        it was nested in
+        :return: Captured output as string
+        """
+        return self.local.buffers.pop().getvalue()
+
+    def write(self, _text):
+        buffers = getattr(self.local, "buffers", None)
+        if not buffers:
+            return self.stream.write(_text)
+        return buffers[-1].write(_text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+@contextlib.contextmanager
+def thread_output():
+    """
+    Install a ThreadOutput as sys.stdout, reusing one that is already installed
+    :return: Context manager that yields the ThreadOutput
+    """
+    if isinstance(sys.stdout, ThreadOutput):
+        yield sys.stdout
+        return
+
+    output = ThreadOutput(sys.stdout)
+    sys.stdout = output
     try:
-        with open(_path, "r") as f:
-            file_configuration = json.load(f)
-    except FileNotFoundError as e:
-        print("CRITICAL - No Credentials Found: %s" % e)
-        sys.exit(2)
-    except json.decoder.JSONDecodeError as e:
-        print("CRITICAL - Could Not Decode Credentials JSON: %s" % e)
+        yield output
+    finally:
+        sys.stdout = output.stream
+
+
+def find_configuration_files(_paths):
+    """
+    Expand directories into the configuration JSON files they contain
+    :param _paths: Configuration files or directories as list
+    :return: Configuration files as list
+    """
+    configuration_files = []
+    for path in _paths:
+        if os.path.isdir(path):
+            configuration_files += sorted(glob.glob(os.path.join(path, "*.json")))
+        else:
+            configuration_files.append(path)
+
+    if len(configuration_files) == 0:
+        print("CRITICAL - No Configuration Files Found: %s" % " ".join(_paths))
         sys.exit(2)
 
-    # Merge the default config with the file config
-    configuration = {**default_configuration, **file_configuration}
+    return configuration_files
 
-    return configuration
 
+def endpoint_name(_configuration):
+    """
+    Name used to label the results of an endpoint
+    :param _configuration: Configuration as dict
+    :return: influxdb_host, or s3_host when influxdb_host is not set, as string
+    """
+    if _configuration["influxdb_host"] != "":
+        return _configuration["influxdb_host"]
+    return _configuration["s3_host"]
 
-def s3_auth(
-    _aws_access_key_id, _aws_secret_access_key, _s3_host, _addressing_style="auto"
-):
+
+def endpoint_auth(_configuration, _timings=None, _mode="probe"):
     """
-    Authenticate to S3
-    :param _aws_access_key_id: AWS access key
-    :param _aws_secret_access_key: AWS secret key
-    :param _s3_host: S3 host
-    :param _addressing_style: S3 addressing style: 'auto', 'path' or 'virtual'
+    Build the S3 boto3 resource of an endpoint
+    :param _configuration: Configuration as dict
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :param _mode: Name of the mode in MODES the resource is used by as string
     :return: S3 boto3 resource object
     """
-    s3 = boto3.resource(
-        "s3",
-        aws_access_key_id=_aws_access_key_id,
-        aws_secret_access_key=_aws_secret_access_key,
-        endpoint_url=_s3_host,
-        config=botocore.client.Config(
-            signature_version="s3", s3={"addressing_style": _addressing_style}
+    if _timings is None:
+        _timings = {}
+
+    # Size the connection pool so concurrent requests never wait for a
+    # connection or open one that does not fit in the pool
+    max_pool_connections = max(
+        int(_configuration["max_pool_connections"]),
+        int(_configuration["max_concurrency"]),
+        int(_configuration["load_workers"]),
+        int(_configuration["list_workers"]),
+        int(_configuration["cleanup_workers"]),
+        *(
+            int(concurrency)
+            for concurrency in _configuration["range_concurrency"].split(",")
         ),
     )
 
-    return s3
+    return time_phase(
+        _timings,
+        "s3_auth",
+        s3_auth,
+        _configuration["aws_access_key_id"],
+        _configuration["aws_secret_access_key"],
+        _configuration["s3_host"],
+        _configuration["addressing_style"],
+        max_pool_connections,
+        float(_configuration["connect_timeout"]),
+        float(_configuration["read_timeout"]),
+        bool(util.strtobool(_configuration["connection_timing"])),
+        _configuration["signature"],
+        1 if _mode in UNRETRIED_MODES else None,
+    )
 
 
-def parse_arguments(_args):
+def influxdb_writers(_configurations):
     """
-    Parse Commandline Arguments
-    :param _args: *args positional arguments
-    :return: Commandline arguments parsed by argparse
+    Create one InfluxDBWriter per Influxdb server used by the configurations
+    :param _configurations: Configurations as list of dict
+    :return: InfluxDBWriter keyed by influxdb_url, token and org as dict
     """
-    parser = argparse.ArgumentParser()
+    writers = {}
+    for configuration in _configurations:
+        if bool(util.strtobool(configuration["influxdb_enabled"])):
+            key = influxdb_key(configuration)
+            if key not in writers:
+                writers[key] = influxdb_writer(configuration)
 
-    parser.add_argument(
-        "-c",
-        metavar="configuration_file",
-        dest="configuration_file",
-        help="File that contains the configuration.",
-        required=True,
+    return writers
+
+
+def influxdb_key(_configuration):
+    """
+    Key of the InfluxDBWriter used by a configuration
+    :param _configuration: Configuration as dict
+    :return: influxdb_url, influxdb_token and influxdb_org as tuple
+    """
+    return (
+        _configuration["influxdb_url"],
+        _configuration["influxdb_token"],
+        _configuration["influxdb_org"],
     )
 
-    return parser.parse_args(_args)
 
+def probe_endpoint(_configuration, _s3, _timings, _influxdb_writer=None, _mode="probe"):
+    """
+    Run and report one probe cycle without exiting on failure
+    :param _configuration: Configuration as dict
+    :param _s3: S3 boto3 resource
+    :param _timings: Phase durations in seconds as dict, updated in place
+    :param _influxdb_writer: InfluxDBWriter to reuse between probe cycles
+    :param _mode: Name of the mode in MODES to run as string
+    :return: Nagios exit code as int
+    """
+    try:
+        MODES[_mode](_s3, _configuration, _timings, _influxdb_writer)
+    except SystemExit as e:
+        # The failure was already reported by the function that exited
+        return e.code
+    except Exception as e:
+        print("CRITICAL - %s: %s" % (type(e).__name__, e))
+        return 2
 
-def main():
-    # Set the default logger. Use logging.DEBUG for connection details
-    boto3.set_stream_logger("", logging.INFO)
+    return 0
 
-    args = parse_arguments(sys.argv[1:])
 
-    configuration = read_configuration(args.configuration_file)
+def worst_status(_exit_codes):
+    """
+    Combine Nagios exit codes, CRITICAL > WARNING > UNKNOWN > OK
+    :param _exit_codes: Nagios exit codes as list of int
+    :return: Nagios exit code as int
+    """
+    severity = {0: 0, 3: 1, 1: 2, 2: 3}
+    return max(_exit_codes, key=lambda exit_code: severity.get(exit_code, 1))
 
-    if configuration["bucket_name"] == "":
-        bucket_name = str(uuid.uuid4())
-    else:
-        bucket_name = configuration["bucket_name"]
-    object_name = str(uuid.uuid4())
-    download_name = "%s-downloaded" % object_name
-    object_size = int(configuration["object_size"])
 
-    start_time = time.time()
+def endpoint_labels(_configurations):
+    """
+    Labels of the endpoints in the output, the name of each endpoint followed
+    by its bucket or position when several endpoints share the name
+    :param _configurations: Configurations as list of dict
+    :return: Labels as list of string, in the order of the configurations
+    """
+    names = [endpoint_name(configuration) for configuration in _configurations]
 
-    aws_access_key_id = configuration["aws_access_key_id"]
-    aws_secret_access_key = configuration["aws_secret_access_key"]
-    s3_host = configuration["s3_host"]
-    addressing_style = configuration["addressing_style"]
+    labels = []
+    for index, configuration in enumerate(_configurations):
+        label = names[index]
+        if names.count(label) > 1:
+            label = "%s/%s" % (
+                label,
+                configuration["bucket_name"] or "#%s" % (index + 1),
+            )
+        labels.append(label)
 
-    s3 = s3_auth(aws_access_key_id, aws_secret_access_key, s3_host, addressing_style)
+    # Endpoints on the same host and bucket are told apart by position
+    return [
+        "%s#%s" % (label, index + 1) if labels.count(label) > 1 else label
+        for index, label in enumerate(labels)
+    ]
 
-    # Create the s3 bucket if create_bucket is True
-    if bool(util.strtobool(configuration["create_bucket"])):
-        bucket = create_bucket(s3, bucket_name)
 
-    # Create random file
-    create_random_file("/tmp/%s" % object_name, object_size)
+def probe_endpoints(_endpoints, _workers, _influxdb_writers=None, _mode="probe"):
+    """
+    Probe several endpoints concurrently in a bounded pool of worker threads
+    :param _endpoints: (configuration, S3 boto3 resource, timings) as list
+    :param _workers: Maximum number of endpoints probed at once as int
+    :param _influxdb_writers: InfluxDBWriter keyed by influxdb_key as dict
+    :param _mode: Name of the mode in MODES to run as string
+    :return: Aggregate Nagios exit code as int
+    """
+    if _influxdb_writers is None:
+        _influxdb_writers = {}
 
-    # Get md5 hash of the random file
-    local_md5sum = md5("/tmp/%s" % object_name)
+    if len(_endpoints) == 1:
+        configuration, s3, timings = _endpoints[0]
+        return probe_endpoint(
+            configuration,
+            s3,
+            timings,
+            _influxdb_writers.get(influxdb_key(configuration)),
+            _mode,
+        )
 
-    # Upload the random file
-    uploaded_object = upload_object(s3, bucket_name, object_name)
+    def worker(_configuration, _s3, _timings):
+        output.capture()
+        try:
+            exit_code = probe_endpoint(
+                _configuration,
+                _s3,
+                _timings,
+                _influxdb_writers.get(influxdb_key(_configuration)),
+                _mode,
+            )
+        finally:
+            text = output.release()
+        return exit_code, text
 
-    # Get the etag of the uploaded random file
-    etag = get_object_etag(s3, bucket_name, object_name)
+    # Results are kept by position, several endpoints may share a name
+    labels = endpoint_labels([endpoint[0] for endpoint in _endpoints])
+    results = {}
+    with thread_output() as output:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=_workers) as executor:
+            futures = {
+                executor.submit(worker, *endpoint): index
+                for index, endpoint in enumerate(_endpoints)
+            }
+            # Results are printed as each endpoint finishes so a slow endpoint
+            # does not hold back the others
+            for future in concurrent.futures.as_completed(futures):
+                index = futures[future]
+                results[index], text = future.result()
+                for line in text.splitlines():
+                    output.stream.write("[%s] %s\n" % (labels[index], line))
 
-    # Verify the original and s3 md5 hashes match
-    if local_md5sum == etag:
-        print("upload_object: Ok")
+    exit_code = worst_status(list(results.values()))
+    failed = sorted(labels[index] for index in results if results[index] != 0)
+    if len(failed) == 0:
+        print("OK - %s of %s endpoints ok" % (len(results), len(results)))
     else:
-        print("CRITICAL - Upload Object Failed: %s %s" % (local_md5sum, etag))
-        sys.exit(2)
+        print(
+            "%s - %s of %s endpoints failed: %s"
+            % (NAGIOS_STATUS[exit_code], len(failed), len(results), ", ".join(failed))
+        )
 
-    # Remove random file
-    remove_file("/tmp/%s" % object_name)
+    return exit_code
 
-    # Download the object
-    download_object(s3, bucket_name, object_name, download_name)
 
-    # Get md5 hash of the downloaded file
-    download_md5sum = md5("/tmp/%s" % download_name)
+def run_daemon(
+    _endpoints,
+    _interval,
+    _jitter,
+    _workers=8,
+    _cycles=None,
+    _mode="probe",
+    _summary_interval=3600.0,
+):
+    """
+    Run probe cycles on a fixed schedule, reusing the S3 connection pools
+    :param _endpoints: (configuration, S3 boto3 resource) as list
+    :param _interval: Seconds between the start of each probe cycle as float
+    :param _jitter: Maximum random offset of the schedule in seconds as float
+    :param _workers: Maximum number of endpoints probed at once as int
+    :param _cycles: Number of cycles to run as int, None to run forever
+    :param _mode: Name of the mode in MODES to run as string
+    :param _summary_interval: Seconds of each window latency percentiles are
+        reported for as float
+    :return: Exit code of the last probe cycle as int
+    """
+    writers = influxdb_writers([configuration for configuration, s3 in _endpoints])
 
-    # Verify the original and downloaded md5 hashes match
-    if local_md5sum == download_md5sum:
-        print("download_object: Ok")
-    else:
-        print("CRITICAL - Download Object Failed: %s %s" % (local_md5sum, etag))
-        sys.exit(2)
+    # Response times of the cycles of the current window, by endpoint and
+    # phase, in fixed memory
+    histograms = {}
+    window_start = time.monotonic()
 
-    # Remove downloaded file
-    remove_file("/tmp/%s" % download_name)
+    # Stop cleanly when the container is stopped
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_handler = signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
 
-    # Delete Object
-    delete_object(uploaded_object)
+    # A random offset keeps daemons started together from firing in lockstep.
+    # The schedule is anchored to the first run so it does not drift with the
+    # duration of each probe cycle
+    next_run = time.monotonic() + random.uniform(0, _jitter)
+    exit_code = 0
+    cycle = 0
 
-    # Delete Bucket if create_bucket is True
-    if bool(util.strtobool(configuration["create_bucket"])):
-        delete_bucket(bucket)
+    try:
+        while _cycles is None or cycle < _cycles:
+            delay = next_run - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
 
-    # Calculate the total time
-    end_time = time.time()
-    total_time = end_time - start_time
+            # A failed cycle was already reported; keep the daemon running
+            endpoints = [(configuration, s3, {}) for configuration, s3 in _endpoints]
+            exit_code = probe_endpoints(endpoints, _workers, writers, _mode)
+            record_timings(histograms, endpoints)
 
-    # If influxdb_enabled is True in the config file the write the response
-    # time to influxdb
-    if bool(util.strtobool(configuration["influxdb_enabled"])):
-        write_to_influxdb(
-            configuration["influxdb_url"],
-            configuration["influxdb_token"],
-            configuration["influxdb_org"],
-            configuration["influxdb_bucket"],
-            configuration["influxdb_host"],
-            total_time,
+            # Each window is reported and started over, so the percentiles
+            # follow the endpoint instead of averaging its whole uptime
+            if time.monotonic() - window_start >= _summary_interval:
+                report_timings(
+                    histograms,
+                    [configuration for configuration, s3 in _endpoints],
+                    writers,
+                    time.monotonic() - window_start,
+                )
+                histograms.clear()
+                window_start = time.monotonic()
+            sys.stdout.flush()
+
+            cycle += 1
+            next_run += _interval
+
+            # Skip the runs that were missed while a slow cycle was running
+            now = time.monotonic()
+            if next_run < now:
+                next_run += math.ceil((now - next_run) / _interval) * _interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # The last, partial window is reported when the daemon stops
+        if histograms:
+            report_timings(
+                histograms,
+                [configuration for configuration, s3 in _endpoints],
+                writers,
+                time.monotonic() - window_start,
+            )
+        for writer in writers.values():
+            writer.close()
+        if previous_handler is not None:
+            signal.signal(signal.SIGTERM, previous_handler)
+
+    return exit_code
+
+
+def report_timings(_histograms, _configurations, _influxdb_writers, _window):
+    """
+    Report the latency percentiles of a window of daemon cycles to Influxdb
+    and stdout
+    :param _histograms: LatencyHistogram keyed by endpoint name and phase as
+        dict
+    :param _configurations: Configurations of the endpoints as list of dict
+    :param _influxdb_writers: InfluxDBWriter keyed by influxdb_key as dict
+    :param _window: Length of the window in seconds as float
+    :return: None
+    """
+    configurations = {
+        endpoint_name(configuration): configuration for configuration in _configurations
+    }
+
+    points = {}
+    for (name, phase), histogram in sorted(_histograms.items()):
+        summary = histogram.summary()
+        print(
+            "[%s] %s: %s"
+            % (
+                name,
+                phase,
+                " ".join("%s: %s" % (field, value) for field, value in summary.items()),
+            )
         )
 
-    print("OK - total_time: %s" % total_time)
-    return 0
+        configuration = configurations[name]
+        if bool(util.strtobool(configuration["influxdb_enabled"])):
+            point = (
+                Point("daemon_summary")
+                .tag("host", configuration["influxdb_host"])
+                .tag("phase", phase)
+                .field("window", _window)
+            )
+            for field, value in summary.items():
+                point = point.field(field, value)
+            points.setdefault(name, []).append(point)
+
+    for name, endpoint_points in points.items():
+        configuration = configurations[name]
+        write_points_to_influxdb(
+            configuration,
+            endpoint_points,
+            _influxdb_writers.get(influxdb_key(configuration)),
+        )
+
+    return None
+
+
+def raise_keyboard_interrupt(_signal, _frame):
+    """
+    Signal handler that stops the daemon like Ctrl-C
+    :param _signal: Signal number as int
+    :param _frame: Current stack frame
+    :return: None
+    """
+    raise KeyboardInterrupt()
+
+
+def record_timings(_histograms, _endpoints):
+    """
+    Record the S3 phase durations of a probe cycle into histograms
+    :param _histograms: LatencyHistogram keyed by endpoint name and phase as
+        dict, updated in place
+    :param _endpoints: (configuration, S3 boto3 resource, timings) as list
+    :return: None
+    """
+    phases = list(S3_PHASES + REQUEST_PHASES)
+    for phase in COLD_WARM_PHASES:
+        phases += ["%s_cold" % phase, "%s_warm" % phase]
+
+    for configuration, s3, timings in _endpoints:
+        for phase in phases:
+            if phase in timings:
+                key = (endpoint_name(configuration), phase)
+                if key not in _histograms:
+                    _histograms[key] = LatencyHistogram()
+                _histograms[key].record(timings[phase])
+
+    return None
+
+
+# Modes selected with --mode, each runs and reports against one endpoint
+MODES = {
+    "probe": run_probe,
+    "size-sweep": run_size_sweep,
+    "load": run_load,
+    "open-loop": run_open_loop,
+    "async-load": run_async_load,
+    "process-load": run_process_load,
+    "key-naming": run_key_naming,
+    "ranged-get": run_ranged_get,
+    "signature-compare": run_signature_compare,
+    "listing": run_listing,
+    "cleanup": run_cleanup,
+}
+
+
+def main():
+    # Set the default logger. Use logging.DEBUG for connection details
+    boto3.set_stream_logger("", logging.INFO)
+
+    args = parse_arguments(sys.argv[1:])
+
+    configuration_files = find_configuration_files(args.configuration_files)
+
+    if args.summarize is not None:
+        return run_summarize(
+            [read_configuration(path) for path in configuration_files], args.summarize
+        )
+
+    endpoints = []
+    for configuration_file in configuration_files:
+        configuration = read_configuration(configuration_file)
+        timings = {}
+        s3 = endpoint_auth(configuration, timings, args.mode)
+        endpoints.append((configuration, s3, timings))
+
+    if args.daemon:
+        jitter = args.interval * 0.1 if args.jitter is None else args.jitter
+        return run_daemon(
+            [(configuration, s3) for configuration, s3, timings in endpoints],
+            args.interval,
+            jitter,
+            args.workers,
+            None,
+            args.mode,
+            args.summary_interval,
+        )
+
+    # Points are written in the background while the endpoints are probed
+    writers = influxdb_writers([configuration for configuration, s3, t in endpoints])
+    try:
+        if len(endpoints) > 1 or args.mode != "probe":
+            return probe_endpoints(endpoints, args.workers, writers, args.mode)
+
+        configuration, s3, timings = endpoints[0]
+        total_time = probe(s3, configuration, timings)
+        return report(
+            configuration, total_time, timings, writers.get(influxdb_key(configuration))
+        )
+    finally:
+        for writer in writers.values():
+            writer.close()
 
 
 if __name__ == "__main__":
@@ -11,4 +11,32 @@ class ArgumentsTestCase(unittest.TestCase):
 
     def test_parse_arguments(self):
         args = s3_response_time.parse_arguments(["-c", "configuration_file.json"])
-        self.assertEqual(args.configuration_file, "configuration_file.json")
+        self.assertEqual(args.configuration_files, ["configuration_file.json"])
+
+    def test_parse_multiple_configuration_files(self):
+        args = s3_response_time.parse_arguments(
+            ["-c", "one.json", "two.json", "-c", "configs", "--workers", "4"]
+        )
+        self.assertEqual(args.configuration_files, ["one.json", "two.json", "configs"])
+        self.assertEqual(args.workers, 4)
+
+    def test_parse_daemon_arguments(self):
+        args = s3_response_time.parse_arguments(["-c", "configuration_file.json"])
+        self.assertFalse(args.daemon)
+        self.assertEqual(args.interval, 60.0)
+        self.assertEqual(args.jitter, None)
+
+        args = s3_response_time.parse_arguments(
+            ["-c", "configuration_file.json", "--daemon", "--interval", "30"]
+        )
+        self.assertTrue(args.daemon)
+        self.assertEqual(args.interval, 30.0)
+
+    def test_parse_mode(self):
+        args = s3_response_time.parse_arguments(["-c", "configuration_file.json"])
+        self.assertEqual(args.mode, "probe")
+
+        args = s3_response_time.parse_arguments(
+            ["-c", "configuration_file.json", "--mode", "size-sweep"]
+        )
+        self.assertEqual(args.mode, "size-sweep")
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+
+import asyncio
+import botocore.auth
+import botocore.exceptions
+import hashlib
+import http.server
+import re
+import socket
+import sys
+import threading
+import unittest
+import warnings
+from mock import patch
+
+import s3_response_time
+
+try:
+    # moto warns on import when the server dependencies are missing
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        from moto.server import ThreadedMotoServer
+except ImportError:
+    ThreadedMotoServer = None
+
+
+class FakeS3Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    buckets = {}
+
+    def split_path(self):
+        bucket_name, _, key = self.path.lstrip("/").partition("/")
+        return bucket_name, key
+
+    def reply(self, _status, _headers=None, _body=b"", _chunked=False):
+        self.send_response(_status)
+        for name, value in (_headers or {}).items():
+            self.send_header(name, value)
+        if _chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(_body), 256):
+                chunk = _body[start : start + 256]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self.send_header("Content-Length", str(len(_body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(_body)
+
+    def error(self, _status, _code):
+        self.reply(_status, _body=b"<Error><Code>%s</Code></Error>" % _code.encode())
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        bucket_name, key = self.split_path()
+        if key.endswith("slow-down"):
+            return self.error(503, "SlowDown")
+        if not key:
+            self.buckets[bucket_name] = {}
+            return self.reply(200)
+        self.buckets[bucket_name][key] = body
+        self.reply(200, {"ETag": '"%s"' % hashlib.md5(body).hexdigest()})
+
+    def do_HEAD(self):
+        bucket_name, key = self.split_path()
+        if key not in self.buckets.get(bucket_name, {}):
+            return self.reply(404)
+        body = self.buckets[bucket_name][key]
+        self.reply(200, {"ETag": '"%s"' % hashlib.md5(body).hexdigest()}, body)
+
+    def do_GET(self):
+        bucket_name, key = self.split_path()
+        if key not in self.buckets.get(bucket_name, {}):
+            return self.error(404, "NoSuchKey")
+        # Alternate between both ways of framing a body
+        body = self.buckets[bucket_name][key]
+        self.reply(200, _body=body, _chunked=len(body) % 2 == 1)
+
+    def do_POST(self):
+        # DeleteObjects of the cleanup
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        bucket_name = self.path.lstrip("/").split("?")[0]
+        for key in re.findall(rb"<Key>(.*?)</Key>", body):
+            self.buckets[bucket_name].pop(key.decode(), None)
+        self.reply(200, _body=b"<DeleteResult></DeleteResult>")
+
+    def do_DELETE(self):
+        bucket_name, key = self.split_path()
+        if key:
+            self.buckets[bucket_name].pop(key, None)
+        else:
+            del self.buckets[bucket_name]
+        self.reply(204)
+
+    def log_message(self, *args):
+        pass
+
+
+class AsyncEngineTestCase(unittest.TestCase):
+    def setUp(self):
+        FakeS3Handler.buckets = {}
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeS3Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+        self.configuration["s3_host"] = "http://127.0.0.1:%s" % (
+            self.server.server_address[1]
+        )
+        self.configuration["addressing_style"] = "path"
+        self.configuration["engine"] = "async"
+        self.configuration["object_size"] = "1KB"
+        self.s3 = s3_response_time.endpoint_auth(self.configuration)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_async_probe(self):
+        # Test the async engine records the phases of the sync engine
+        timings = {}
+        total_time = s3_response_time.probe(self.s3, self.configuration, timings)
+        for phase in (
+            "create_bucket",
+            "create_random_payload",
+            "md5_random_payload",
+            "upload_object",
+            "get_object_etag",
+            "download_object",
+            "md5_downloaded_payload",
+            "delete_object",
+            "delete_bucket",
+        ):
+            self.assertIn(phase, timings)
+        self.assertGreater(total_time, 0.0)
+        self.assertEqual(FakeS3Handler.buckets, {})
+
+        # Test a chunked response body is read
+        self.configuration["object_size"] = "1025B"
+        s3_response_time.probe(self.s3, self.configuration, {})
+
+    def test_async_probe_failed(self):
+        # Test the bucket is removed when the download does not match
+        with patch("s3_response_time.Checksums.md5sum", return_value="fake"):
+            with self.assertRaises(SystemExit) as se:
+                s3_response_time.probe(self.s3, self.configuration, {})
+        self.assertEqual(se.exception.code, 2)
+        self.assertEqual(FakeS3Handler.buckets, {})
+
+        # Test an unknown engine
+        self.configuration["engine"] = "threads"
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.probe(self.s3, self.configuration, {})
+        self.assertEqual(se.exception.code, 2)
+
+    def test_async_s3_errors(self):
+        async def requests():
+            client = s3_response_time.AsyncS3(self.s3, self.configuration, 2)
+            try:
+                await client.request("CreateBucket", "PUT", "test-bucket")
+
+                # Test the error code of the response body is reported
+                with self.assertRaises(
+                    s3_response_time.botocore.exceptions.ClientError
+                ) as ce:
+                    await client.request("GetObject", "GET", "test-bucket", "missing")
+                self.assertEqual(ce.exception.response["Error"]["Code"], "NoSuchKey")
+
+                # Test a throttled request is recognized
+                with self.assertRaises(SystemExit) as se:
+                    await s3_response_time.async_upload_object(
+                        client, "test-bucket", "slow-down", b"data"
+                    )
+                self.assertTrue(s3_response_time.throttled(se.exception))
+
+                # Test connections are kept open and reused
+                self.assertEqual(len(client.idle), 1)
+            finally:
+                await client.close()
+
+        asyncio.run(requests())
+
+    def test_async_s3_timeout(self):
+        # An endpoint that accepts connections but never responds
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        self.configuration["s3_host"] = "http://127.0.0.1:%s" % (
+            listener.getsockname()[1]
+        )
+        self.configuration["read_timeout"] = "0.2"
+
+        async def requests():
+            client = s3_response_time.AsyncS3(self.s3, self.configuration)
+            try:
+                # Test a timeout is raised as the botocore error of the sync
+                # engine and reported as CRITICAL by the probe primitives
+                with self.assertRaises(
+                    s3_response_time.botocore.exceptions.ReadTimeoutError
+                ):
+                    await client.request("CreateBucket", "PUT", "test-bucket")
+                with patch("sys.stdout.write") as mock_write:
+                    with self.assertRaises(SystemExit) as se:
+                        await s3_response_time.async_create_bucket(
+                            client, "test-bucket"
+                        )
+                self.assertEqual(se.exception.code, 2)
+                output = "".join(call[0][0] for call in mock_write.call_args_list)
+                self.assertIn("CRITICAL - S3 ReadTimeoutError", output)
+            finally:
+                await client.close()
+
+        try:
+            asyncio.run(requests())
+        finally:
+            listener.close()
+
+    def test_async_s3_virtual_signature(self):
+        self.configuration["s3_host"] = "http://localhost:%s" % (
+            self.server.server_address[1]
+        )
+        self.configuration["addressing_style"] = "virtual"
+        s3 = s3_response_time.endpoint_auth(self.configuration)
+
+        # Record the signatures made at a fixed time so both engines match
+        signatures = []
+        get_signature = botocore.auth.HmacV1Auth.get_signature
+
+        def record_signature(signer, *args, **kwargs):
+            signatures.append(get_signature(signer, *args, **kwargs))
+            return signatures[-1]
+
+        class Sent(Exception):
+            pass
+
+        def sent(**kwargs):
+            raise Sent()
+
+        async def requests():
+            client = s3_response_time.AsyncS3(s3, self.configuration)
+            try:
+                with self.assertRaises(botocore.exceptions.ClientError):
+                    await client.request("GetObject", "GET", "test-bucket", "a key")
+                await client.request("CreateBucket", "PUT", "test-bucket")
+            finally:
+                await client.close()
+
+        s3.meta.client.meta.events.register("before-send.s3", sent)
+        with patch.object(botocore.auth.HmacV1Auth, "get_signature", record_signature):
+            with patch(
+                "botocore.auth.formatdate",
+                return_value="Thu, 01 Jan 2026 00:00:00 GMT",
+            ):
+                with self.assertRaises(Sent):
+                    s3.meta.client.get_object(Bucket="test-bucket", Key="a key")
+                with self.assertRaises(Sent):
+                    s3.meta.client.create_bucket(Bucket="test-bucket")
+                asyncio.run(requests())
+
+        # Test the async engine signs the bucket of a virtual host request
+        # like the sync engine
+        self.assertEqual(len(signatures), 4)
+        self.assertEqual(signatures[2:], signatures[:2])
+
+    def test_async_load_test(self):
+        self.configuration["async_concurrency"] = "50"
+        self.configuration["load_operations"] = "200"
+        self.configuration["load_object_size"] = "1KB"
+
+        # Test every operation completes with many requests in flight
+        results = s3_response_time.async_load_test(self.s3, self.configuration)
+        completed = sum(histogram.count for histogram in results["latencies"].values())
+        errors = sum(results["errors"].values())
+        self.assertEqual(completed + errors, 200)
+        self.assertGreater(results["latencies"]["get"].count, 0)
+        self.assertEqual(FakeS3Handler.buckets, {})
+
+    @patch("s3_response_time.async_load_test")
+    @patch("s3_response_time.s3_auth")
+    def test_main_async_load(self, mock_s3_auth, mock_async_load_test):
+        mock_async_load_test.return_value = {
+            "duration": 1.0,
+            "latencies": {
+                operation: s3_response_time.LatencyHistogram()
+                for operation in s3_response_time.LOAD_OPERATIONS
+            },
+            "errors": {"put": 0, "head": 0, "get": 0, "delete": 0},
+            "throttles": {"put": 0, "head": 0, "get": 0, "delete": 0},
+        }
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-good.json",
+                "--mode",
+                "async-load",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
+
+
+@unittest.skipIf(ThreadedMotoServer is None, "moto[server] is not installed")
+class AsyncEngineMotoServerTestCase(unittest.TestCase):
+    def setUp(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        self.server = ThreadedMotoServer("127.0.0.1", port, verbose=False)
+        self.server.start()
+
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+        self.configuration["s3_host"] = "http://127.0.0.1:%s" % port
+        self.configuration["addressing_style"] = "path"
+        self.configuration["signature"] = "s3v4"
+        self.configuration["object_size"] = "1KB"
+        self.s3 = s3_response_time.endpoint_auth(self.configuration)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_engines_match(self):
+        # Test both engines record the same phases against moto
+        timings = {"sync": {}, "async": {}}
+        for engine in timings:
+            self.configuration["engine"] = engine
+            self.configuration["in_memory"] = "True"
+            s3_response_time.probe(self.s3, self.configuration, timings[engine])
+        self.assertEqual(sorted(timings["sync"]), sorted(timings["async"]))
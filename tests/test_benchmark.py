@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from mock import patch
+
+from benchmarks import benchmark
+
+
+class BenchmarkTestCase(unittest.TestCase):
+    def test_run(self):
+        # Test every kind of benchmark is sampled against the mock
+        results = benchmark.run(["4KB"], 2, 10, "mock")
+        self.assertEqual(results["metadata"]["backend"], "mock")
+        for name in (
+            "probe/4KB/upload_object",
+            "probe/4KB/total_time",
+            "create_random_file/4KB",
+            "md5/4KB",
+            "load/4KB/seconds_per_operation",
+            "load/4KB/put_p50",
+        ):
+            self.assertEqual(len(results["results"][name]), 2)
+        self.assertNotIn("probe/4KB/peak_rss", results["results"])
+        self.assertEqual(
+            results["metadata"]["skipped"], list(benchmark.SERVER_BENCHMARKS)
+        )
+
+    def test_moto_endpoint_fallback(self):
+        # Test a missing moto[server] is reported and the mock is used
+        with patch.dict(sys.modules, {"moto.server": None}):
+            with patch("sys.stderr.write") as mock_write:
+                with benchmark.moto_endpoint("auto") as (s3_host, backend):
+                    self.assertEqual(backend, "mock")
+            output = "".join(call[0][0] for call in mock_write.call_args_list)
+            self.assertIn("WARNING - moto[server] is not installed", output)
+
+            # Test the server backend is required when asked for
+            with patch("sys.stdout.write"):
+                with self.assertRaises(SystemExit) as se:
+                    with benchmark.moto_endpoint("server"):
+                        pass
+            self.assertEqual(se.exception.code, 2)
+
+    def test_compare(self):
+        baseline = {"results": {"md5/4KB": [0.010, 0.011], "fast": [0.0001]}}
+        current = {
+            "results": {"md5/4KB": [0.013, 0.014], "fast": [0.0002], "new": [1.0]}
+        }
+
+        # Test a slowdown beyond the threshold is a regression, unless it is
+        # too small to measure
+        comparisons = benchmark.compare(baseline, current, 10.0)
+        self.assertEqual(
+            [comparison[0] for comparison in comparisons], ["fast", "md5/4KB"]
+        )
+        self.assertFalse(comparisons[0][4])
+        self.assertTrue(comparisons[1][4])
+        self.assertAlmostEqual(comparisons[1][3], 28.571, places=2)
+        self.assertFalse(benchmark.compare(baseline, current, 50.0)[1][4])
+
+    def test_main_compare(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name, seconds in (("baseline", 0.010), ("current", 0.020)):
+                paths.append(os.path.join(directory, "%s.json" % name))
+                with open(paths[-1], "w") as f:
+                    json.dump(
+                        {
+                            "metadata": {"backend": "mock"},
+                            "results": {"md5/4KB": [seconds]},
+                        },
+                        f,
+                    )
+
+            # Test a regression is reported as CRITICAL
+            with patch.object(sys, "argv", ["benchmark.py", "compare"] + paths):
+                self.assertEqual(benchmark.main(), 2)
+
+            # Test the comparison is OK within the threshold
+            with patch.object(
+                sys,
+                "argv",
+                ["benchmark.py", "compare", "--threshold", "150"] + paths,
+            ):
+                self.assertEqual(benchmark.main(), 0)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+import base64
+import boto3
+import hashlib
+import os
+import tempfile
+import unittest
+import zlib
+from mock import patch
+from moto import mock_s3
+
+import s3_response_time
+
+
+class ChecksumTestCase(unittest.TestCase):
+    def setUp(self):
+        self.data = s3_response_time.create_random_payload(2.5)
+
+    def test_md5_large_file(self):
+        path = os.path.join(tempfile.mkdtemp(), "data")
+        with open(path, "wb") as f:
+            f.write(self.data)
+
+        # Test files larger than the hash buffer
+        self.assertEqual(s3_response_time.md5(path), hashlib.md5(self.data).hexdigest())
+        self.assertEqual(
+            s3_response_time.checksum_file("SHA256", path),
+            base64.b64encode(hashlib.sha256(self.data).digest()).decode(),
+        )
+        os.remove(path)
+
+        # Test a missing file
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.checksum_file("SHA256", path)
+        self.assertEqual(se.exception.code, 2)
+
+    def test_checksum_data(self):
+        self.assertEqual(
+            s3_response_time.checksum_data("CRC32", self.data),
+            base64.b64encode(zlib.crc32(self.data).to_bytes(4, "big")).decode(),
+        )
+        self.assertEqual(
+            s3_response_time.checksum_data("SHA1", self.data),
+            base64.b64encode(hashlib.sha1(self.data).digest()).decode(),
+        )
+
+        # Test an unknown algorithm
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.checksum_data("MD4", self.data)
+        self.assertEqual(se.exception.code, 2)
+
+    @patch("botocore.compat.HAS_CRT", False)
+    def test_crc32c_requires_awscrt(self):
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.new_checksum("CRC32C")
+        self.assertEqual(se.exception.code, 2)
+
+    def test_checksums(self):
+        checksums = s3_response_time.Checksums("CRC32")
+        checksums.update(self.data[:1000])
+        first = checksums.part_digest()
+        checksums.update(self.data[1000:])
+
+        # Test the md5 restarts with each part and the checksum does not
+        self.assertEqual(first, hashlib.md5(self.data[:1000]).digest())
+        self.assertEqual(checksums.md5sum(), hashlib.md5(self.data[1000:]).hexdigest())
+        self.assertEqual(
+            checksums.checksum_value(),
+            s3_response_time.checksum_data("CRC32", self.data),
+        )
+        self.assertGreater(checksums.seconds, 0.0)
+        self.assertIsNone(s3_response_time.Checksums().checksum_value())
+
+    def test_separate_hashing(self):
+        checksums = s3_response_time.Checksums()
+        checksums.seconds = 1.0
+        timings = {"download_object": 3.0}
+
+        s3_response_time.separate_hashing(timings, "md5_downloaded_payload", checksums)
+        self.assertEqual(
+            timings, {"download_object": 2.0, "md5_downloaded_payload": 1.0}
+        )
+
+    @mock_s3
+    def test_probe_checksum(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+        configuration["checksum_algorithm"] = "sha256"
+        configuration["bucket_name"] = "checksum-bucket"
+
+        # moto does not return the additional checksums it stores
+        def object_checksum(_s3, _bucket_name, _object_name, _algorithm):
+            body = _s3.Object(_bucket_name, _object_name).get()["Body"].read()
+            return s3_response_time.checksum_data(_algorithm, body)
+
+        for in_memory in ("True", "False"):
+            configuration["in_memory"] = in_memory
+            timings = {}
+            with patch(
+                "s3_response_time.get_object_checksum", side_effect=object_checksum
+            ):
+                s3_response_time.probe(s3, configuration, timings)
+            self.assertIn("get_object_checksum", timings)
+            if in_memory == "True":
+                # Test hashing the download is not part of the download
+                self.assertIn("md5_downloaded_payload", timings)
+
+        # Test the downloaded file is checksummed in its own phase
+        self.assertIn("checksum_downloaded_file", timings)
+
+        # Test a checksum that does not match
+        configuration["in_memory"] = "True"
+        with patch("s3_response_time.get_object_checksum", return_value="fake"):
+            with self.assertRaises(SystemExit) as se:
+                s3_response_time.probe(s3, configuration, {})
+        self.assertEqual(se.exception.code, 2)
+
+    @mock_s3
+    def test_get_object_checksum(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="test-bucket")
+        s3_response_time.upload_object(
+            s3,
+            "test-bucket",
+            "checksum",
+            _body=self.data,
+            _checksum_algorithm="CRC32",
+            _checksum=s3_response_time.checksum_data("CRC32", self.data),
+        )
+
+        with patch.object(
+            s3.meta.client, "head_object", return_value={"ChecksumCRC32": "crc"}
+        ) as mock_head_object:
+            self.assertEqual(
+                s3_response_time.get_object_checksum(
+                    s3, "test-bucket", "checksum", "CRC32"
+                ),
+                "crc",
+            )
+        mock_head_object.assert_called_with(
+            Bucket="test-bucket", Key="checksum", ChecksumMode="ENABLED"
+        )
+
+        # Test S3 without additional checksums
+        with patch.object(s3.meta.client, "head_object", return_value={}):
+            self.assertEqual(
+                s3_response_time.get_object_checksum(
+                    s3, "test-bucket", "checksum", "CRC32"
+                ),
+                "",
+            )
+
+        # Test ClientError of a missing object
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.get_object_checksum(s3, "test-bucket", "missing", "CRC32")
+        self.assertEqual(se.exception.code, 2)
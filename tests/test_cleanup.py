@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+import boto3
+import influxdb_client
+import sys
+import unittest
+from mock import patch
+from moto import mock_s3
+
+import s3_response_time
+
+
+class CleanupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-influxdb.json"
+        )
+        self.configuration["cleanup_min_age"] = "0"
+
+    @mock_s3
+    @patch("s3_response_time.download_object_md5")
+    def test_probe_failed_cleanup(self, mock_download_object_md5):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        self.configuration["in_memory"] = "True"
+        mock_download_object_md5.return_value = "fake"
+
+        # Test the bucket and object are removed when the probe fails
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.probe(s3, self.configuration, {})
+        self.assertEqual(se.exception.code, 2)
+        self.assertEqual(len(list(s3.buckets.all())), 0)
+
+    @mock_s3
+    def test_cleanup_probes(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        for bucket_name in ["s3-response-time-probe-one", "other-bucket"]:
+            s3.create_bucket(Bucket=bucket_name)
+            for index in range(3):
+                s3.Object(bucket_name, "s3-response-time-probe-%s" % index).put(
+                    Body=b"probe"
+                )
+        s3.Object("other-bucket", "kept").put(Body=b"kept")
+        s3.meta.client.create_multipart_upload(
+            Bucket="s3-response-time-probe-one", Key="upload"
+        )
+        self.configuration["bucket_name"] = "other-bucket"
+
+        # Test the probe bucket is deleted and only probe objects are removed
+        # from the configured bucket
+        buckets, objects, bulk_deletes = s3_response_time.cleanup_probes(
+            s3, self.configuration
+        )
+        self.assertEqual(buckets, ["s3-response-time-probe-one"])
+        self.assertEqual(objects, 6)
+        self.assertEqual(bulk_deletes.count, 2)
+        self.assertEqual([bucket.name for bucket in s3.buckets.all()], ["other-bucket"])
+        self.assertEqual(
+            [item.key for item in s3.Bucket("other-bucket").objects.all()], ["kept"]
+        )
+
+        # Test nothing younger than cleanup_min_age is removed
+        s3.create_bucket(Bucket="s3-response-time-probe-two")
+        self.configuration["cleanup_min_age"] = "3600"
+        buckets, objects, bulk_deletes = s3_response_time.cleanup_probes(
+            s3, self.configuration
+        )
+        self.assertEqual((buckets, objects), ([], 0))
+        self.assertEqual(len(list(s3.buckets.all())), 2)
+
+    @patch("s3_response_time.cleanup_probes")
+    @patch("s3_response_time.s3_auth")
+    @patch.object(influxdb_client.InfluxDBClient, "write_api")
+    def test_main_cleanup(self, fake_influxdb, mock_s3_auth, mock_cleanup_probes):
+        bulk_deletes = s3_response_time.LatencyHistogram()
+        bulk_deletes.record(0.1)
+        mock_cleanup_probes.return_value = (
+            ["s3-response-time-probe-one"],
+            3,
+            bulk_deletes,
+        )
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-influxdb.json",
+                "--mode",
+                "cleanup",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
+        self.assertTrue(fake_influxdb.called)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+
+import http.server
+import os
+import tempfile
+import threading
+import unittest
+
+import s3_response_time
+
+
+class FakeS3Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("ETag", '"144c9defac04969c7bfad8efaa8ea194"')
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        body = b"fake"
+        self.send_response(200)
+        self.send_header("ETag", '"144c9defac04969c7bfad8efaa8ea194"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("ETag", '"144c9defac04969c7bfad8efaa8ea194"')
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.endswith("?uploads"):
+            body = (
+                b"<InitiateMultipartUploadResult><Bucket>test-bucket</Bucket>"
+                b"<Key>md5.txt</Key><UploadId>fake</UploadId>"
+                b"</InitiateMultipartUploadResult>"
+            )
+        else:
+            body = (
+                b"<CompleteMultipartUploadResult><Bucket>test-bucket</Bucket>"
+                b"<Key>md5.txt</Key><ETag>&quot;fake-3&quot;</ETag>"
+                b"</CompleteMultipartUploadResult>"
+            )
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ConnectionTimingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeS3Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.s3_host = "http://127.0.0.1:%s" % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_timing(self):
+        s3 = s3_response_time.s3_auth(
+            "fake", "fake", self.s3_host, "path", _connection_timing=True
+        )
+        timings = {}
+
+        # Test the first request opens a new connection
+        etag = s3_response_time.time_phase(
+            timings,
+            "get_object_etag",
+            s3_response_time.get_object_etag,
+            s3,
+            "test-bucket",
+            "md5.txt",
+        )
+        self.assertEqual(etag, "144c9defac04969c7bfad8efaa8ea194")
+        self.assertEqual(timings["get_object_etag_requests"], 1)
+        self.assertEqual(timings["get_object_etag_new_connections"], 1)
+        self.assertGreater(timings["get_object_etag_connect"], 0.0)
+        self.assertGreater(timings["get_object_etag_ttfb"], 0.0)
+
+        # Test the steps add up to no more than the phase
+        steps = sum(
+            timings["get_object_etag_%s" % field]
+            for field in ("dns", "connect", "tls", "send", "ttfb", "body")
+        )
+        self.assertLessEqual(steps, timings["get_object_etag"])
+
+        # Test the next request reuses the pooled connection
+        md5_hash = s3_response_time.time_phase(
+            timings,
+            "download_object",
+            s3_response_time.download_object_md5,
+            s3,
+            "test-bucket",
+            "md5.txt",
+        )
+        self.assertEqual(md5_hash, "144c9defac04969c7bfad8efaa8ea194")
+        self.assertEqual(timings["download_object_requests"], 1)
+        self.assertEqual(timings["download_object_new_connections"], 0)
+        self.assertEqual(timings["download_object_connect"], 0.0)
+
+        # Test the breakdown is shown next to the phase
+        output = s3_response_time.format_timings(timings)
+        self.assertIn("get_object_etag: ", output)
+        self.assertIn("get_object_etag_ttfb: ", output)
+
+    def test_download_file_connection_timing(self):
+        s3 = s3_response_time.s3_auth(
+            "fake", "fake", self.s3_host, "path", _connection_timing=True
+        )
+        timings = {}
+
+        # Test the requests made by the transfer threads are part of the phase
+        with tempfile.TemporaryDirectory() as path:
+            s3_response_time.time_phase(
+                timings,
+                "download_object",
+                s3_response_time.download_object,
+                s3,
+                "test-bucket",
+                "md5.txt",
+                "downloaded.txt",
+                path,
+            )
+            with open(os.path.join(path, "downloaded.txt"), "rb") as f:
+                self.assertEqual(f.read(), b"fake")
+        self.assertGreaterEqual(timings["download_object_requests"], 1)
+        self.assertEqual(timings["download_object_new_connections"], 1)
+        self.assertGreater(timings["download_object_ttfb"], 0.0)
+        self.assertGreaterEqual(timings["download_object_body"], 0.0)
+
+    def test_multipart_connection_timing(self):
+        s3 = s3_response_time.s3_auth(
+            "fake", "fake", self.s3_host, "path", _connection_timing=True
+        )
+        timings = {}
+
+        # Test the parts uploaded by the worker threads are part of the phase
+        s3_response_time.time_phase(
+            timings,
+            "upload_object",
+            s3_response_time.multipart_upload_object,
+            s3,
+            "test-bucket",
+            "md5.txt",
+            12,
+            lambda offset, size: b"fake",
+            4,
+            2,
+        )
+        self.assertEqual(timings["upload_object_requests"], 5)
+        self.assertGreaterEqual(timings["upload_object_new_connections"], 1)
+        self.assertGreater(timings["upload_object_send"], 0.0)
+
+        # Test the body of concurrent requests is not negative
+        self.assertGreaterEqual(timings["upload_object_body"], 0.0)
+
+    def test_no_connection_timing(self):
+        s3 = s3_response_time.s3_auth("fake", "fake", self.s3_host, "path")
+        timings = {}
+
+        # Test no breakdown is recorded when connection_timing is disabled
+        s3_response_time.time_phase(
+            timings,
+            "get_object_etag",
+            s3_response_time.get_object_etag,
+            s3,
+            "test-bucket",
+            "md5.txt",
+        )
+        self.assertEqual(list(timings), ["get_object_etag"])
+
+    def test_cold_warm(self):
+        s3 = s3_response_time.s3_auth(
+            "fake", "fake", self.s3_host, "path", _connection_timing=True
+        )
+        timings = {}
+
+        s3_response_time.cold_warm(
+            s3,
+            "test-bucket",
+            "md5.txt",
+            b"fake",
+            "144c9defac04969c7bfad8efaa8ea194",
+            timings,
+        )
+
+        # Test each operation opens a new connection when cold and reuses it
+        # when warm
+        for phase in ("upload_object", "get_object_etag", "download_object"):
+            self.assertEqual(timings["%s_cold_requests" % phase], 1)
+            self.assertEqual(timings["%s_cold_new_connections" % phase], 1)
+            self.assertEqual(timings["%s_warm_requests" % phase], 1)
+            self.assertEqual(timings["%s_warm_new_connections" % phase], 0)
+
+        # Test the cold and warm phases are reported but not part of the
+        # total time
+        output = s3_response_time.format_timings(timings)
+        self.assertIn("get_object_etag_cold: ", output)
+        self.assertIn("get_object_etag_warm: ", output)
+        self.assertNotIn("get_object_etag_cold", s3_response_time.S3_PHASES)
+
+    def test_cold_warm_failed(self):
+        s3 = s3_response_time.s3_auth("fake", "fake", self.s3_host, "path")
+        timings = {}
+
+        # Test a changed object is critical
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.cold_warm(
+                s3,
+                "test-bucket",
+                "md5.txt",
+                b"fake",
+                "ddb4502f21d869c1059d4adba77bee6d",
+                timings,
+            )
+        self.assertEqual(se.exception.code, 2)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+import influxdb_client
+import sys
+import unittest
+from mock import patch
+
+import s3_response_time
+
+
+class DaemonTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-influxdb.json"
+        )
+
+    @patch("time.sleep")
+    @patch("s3_response_time.probe")
+    @patch.object(influxdb_client.InfluxDBClient, "write_api")
+    def test_run_daemon(self, fake_influxdb, mock_probe, mock_sleep):
+        def mock_probe_function(s3, configuration, timings):
+            timings["upload_object"] = 1.0
+            return 1.0
+
+        # Test running several cycles with no issues
+        mock_probe.side_effect = mock_probe_function
+        with patch("sys.stdout.write") as mock_stdout:
+            exit_code = s3_response_time.run_daemon(
+                [(self.configuration, "fake")], 60, 0, 8, 3
+            )
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(mock_probe.call_count, 3)
+
+        # Test the response times of every cycle are summarized on exit
+        output = "".join(call[0][0] for call in mock_stdout.call_args_list)
+        self.assertIn("[fake-host] upload_object: count: 3", output)
+
+        # Test the schedule is anchored to the first run; sleep is mocked so the
+        # clock does not advance and each cycle is one interval further away
+        delays = [call[0][0] for call in mock_sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        self.assertAlmostEqual(delays[0], 60, delta=1)
+        self.assertAlmostEqual(delays[1], 120, delta=1)
+
+        # Test a failed cycle does not stop the daemon
+        mock_probe.reset_mock()
+        mock_probe.side_effect = [SystemExit(2), 1.0]
+        exit_code = s3_response_time.run_daemon(
+            [(self.configuration, "fake")], 60, 0, 8, 2
+        )
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(mock_probe.call_count, 2)
+
+    @patch("time.sleep")
+    @patch("s3_response_time.write_points_to_influxdb")
+    @patch("s3_response_time.probe")
+    @patch.object(influxdb_client.InfluxDBClient, "write_api")
+    def test_daemon_summary_interval(
+        self, fake_influxdb, mock_probe, mock_write_points, mock_sleep
+    ):
+        def mock_probe_function(s3, configuration, timings):
+            timings["upload_object"] = 1.0
+            return 1.0
+
+        # Test the percentiles of each window are reported while the daemon
+        # runs and the histograms start over for the next window
+        mock_probe.side_effect = mock_probe_function
+        with patch("sys.stdout.write") as mock_stdout:
+            s3_response_time.run_daemon(
+                [(self.configuration, "fake")], 60, 0, 8, 3, "probe", 0
+            )
+        output = "".join(call[0][0] for call in mock_stdout.call_args_list)
+        self.assertEqual(output.count("[fake-host] upload_object: count: 1 "), 3)
+        self.assertNotIn("count: 3", output)
+
+        # Test each window is written to Influxdb as daemon_summary points
+        summaries = [
+            point
+            for call in mock_write_points.call_args_list
+            for point in call[0][1]
+            if "daemon_summary" in point.to_line_protocol()
+        ]
+        self.assertEqual(len(summaries), 3)
+        self.assertIn("phase=upload_object", summaries[0].to_line_protocol())
+        self.assertIn("p99=", summaries[0].to_line_protocol())
+
+    @patch("s3_response_time.run_daemon")
+    @patch("s3_response_time.s3_auth")
+    def test_main_daemon(self, mock_s3_auth, mock_run_daemon):
+        mock_run_daemon.return_value = 0
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-good.json",
+                "--daemon",
+                "--interval",
+                "10",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
+
+        # Test the jitter defaults to 10% of the interval
+        self.assertEqual(
+            mock_run_daemon.call_args[0][1:], (10.0, 1.0, 8, None, "probe", 3600.0)
+        )
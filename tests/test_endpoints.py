@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import tempfile
+import unittest
+from mock import patch
+
+import s3_response_time
+
+
+class EndpointsTestCase(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_find_configuration_files(self):
+        # Test directories are expanded into the JSON files they contain
+        configuration_files = s3_response_time.find_configuration_files(
+            ["./tests/test_files", "other.json"]
+        )
+        self.assertIn("./tests/test_files/configuration-good.json", configuration_files)
+        self.assertEqual(configuration_files[-1], "other.json")
+
+        # Test a directory without JSON files
+        empty_directory = tempfile.mkdtemp()
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.find_configuration_files([empty_directory])
+        self.assertEqual(se.exception.code, 2)
+        os.rmdir(empty_directory)
+
+    def test_worst_status(self):
+        self.assertEqual(s3_response_time.worst_status([0, 0]), 0)
+        self.assertEqual(s3_response_time.worst_status([0, 3, 1]), 1)
+        self.assertEqual(s3_response_time.worst_status([2, 3, 1]), 2)
+        self.assertEqual(s3_response_time.worst_status([0, 3]), 3)
+
+    @patch("s3_response_time.probe")
+    def test_probe_endpoints(self, mock_probe):
+        good = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+        influxdb = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-bucket.json"
+        )
+        influxdb["influxdb_host"] = "fake-host"
+
+        def mock_probe_function(s3, configuration, timings):
+            if s3 == "bad":
+                print("CRITICAL - S3 ClientError: fake")
+                sys.exit(2)
+            if s3 == "broken":
+                raise ValueError("fake")
+            timings["upload_object"] = 1.0
+            return 1.0
+
+        mock_probe.side_effect = mock_probe_function
+
+        # Test all endpoints succeed
+        with patch("sys.stdout.write") as mock_write:
+            exit_code = s3_response_time.probe_endpoints(
+                [(good, "good", {}), (influxdb, "good", {})], 2
+            )
+        self.assertEqual(exit_code, 0)
+        output = "".join(call[0][0] for call in mock_write.call_args_list)
+        self.assertIn("[https://server.com] OK - total_time: 1.0", output)
+        self.assertIn("[fake-host] OK - total_time: 1.0", output)
+        self.assertIn("OK - 2 of 2 endpoints ok", output)
+
+        # Test a failed endpoint does not stop the others
+        with patch("sys.stdout.write") as mock_write:
+            exit_code = s3_response_time.probe_endpoints(
+                [(good, "good", {}), (influxdb, "bad", {})], 2
+            )
+        self.assertEqual(exit_code, 2)
+        output = "".join(call[0][0] for call in mock_write.call_args_list)
+        self.assertIn("[fake-host] CRITICAL - S3 ClientError: fake", output)
+        self.assertIn("CRITICAL - 1 of 2 endpoints failed: fake-host", output)
+
+        # Test an unexpected exception is reported as CRITICAL
+        exit_code = s3_response_time.probe_endpoints([(good, "broken", {})], 2)
+        self.assertEqual(exit_code, 2)
+
+    @patch("s3_response_time.probe")
+    def test_probe_endpoints_same_host(self, mock_probe):
+        first = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+        first["bucket_name"] = "first-bucket"
+        second = dict(first, bucket_name="second-bucket")
+
+        def mock_probe_function(s3, configuration, timings):
+            if s3 == "bad":
+                print("CRITICAL - S3 ClientError: fake")
+                sys.exit(2)
+            timings["upload_object"] = 1.0
+            return 1.0
+
+        mock_probe.side_effect = mock_probe_function
+
+        # Test a failed endpoint is not hidden by another one on the same host
+        with patch("sys.stdout.write") as mock_write:
+            exit_code = s3_response_time.probe_endpoints(
+                [(first, "good", {}), (second, "bad", {})], 2
+            )
+        self.assertEqual(exit_code, 2)
+        output = "".join(call[0][0] for call in mock_write.call_args_list)
+        self.assertIn("[https://server.com/first-bucket] OK - total_time: 1.0", output)
+        self.assertIn(
+            "[https://server.com/second-bucket] CRITICAL - S3 ClientError: fake",
+            output,
+        )
+        self.assertIn(
+            "CRITICAL - 1 of 2 endpoints failed: https://server.com/second-bucket",
+            output,
+        )
+
+        # Test endpoints on the same host and bucket are told apart by position
+        self.assertEqual(
+            s3_response_time.endpoint_labels([first, first, second]),
+            [
+                "https://server.com/first-bucket#1",
+                "https://server.com/first-bucket#2",
+                "https://server.com/second-bucket",
+            ],
+        )
@@ -45,6 +45,13 @@ class FileTestCase(unittest.TestCase):
                 s3_response_time.remove_file("/tmp/fake")
             self.assertEqual(se.exception.code, 2)
 
+        # Test create_random_payload and md5_data in memory
+        payload = s3_response_time.create_random_payload(1)
+        self.assertEqual(len(payload), 1048576)
+        self.assertEqual(
+            s3_response_time.md5_data(b"fake"), "144c9defac04969c7bfad8efaa8ea194"
+        )
+
         # Test the md5 hash calculation on an actual file
         md5_hash = s3_response_time.md5("./tests/test_files/md5.txt")
         self.assertEqual(md5_hash, "ddb4502f21d869c1059d4adba77bee6d")
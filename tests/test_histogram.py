@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+import json
+import random
+import unittest
+
+import s3_response_time
+
+
+class HistogramTestCase(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.values = [random.expovariate(10) for i in range(10000)]
+
+    def test_index(self):
+        histogram = s3_response_time.LatencyHistogram
+
+        # Test small values have their own bucket
+        self.assertEqual(histogram.index(0), 0)
+        self.assertEqual(histogram.index(127), 127)
+        self.assertEqual(histogram.value(127), 127.0)
+
+        # Test large values are within 1% of the middle of their bucket
+        for value in (1000, 123456, 60000000):
+            self.assertAlmostEqual(
+                histogram.value(histogram.index(value)), value, delta=value * 0.01
+            )
+
+        # Test values beyond the range are clamped to the last bucket
+        self.assertEqual(histogram.index(2**40), histogram.BUCKETS - 1)
+
+    def test_percentiles(self):
+        histogram = s3_response_time.LatencyHistogram()
+        self.assertEqual(histogram.summary(), {"count": 0})
+        self.assertEqual(histogram.percentile(50), 0.0)
+
+        for value in self.values:
+            histogram.record(value)
+
+        values = sorted(self.values)
+        summary = histogram.summary()
+        self.assertEqual(summary["count"], 10000)
+        self.assertAlmostEqual(summary["max"], values[-1], places=5)
+        for name, index in (("p50", 4999), ("p90", 8999), ("p99", 9899)):
+            self.assertAlmostEqual(
+                summary[name], values[index], delta=values[index] * 0.01
+            )
+
+    def test_merge_and_serialize(self):
+        first = s3_response_time.LatencyHistogram()
+        second = s3_response_time.LatencyHistogram()
+        combined = s3_response_time.LatencyHistogram()
+        for index, value in enumerate(self.values):
+            (first if index % 2 else second).record(value)
+            combined.record(value)
+
+        # Test merging gives the same result as recording everything once
+        first.merge(second)
+        self.assertEqual(first.summary(), combined.summary())
+
+        # Test a serialized histogram round trips through JSON
+        restored = s3_response_time.LatencyHistogram.from_dict(
+            json.loads(json.dumps(combined.to_dict()))
+        )
+        self.assertEqual(restored.summary(), combined.summary())
+        self.assertEqual(list(restored.counts), list(combined.counts))
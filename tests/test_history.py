@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+
+import boto3
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import unittest
+from mock import patch
+from moto import mock_s3
+
+import s3_response_time
+
+
+class HistoryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "history")
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-influxdb.json"
+        )
+        self.configuration["history_path"] = self.path
+        self.configuration["object_size"] = "1"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append_read(self):
+        store = s3_response_time.HistoryStore(self.path)
+        store.append("one", 0, 1024, {"upload_object": 0.5}, 100.0)
+        store.append("one", 2, 1024, {}, 200.0)
+
+        # Test the records of the window are read back with NaN for the
+        # phases that did not run
+        [columns] = store.read(150.0, 250.0)
+        self.assertEqual(columns["timestamp"], [200.0])
+        self.assertEqual(columns["endpoint"], [2053932785])
+        self.assertEqual(columns["status"], [2])
+        self.assertEqual(columns["object_size"], [1024.0])
+        self.assertEqual(
+            set(columns) - {"timestamp", "endpoint", "status", "object_size"},
+            set(s3_response_time.HISTORY_FIELDS),
+        )
+
+        [columns] = store.read(0.0, 250.0, ["upload_object"])
+        self.assertEqual(columns["upload_object"][0], 0.5)
+        self.assertTrue(math.isnan(columns["upload_object"][1]))
+        self.assertNotIn("total_time", columns)
+        self.assertEqual(store.read(300.0, 400.0), [])
+
+    def test_partial_record(self):
+        store = s3_response_time.HistoryStore(self.path)
+        store.append("one", 0, 1024, {}, 100.0)
+        with open(self.path, "ab") as f:
+            f.write(b"partial")
+
+        # Test a record cut short is ignored
+        [columns] = store.read(0.0, 200.0)
+        self.assertEqual(columns["timestamp"], [100.0])
+
+    def test_rotate(self):
+        record_size = s3_response_time.HistoryStore.record(
+            s3_response_time.HISTORY_FIELDS
+        ).size
+        store = s3_response_time.HistoryStore(self.path, 200 + record_size * 10, 3)
+        for index in range(50):
+            store.append("one", 0, 1024, {}, float(index))
+
+        # Test full files are rotated and only the newest are kept
+        self.assertEqual(store.paths(), [self.path + ".2", self.path + ".1", self.path])
+        timestamps = [
+            timestamp
+            for columns in store.read(0.0, 100.0)
+            for timestamp in columns["timestamp"]
+        ]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertEqual(timestamps[-1], 49.0)
+        self.assertLess(len(timestamps), 50)
+
+    def test_unwritable(self):
+        store = s3_response_time.HistoryStore(
+            os.path.join(self.path, "missing", "history")
+        )
+
+        # Test a failed write is a warning and does not fail the probe
+        with self.assertLogs("s3_response_time", level="WARNING"):
+            store.append("one", 0, 1024, {})
+
+    @mock_s3
+    def test_probe_history(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        self.configuration["in_memory"] = "True"
+        self.configuration["influxdb_enabled"] = "False"
+        s3_response_time.run_probe(s3, self.configuration, {})
+
+        # Test a breached threshold is recorded with the status it set
+        self.configuration["warning_thresholds"] = "total_time=0"
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.run_probe(s3, self.configuration, {})
+        self.assertEqual(se.exception.code, 1)
+
+        with patch("s3_response_time.download_object_md5") as mock_download_object_md5:
+            mock_download_object_md5.return_value = "fake"
+            with self.assertRaises(SystemExit):
+                s3_response_time.probe(s3, self.configuration, {})
+
+        # Test completed, slow and failed cycles are all recorded, and the
+        # slow cycle counts in the percentiles
+        summary = s3_response_time.summarize_history(
+            self.configuration, 0.0, time.time()
+        )
+        self.assertEqual(summary["cycles"], 3)
+        self.assertEqual(summary["warnings"], 1)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(summary["total_time"]["count"], 2)
+        self.assertIsNotNone(summary["upload_object_mb_per_second"][-1])
+
+    def test_default_path(self):
+        path = os.path.join(self.directory.name, "configuration.json")
+        with open(path, "w") as f:
+            json.dump({"s3_host": "https://server.com"}, f)
+
+        # Test the history is kept in /tmp unless history_path is set
+        self.assertEqual(
+            s3_response_time.read_configuration(path)["history_path"],
+            "/tmp/s3_response_time.history",
+        )
+
+    def test_summarize_history(self):
+        store = s3_response_time.HistoryStore(self.path)
+        endpoint = s3_response_time.endpoint_name(self.configuration)
+        timings = {phase: 0.25 for phase in s3_response_time.S3_PHASES}
+        # Three months of probes once a minute
+        for index in range(130000):
+            status = 2 if index % 1000 == 0 else 0
+            store.append(endpoint, status, 1024**2, timings, float(index * 60))
+        store.append("other", 0, 1024**2, timings, 130000 * 60.0)
+        start = time.perf_counter()
+        summary = s3_response_time.summarize_history(
+            self.configuration, 0.0, 130001 * 60.0
+        )
+
+        # Test every cycle of the endpoint is summarized in under a second
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(summary["cycles"], 130000)
+        self.assertEqual(summary["errors"], 130)
+        self.assertEqual(summary["upload_object"]["p99"], 0.25)
+        self.assertEqual(summary["download_object_mb_per_second"], [4.0] * 4)
+
+    def test_main_summarize(self):
+        s3_response_time.history_store(self.configuration).append(
+            s3_response_time.endpoint_name(self.configuration), 0, 1024, {}
+        )
+
+        with patch("s3_response_time.read_configuration") as mock_read_configuration:
+            mock_read_configuration.return_value = self.configuration
+            with patch.object(
+                sys,
+                "argv",
+                [
+                    "s3_response_time.py",
+                    "-c",
+                    "./tests/test_files/configuration-influxdb.json",
+                    "--summarize",
+                    "7d",
+                ],
+            ):
+                self.assertEqual(s3_response_time.main(), 0)
+
+    def test_parse_duration(self):
+        self.assertEqual(s3_response_time.parse_duration("90"), 90.0)
+        self.assertEqual(s3_response_time.parse_duration("30m"), 1800.0)
+        self.assertEqual(s3_response_time.parse_duration("7d"), 604800.0)
+        with self.assertRaises(SystemExit):
+            s3_response_time.parse_duration("soon")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 
 import influxdb_client
-import unittest
+import os
 import random
+import tempfile
+import unittest
 from mock import patch
 
 import s3_response_time
@@ -10,27 +12,89 @@ import s3_response_time
 
 class InfluxdbTestCase(unittest.TestCase):
     def setUp(self):
-        pass
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-influxdb.json"
+        )
+        self.spool_directory = tempfile.mkdtemp()
+        self.configuration["influxdb_spool"] = os.path.join(
+            self.spool_directory, "spool"
+        )
+
+    def tearDown(self):
+        for name in os.listdir(self.spool_directory):
+            os.remove(os.path.join(self.spool_directory, name))
+        os.rmdir(self.spool_directory)
+
+    def spool_lines(self):
+        lines = []
+        for name in os.listdir(self.spool_directory):
+            with open(os.path.join(self.spool_directory, name)) as f:
+                lines += f.read().splitlines()
+        return lines
 
     @patch.object(influxdb_client.InfluxDBClient, "write_api")
     def test_write(self, fake_client):
-        url = "http://fake:8086"
-        token = "fake-token"
-        org = "fake-org"
-        bucket = "fake-bucket"
-        host = "fake-host"
         seconds = random.random()
 
         # Test writing to influxdb
+        write = s3_response_time.write_to_influxdb(self.configuration, seconds)
+
+        self.assertEqual(write, None)
+        self.assertEqual(fake_client.return_value.write.call_count, 1)
+
+        # Test writing per phase response times to influxdb
         write = s3_response_time.write_to_influxdb(
-            url, token, org, bucket, host, seconds
+            self.configuration, seconds, {"upload_object": seconds}
         )
 
         self.assertEqual(write, None)
+        record = fake_client.return_value.write.call_args[1]["record"]
+        self.assertIn("upload_object=", record[0])
+        self.assertEqual(self.spool_lines(), [])
 
-        # Test ApiException when writing to influxdb
+        # Test ApiException when writing to influxdb spools the point instead
+        # of failing
         fake_client.side_effect = influxdb_client.rest.ApiException
 
-        with self.assertRaises(SystemExit) as se:
-            s3_response_time.write_to_influxdb(url, token, org, bucket, host, seconds)
-        self.assertEqual(se.exception.code, 2)
+        write = s3_response_time.write_to_influxdb(self.configuration, seconds)
+        self.assertEqual(write, None)
+        self.assertEqual(len(self.spool_lines()), 1)
+        self.assertTrue(self.spool_lines()[0].startswith("fake-bucket\tresponse_time"))
+
+        # Test the spooled point is replayed once influxdb can be reached
+        fake_client.side_effect = None
+        fake_client.return_value.write.reset_mock()
+
+        s3_response_time.write_to_influxdb(self.configuration, seconds)
+        self.assertEqual(fake_client.return_value.write.call_count, 2)
+        self.assertEqual(self.spool_lines(), [])
+
+    @patch.object(influxdb_client.InfluxDBClient, "write_api")
+    def test_writer_batches(self, fake_client):
+        writer = s3_response_time.influxdb_writer(self.configuration)
+        points = [
+            influxdb_client.Point("response_time").field("seconds", float(i))
+            for i in range(10)
+        ]
+
+        # Test queued points are written in one batch when the writer closes
+        writer.write("fake-bucket", points)
+        writer.close()
+        self.assertEqual(fake_client.return_value.write.call_count, 1)
+        self.assertEqual(len(fake_client.return_value.write.call_args[1]["record"]), 10)
+
+    def test_spool_size(self):
+        writer = s3_response_time.InfluxDBWriter(
+            "http://fake:8086", "", "", self.configuration["influxdb_spool"], 1000
+        )
+        writer.close()
+
+        # Test the oldest points are dropped when the spool file is full
+        for i in range(100):
+            writer.spool([("fake-bucket", "response_time seconds=%s" % i)])
+        self.assertLessEqual(
+            os.path.getsize(self.configuration["influxdb_spool"]), 1000
+        )
+        self.assertEqual(
+            self.spool_lines()[-1], "fake-bucket\tresponse_time seconds=99"
+        )
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+import boto3
+import botocore
+import influxdb_client
+import sys
+import unittest
+from mock import patch
+from moto import mock_s3
+
+import s3_response_time
+
+
+class KeyNamingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-influxdb.json"
+        )
+        self.configuration["load_workers"] = "2"
+        self.configuration["load_operations"] = "10"
+        self.configuration["key_prefixes"] = "4"
+
+    def test_load_key(self):
+        # Test every layout keeps the probe prefix
+        for key_naming in s3_response_time.KEY_NAMINGS:
+            self.assertTrue(
+                s3_response_time.load_key(key_naming, 1).startswith(
+                    s3_response_time.PROBE_PREFIX
+                )
+            )
+
+        # Test sequential keys sort in creation order
+        self.assertLess(
+            s3_response_time.load_key("sequential", 1),
+            s3_response_time.load_key("sequential", 2),
+        )
+
+        # Test hot keys share one prefix
+        self.assertTrue(
+            s3_response_time.load_key("hot", 1).startswith(
+                "s3-response-time-probe-hot/"
+            )
+        )
+
+        # Test hashed keys are spread over key_prefixes prefixes
+        prefixes = set(
+            s3_response_time.load_key("hashed", index, 4).split("/")[0]
+            for index in range(200)
+        )
+        self.assertEqual(
+            prefixes,
+            set("s3-response-time-probe-%04x" % prefix for prefix in range(4)),
+        )
+
+    def test_throttled(self):
+        slow_down = botocore.exceptions.ClientError(
+            {"Error": {"Code": "SlowDown"}, "ResponseMetadata": {}}, "PutObject"
+        )
+        unavailable = botocore.exceptions.ClientError(
+            {"Error": {"Code": "503"}, "ResponseMetadata": {"HTTPStatusCode": 503}},
+            "GetObject",
+        )
+        missing = botocore.exceptions.ClientError(
+            {"Error": {"Code": "404"}, "ResponseMetadata": {"HTTPStatusCode": 404}},
+            "HeadObject",
+        )
+        self.assertTrue(s3_response_time.throttled(slow_down))
+        self.assertTrue(s3_response_time.throttled(unavailable))
+        self.assertFalse(s3_response_time.throttled(missing))
+        self.assertFalse(s3_response_time.throttled(ValueError()))
+
+        # Test the ClientError a primitive exited on is found
+        try:
+            try:
+                raise slow_down
+            except botocore.exceptions.ClientError:
+                sys.exit(2)
+        except SystemExit as e:
+            self.assertTrue(s3_response_time.throttled(e))
+
+    def test_throttles_not_retried(self):
+        attempts = []
+
+        class Raw(object):
+            def stream(self):
+                yield b"<Error><Code>SlowDown</Code></Error>"
+
+        def slow_down(request, **kwargs):
+            attempts.append(request)
+            return botocore.awsrequest.AWSResponse(request.url, 503, {}, Raw())
+
+        # Test the load modes send each request once, so every throttled
+        # request is counted without retries or backoff
+        s3 = s3_response_time.endpoint_auth(self.configuration, None, "load")
+        s3.meta.client.meta.events.register("before-send", slow_down)
+        with self.assertRaises(botocore.exceptions.ClientError) as cm:
+            s3.meta.client.put_object(Bucket="bucket", Key="key", Body=b"load")
+        self.assertTrue(s3_response_time.throttled(cm.exception))
+        self.assertEqual(len(attempts), 1)
+
+        # Test the probe keeps the botocore retries
+        s3 = s3_response_time.endpoint_auth(self.configuration)
+        self.assertNotIn("total_max_attempts", s3.meta.client.meta.config.retries)
+
+    @mock_s3
+    def test_key_naming(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        self.configuration["key_namings"] = "sequential,hashed"
+
+        # Test the load runs once per strategy and cleans up after each
+        results = s3_response_time.key_naming(s3, self.configuration)
+        self.assertEqual(
+            [result["strategy"] for result in results], ["sequential", "hashed"]
+        )
+        for result in results:
+            self.assertEqual(result["operations"] + result["errors"], 10)
+            self.assertEqual(result["throttles"], 0)
+            self.assertEqual(result["throttle_rate"], 0.0)
+        self.assertEqual(len(list(s3.buckets.all())), 0)
+
+        # Test an unknown strategy
+        self.configuration["key_namings"] = "random"
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.key_naming(s3, self.configuration)
+        self.assertEqual(se.exception.code, 2)
+
+    @patch("s3_response_time.key_naming")
+    @patch("s3_response_time.s3_auth")
+    @patch.object(influxdb_client.InfluxDBClient, "write_api")
+    def test_main_key_naming(self, fake_influxdb, mock_s3_auth, mock_key_naming):
+        mock_key_naming.return_value = [
+            {"strategy": "uuid", "ops_per_second": 10.0, "throttle_rate": 0.0},
+            {"strategy": "hot", "ops_per_second": 5.0, "throttle_rate": 0.5},
+        ]
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-influxdb.json",
+                "--mode",
+                "key-naming",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
+        self.assertTrue(fake_influxdb.called)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+import boto3
+import influxdb_client
+import sys
+import unittest
+from mock import patch
+from moto import mock_s3
+
+import s3_response_time
+
+
+class ListingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-influxdb.json"
+        )
+        self.configuration["list_keys"] = "250"
+        self.configuration["list_prefixes"] = "4"
+        self.configuration["list_page_size"] = "100"
+        self.configuration["list_workers"] = "4"
+        self.configuration["bucket_name"] = "listing-bucket"
+
+    def test_listing_keys(self):
+        keys = s3_response_time.listing_keys(self.configuration)
+        self.assertEqual(len(keys), 250)
+        self.assertEqual(keys[0], "s3-response-time-list/0000/00000000")
+        self.assertEqual(keys[5], "s3-response-time-list/0001/00000005")
+
+    @mock_s3
+    def test_listing(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+
+        # Test both methods list every key page by page
+        results = s3_response_time.listing(s3, self.configuration)
+        self.assertEqual(
+            [result["method"] for result in results], ["paginated", "parallel"]
+        )
+        self.assertEqual(results[0]["keys"], 250)
+        self.assertEqual(results[0]["pages"], 3)
+        self.assertEqual(results[1]["keys"], 250)
+        # One delimiter page and one page for each of the 4 prefixes
+        self.assertEqual(results[1]["pages"], 5)
+        self.assertEqual(results[0]["page_count"], 3)
+
+        # Test the bucket was emptied and deleted
+        self.assertEqual(len(list(s3.buckets.all())), 0)
+
+    @mock_s3
+    def test_listing_reuse_bucket(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="listing-bucket")
+        self.configuration["create_bucket"] = "False"
+        keys = s3_response_time.listing_keys(self.configuration)
+
+        # Test only missing keys are created and the keys are kept
+        self.assertEqual(
+            s3_response_time.fill_bucket(
+                s3, "listing-bucket", "s3-response-time-list/", keys[:100], 4
+            ),
+            100,
+        )
+        s3_response_time.listing(s3, self.configuration)
+        self.assertEqual(
+            s3_response_time.fill_bucket(
+                s3, "listing-bucket", "s3-response-time-list/", keys, 4
+            ),
+            0,
+        )
+
+    @mock_s3
+    @patch("s3_response_time.parallel_list")
+    def test_listing_failed(self, mock_parallel_list):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        mock_parallel_list.return_value = (["fake"], [1.0])
+
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.listing(s3, self.configuration)
+        self.assertEqual(se.exception.code, 2)
+
+    @mock_s3
+    def test_delete_objects(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="delete-bucket")
+        keys = ["key-%s" % index for index in range(1001)]
+        s3_response_time.fill_bucket(s3, "delete-bucket", "key-", keys, 8)
+
+        # Test more keys than fit in one DeleteObjects request
+        with patch.object(
+            s3.meta.client,
+            "delete_objects",
+            wraps=s3.meta.client.delete_objects,
+        ) as mock_delete_objects:
+            s3_response_time.delete_objects(s3, "delete-bucket", keys)
+        self.assertEqual(mock_delete_objects.call_count, 2)
+        self.assertEqual(len(list(s3.Bucket("delete-bucket").objects.all())), 0)
+
+        # Test ClientError of a missing bucket
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.delete_objects(s3, "missing-bucket", keys)
+        self.assertEqual(se.exception.code, 2)
+
+    @patch("s3_response_time.listing")
+    @patch("s3_response_time.s3_auth")
+    @patch.object(influxdb_client.InfluxDBClient, "write_api")
+    def test_main_listing(self, fake_influxdb, mock_s3_auth, mock_listing):
+        mock_listing.return_value = [
+            {"method": "paginated", "seconds": 2.0, "keys": 10},
+            {"method": "parallel", "seconds": 1.0, "keys": 10},
+        ]
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-influxdb.json",
+                "--mode",
+                "listing",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
+        self.assertTrue(fake_influxdb.called)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+import boto3
+import influxdb_client
+import sys
+import time
+import unittest
+from mock import patch
+from moto import mock_s3
+
+import s3_response_time
+
+
+class LoadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-influxdb.json"
+        )
+        self.configuration["load_workers"] = "4"
+        self.configuration["load_operations"] = "40"
+
+    def test_parse_mix(self):
+        self.assertEqual(
+            s3_response_time.parse_mix("put:1, GET:4"), {"put": 1.0, "get": 4.0}
+        )
+
+        # Test an unknown operation
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.parse_mix("put:1,list:1")
+        self.assertEqual(se.exception.code, 2)
+
+        # Test a missing weight
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.parse_mix("put")
+        self.assertEqual(se.exception.code, 2)
+
+    @mock_s3
+    def test_load_test(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+
+        # Test the number of operations is limited by load_operations
+        results = s3_response_time.load_test(s3, self.configuration)
+        completed = sum(histogram.count for histogram in results["latencies"].values())
+        errors = sum(results["errors"].values())
+        self.assertEqual(completed + errors, 40)
+        self.assertGreater(results["latencies"]["put"].count, 0)
+
+        # Test the objects and bucket were removed with one DeleteObjects
+        self.assertEqual(results["bulk_delete"].count, 1)
+        self.assertEqual(len(list(s3.buckets.all())), 0)
+
+    @mock_s3
+    def test_load_test_duration(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        self.configuration["load_operations"] = "0"
+        self.configuration["load_duration"] = "0.2"
+        self.configuration["load_mix"] = "put:1"
+
+        # Test the load stops after load_duration seconds
+        results = s3_response_time.load_test(s3, self.configuration)
+        self.assertLess(results["duration"], 5)
+        self.assertGreater(results["latencies"]["put"].count, 0)
+
+    @mock_s3
+    def test_open_loop_test(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        self.configuration["load_duration"] = "0.5"
+        self.configuration["open_loop_rate"] = "40"
+
+        # Test requests are issued on schedule for load_duration seconds
+        results = s3_response_time.open_loop_test(s3, self.configuration)
+        completed = sum(histogram.count for histogram in results["latencies"].values())
+        errors = sum(results["errors"].values())
+        self.assertEqual(completed + errors, 20)
+        self.assertEqual(results["lags"].count, 20)
+
+        # Test the objects and bucket were removed
+        self.assertEqual(len(list(s3.buckets.all())), 0)
+
+    @mock_s3
+    def test_open_loop_lag(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        self.configuration["load_workers"] = "1"
+        self.configuration["load_duration"] = "0.25"
+        self.configuration["open_loop_rate"] = "40"
+
+        def slow_run(_self, _operation, _key, _intended_time=None):
+            time.sleep(0.05)
+
+        # Test requests waiting for a busy worker are reported behind schedule
+        with patch.object(s3_response_time.LoadOperations, "run", slow_run):
+            results = s3_response_time.open_loop_test(s3, self.configuration)
+        self.assertEqual(results["lags"].count, 10)
+        self.assertGreater(results["lags"].max, 100000)
+
+    @mock_s3
+    def test_load_probe_endpoints(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        self.configuration["influxdb_enabled"] = "False"
+        self.configuration["load_duration"] = "0.2"
+        self.configuration["open_loop_rate"] = "40"
+        other = {**self.configuration, "influxdb_host": "other-host"}
+
+        # Test the load modes discard their output inside the captured output
+        # of each endpoint and report through probe_endpoints
+        for mode in ["load", "open-loop"]:
+            with patch("sys.stdout.write") as mock_write:
+                exit_code = s3_response_time.probe_endpoints(
+                    [(self.configuration, s3, {}), (other, s3, {})], 2, None, mode
+                )
+            self.assertEqual(exit_code, 0)
+            output = "".join(call[0][0] for call in mock_write.call_args_list)
+            self.assertIn("[other-host] OK - ", output)
+            self.assertIn("OK - 2 of 2 endpoints ok", output)
+            self.assertNotIn("delete_bucket: Ok", output)
+
+    @staticmethod
+    def histograms(_latencies):
+        histograms = {}
+        for operation, seconds in _latencies.items():
+            histograms[operation] = s3_response_time.LatencyHistogram()
+            for value in seconds:
+                histograms[operation].record(value)
+        return histograms
+
+    @patch("s3_response_time.load_test")
+    @patch("s3_response_time.s3_auth")
+    @patch.object(influxdb_client.InfluxDBClient, "write_api")
+    def test_main_load(self, fake_influxdb, mock_s3_auth, mock_load_test):
+        mock_load_test.return_value = {
+            "duration": 1.0,
+            "latencies": self.histograms(
+                {"put": [1.0], "head": [], "get": [0.5, 0.7], "delete": []}
+            ),
+            "errors": {"put": 0, "head": 1, "get": 0, "delete": 0},
+            "throttles": {"put": 0, "head": 0, "get": 0, "delete": 0},
+        }
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-influxdb.json",
+                "--mode",
+                "load",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
+        self.assertTrue(fake_influxdb.called)
+
+    @patch("s3_response_time.open_loop_test")
+    @patch("s3_response_time.s3_auth")
+    def test_main_open_loop(self, mock_s3_auth, mock_open_loop_test):
+        mock_open_loop_test.return_value = {
+            "duration": 1.0,
+            "latencies": self.histograms(
+                {"put": [1.0], "head": [], "get": [0.5], "delete": []}
+            ),
+            "errors": {"put": 0, "head": 0, "get": 0, "delete": 0},
+            "throttles": {"put": 0, "head": 0, "get": 0, "delete": 0},
+            "lags": self.histograms({"lags": [0.0, 0.1]})["lags"],
+        }
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-good.json",
+                "--mode",
+                "open-loop",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
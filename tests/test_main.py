@@ -14,6 +14,7 @@ class TestMain(unittest.TestCase):
         pass
 
     @mock_s3
+    @patch("s3_response_time.download_object")
     @patch("s3_response_time.upload_object")
     @patch("s3_response_time.get_object_etag")
     @patch("s3_response_time.md5")
@@ -28,6 +29,7 @@ class TestMain(unittest.TestCase):
         mock_md5,
         mock_etag,
         mock_upload_object,
+        mock_download_object,
     ):
 
         # Mock the remove function
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+import hashlib
+import os
+import tempfile
+import unittest
+from mock import patch
+
+import s3_response_time
+
+
+class PayloadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+        self.size = 2 * 1024 * 1024 + 17
+
+    def test_seeded_payload(self):
+        payload = s3_response_time.SeededPayload(1, self.size)
+        data = payload.read(0, self.size)
+
+        # Test the chunks and parts match the whole payload
+        self.assertEqual(len(data), self.size)
+        self.assertEqual(b"".join(payload.chunks()), data)
+        self.assertEqual(payload.read(1000000, 2000000), data[1000000:3000000])
+        self.assertEqual(payload.read(self.size - 10, 100), data[-10:])
+
+        # Test the same seed gives the same payload and another seed does not
+        self.assertEqual(
+            s3_response_time.SeededPayload(1, self.size).read(0, 64), data[:64]
+        )
+        self.assertNotEqual(
+            s3_response_time.SeededPayload(2, self.size).read(0, 64), data[:64]
+        )
+
+        # Test the chunks differ from each other
+        self.assertNotEqual(payload.chunk(0), payload.chunk(1))
+
+        self.assertEqual(payload.md5(), hashlib.md5(data).hexdigest())
+
+    @patch("s3_response_time.hashlib.md5", wraps=hashlib.md5)
+    def test_seeded_md5_memoized(self, mock_md5):
+        first = s3_response_time.seeded_md5(31337, 1024)
+        second = s3_response_time.seeded_md5(31337, 1024)
+
+        # Test the payload is hashed only once
+        self.assertEqual(first, second)
+        self.assertEqual(mock_md5.call_count, 1)
+
+    def test_seeded_part_digests(self):
+        data = s3_response_time.SeededPayload(3, self.size).read(0, self.size)
+        part_size = 1024 * 1024
+
+        # Test each part is hashed, including the short last part
+        digests = s3_response_time.seeded_part_digests(3, self.size, part_size)
+        self.assertEqual(
+            digests,
+            [
+                hashlib.md5(data[offset : offset + part_size]).digest()
+                for offset in range(0, self.size, part_size)
+            ],
+        )
+
+        # Test the digests are memoized
+        with patch("s3_response_time.hashlib.md5") as mock_md5:
+            s3_response_time.seeded_part_digests(3, self.size, part_size)
+            self.assertFalse(mock_md5.called)
+
+    def test_create_payload(self):
+        # Test random payloads
+        payload = s3_response_time.create_payload(self.configuration, 1024)
+        self.assertEqual(len(payload), 1024)
+        self.assertEqual(
+            s3_response_time.payload_md5(
+                self.configuration, 1024, s3_response_time.md5_data, payload
+            ),
+            hashlib.md5(payload).hexdigest(),
+        )
+
+        # Test seeded payloads
+        self.configuration["payload"] = "seeded"
+        self.configuration["payload_seed"] = "4"
+        payload = s3_response_time.create_payload(self.configuration, 1024)
+        self.assertEqual(payload, s3_response_time.SeededPayload(4, 1024).read(0, 1024))
+        self.assertEqual(
+            s3_response_time.payload_md5(
+                self.configuration, 1024, s3_response_time.md5_data, None
+            ),
+            hashlib.md5(payload).hexdigest(),
+        )
+
+        # Test pooled payloads are reused
+        self.configuration["payload"] = "pool"
+        pooled = s3_response_time.create_payload(self.configuration, 1024)
+        self.assertEqual(pooled, payload)
+        self.assertIs(s3_response_time.create_payload(self.configuration, 1024), pooled)
+
+        # Test an unknown payload source
+        self.configuration["payload"] = "fake"
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.create_payload(self.configuration, 1024)
+        self.assertEqual(se.exception.code, 2)
+
+    def test_create_payload_file(self):
+        path = os.path.join(tempfile.mkdtemp(), "payload")
+
+        for source in ("random", "seeded", "pool"):
+            self.configuration["payload"] = source
+            s3_response_time.create_payload_file(self.configuration, path, self.size)
+            self.assertEqual(os.path.getsize(path), self.size)
+
+            # Test the memoized md5 hash matches the file
+            self.assertEqual(
+                s3_response_time.payload_md5(
+                    self.configuration, self.size, s3_response_time.md5, path
+                ),
+                s3_response_time.md5(path),
+            )
+
+        os.remove(path)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+import http.server
+import sys
+import threading
+import unittest
+from mock import patch
+
+import s3_response_time
+from tests.test_async_engine import FakeS3Handler
+
+
+class ProcessLoadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+        self.configuration["load_workers"] = "2"
+        self.configuration["load_operations"] = "40"
+        self.configuration["load_object_size"] = "1KB"
+
+    @staticmethod
+    def load_results(_seconds, _bytes):
+        latencies = {
+            operation: s3_response_time.LatencyHistogram()
+            for operation in s3_response_time.LOAD_OPERATIONS
+        }
+        latencies["get"].record(_seconds)
+        bulk_delete = s3_response_time.LatencyHistogram()
+        bulk_delete.record(_seconds)
+        return {
+            "duration": _seconds * 10,
+            "latencies": latencies,
+            "errors": {"put": 1, "head": 0, "get": 0, "delete": 0},
+            "throttles": {"put": 1, "head": 0, "get": 0, "delete": 0},
+            "bytes": {"put": 0, "head": 0, "get": _bytes, "delete": 0},
+            "bulk_delete": bulk_delete,
+        }
+
+    def test_shared_load_results(self):
+        shared = s3_response_time.SharedLoadResults(2)
+        shared.store(0, self.load_results(0.1, 1024))
+        shared.store(1, self.load_results(0.3, 2048))
+
+        # Test the results of both processes are combined
+        results = shared.results()
+        self.assertEqual(results["duration"], 3.0)
+        self.assertEqual(results["latencies"]["get"].count, 2)
+        self.assertEqual(results["latencies"]["get"].max, 300000)
+        self.assertEqual(results["latencies"]["put"].count, 0)
+        self.assertEqual(results["errors"]["put"], 2)
+        self.assertEqual(results["throttles"]["put"], 2)
+        self.assertEqual(results["bytes"]["get"], 3072)
+        self.assertEqual(results["bulk_delete"].count, 2)
+        self.assertAlmostEqual(
+            results["latencies"]["get"].percentile(99), 0.3, places=2
+        )
+
+    def test_process_load_test(self):
+        FakeS3Handler.buckets = {}
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeS3Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.configuration["s3_host"] = "http://127.0.0.1:%s" % (
+            server.server_address[1]
+        )
+        self.configuration["addressing_style"] = "path"
+        self.configuration["load_processes"] = "2"
+
+        # Test the operations are shared between processes with their own
+        # sessions, and the objects and bucket are removed
+        try:
+            s3 = s3_response_time.endpoint_auth(self.configuration)
+            results = s3_response_time.process_load_test(s3, self.configuration)
+        finally:
+            server.shutdown()
+            server.server_close()
+        completed = sum(histogram.count for histogram in results["latencies"].values())
+        errors = sum(results["errors"].values())
+        self.assertEqual(completed + errors, 40)
+        self.assertEqual(
+            results["bytes"]["put"], results["latencies"]["put"].count * 1024
+        )
+        self.assertEqual(FakeS3Handler.buckets, {})
+
+    @patch("s3_response_time.process_load_test")
+    @patch("s3_response_time.s3_auth")
+    def test_main_process_load(self, mock_s3_auth, mock_process_load_test):
+        mock_process_load_test.return_value = self.load_results(0.1, 1024)
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-good.json",
+                "--mode",
+                "process-load",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
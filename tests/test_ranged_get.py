@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+import boto3
+import botocore.response
+import influxdb_client
+import io
+import sys
+import unittest
+from mock import MagicMock, patch
+from moto import mock_s3
+
+import s3_response_time
+
+
+class RangedGetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-influxdb.json"
+        )
+        self.configuration["range_object_size"] = "100KB"
+        self.configuration["range_chunk_size"] = "16KB"
+        self.configuration["range_concurrency"] = "1,4"
+
+    @mock_s3
+    def test_ranged_download(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="test-bucket")
+        payload = s3_response_time.create_random_payload(100 / 1024)
+        s3.Object("test-bucket", "test-object").put(Body=payload)
+
+        # Test the ranges, including the short last range, are reassembled
+        data, latencies = s3_response_time.ranged_download(
+            s3, "test-bucket", "test-object", len(payload), 16384, 4
+        )
+        self.assertEqual(bytes(data), payload)
+        self.assertEqual(latencies.count, 7)
+
+    def test_download_range_too_long(self):
+        s3 = MagicMock()
+        buffer = memoryview(bytearray(16))
+
+        # Test an endpoint that ignores the range fails the range instead of
+        # overwriting the next one or raising past the end of the buffer
+        for start, end in ((0, 7), (8, 15)):
+            s3.meta.client.get_object.return_value = {
+                "Body": botocore.response.StreamingBody(io.BytesIO(b"x" * 16), 16)
+            }
+            with patch("sys.stdout.write") as mock_write:
+                with self.assertRaises(SystemExit) as se:
+                    s3_response_time.download_range(
+                        s3, "test-bucket", "test-object", buffer, start, end
+                    )
+            self.assertEqual(se.exception.code, 2)
+            output = "".join(call[0][0] for call in mock_write.call_args_list)
+            self.assertIn(
+                "CRITICAL - Range Download Failed: bytes=%s-%s" % (start, end), output
+            )
+        self.assertEqual(bytes(buffer), bytes(16))
+
+    @mock_s3
+    def test_ranged_get(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+
+        # Test each concurrency level is measured
+        results = s3_response_time.ranged_get(s3, self.configuration)
+        self.assertEqual([result["concurrency"] for result in results], [1, 4])
+        for result in results:
+            self.assertGreater(result["mbps"], 0)
+            self.assertEqual(result["range_count"], 7)
+
+        # Test the bucket was deleted
+        self.assertEqual(len(list(s3.buckets.all())), 0)
+
+    @mock_s3
+    @patch("s3_response_time.md5_data")
+    def test_ranged_get_download_failed(self, mock_md5_data):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        mock_md5_data.side_effect = ["uploaded", "downloaded"]
+
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.ranged_get(s3, self.configuration)
+        self.assertEqual(se.exception.code, 2)
+
+    @patch("s3_response_time.ranged_get")
+    @patch("s3_response_time.s3_auth")
+    @patch.object(influxdb_client.InfluxDBClient, "write_api")
+    def test_main_ranged_get(self, fake_influxdb, mock_s3_auth, mock_ranged_get):
+        mock_ranged_get.return_value = [
+            {"concurrency": 4, "seconds": 1.0, "mbps": 1.0, "range_count": 1}
+        ]
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-influxdb.json",
+                "--mode",
+                "ranged-get",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
+        self.assertTrue(fake_influxdb.called)
@@ -1,6 +1,10 @@
 #!/usr/bin/env python
 
+import json
+import os
+import tempfile
 import unittest
+from mock import patch
 
 import s3_response_time
 
@@ -15,7 +19,45 @@ class ReadConfigurationTestCase(unittest.TestCase):
             "aws_access_key_id": "abcdefghijklmnopqrstuvwxyz123456",
             "aws_secret_access_key": "1234567890abcdefghijklmnopqrstuv",
             "addressing_style": "auto",
+            "signature": "s3",
+            "engine": "sync",
             "object_size": "1",
+            "max_pool_connections": "10",
+            "connect_timeout": "60",
+            "read_timeout": "60",
+            "in_memory": "False",
+            "streaming": "False",
+            "checksum_algorithm": "",
+            "connection_timing": "False",
+            "payload": "random",
+            "payload_seed": "0",
+            "cold_warm": "False",
+            "part_size": "0",
+            "max_concurrency": "4",
+            "sweep_sizes": "4KB,64KB,1MB,16MB,256MB",
+            "sweep_iterations": "5",
+            "signatures": "s3,s3v4,s3v4-unsigned,s3v4-streaming",
+            "load_workers": "16",
+            "load_duration": "60",
+            "load_operations": "0",
+            "load_mix": "put:1,head:1,get:4,delete:1",
+            "load_object_size": "4KB",
+            "open_loop_rate": "100",
+            "load_key_naming": "uuid",
+            "key_namings": "uuid,sequential,hot,hashed",
+            "key_prefixes": "16",
+            "async_concurrency": "1000",
+            "load_processes": "0",
+            "range_object_size": "256MB",
+            "range_chunk_size": "8MB",
+            "range_concurrency": "1,2,4,8,16,32",
+            "list_keys": "10000",
+            "list_prefixes": "16",
+            "list_prefix": "s3-response-time-list/",
+            "list_page_size": "1000",
+            "list_workers": "16",
+            "cleanup_min_age": "3600",
+            "cleanup_workers": "8",
             "create_bucket": "True",
             "bucket_name": "",
             "influxdb_enabled": "False",
@@ -24,6 +66,16 @@ class ReadConfigurationTestCase(unittest.TestCase):
             "influxdb_org": "",
             "influxdb_bucket": "",
             "influxdb_host": "",
+            "influxdb_spool": "/tmp/s3_response_time.spool",
+            "influxdb_spool_size": "10MB",
+            "influxdb_batch_size": "500",
+            "influxdb_flush_interval": "5",
+            # Set by the test configuration files so tests leave no history
+            "history_path": "",
+            "history_size": "64MB",
+            "history_files": "4",
+            "warning_thresholds": "",
+            "critical_thresholds": "",
         }
 
         read_configuration = s3_response_time.read_configuration(
@@ -42,3 +94,23 @@ class ReadConfigurationTestCase(unittest.TestCase):
         with self.assertRaises(SystemExit) as se:
             s3_response_time.read_configuration("./tests/test_files/missing.json")
         self.assertEqual(se.exception.code, 2)
+
+    def test_part_size(self):
+        with tempfile.TemporaryDirectory() as path:
+            configuration_path = os.path.join(path, "configuration.json")
+
+            # Test a part size S3 accepts
+            with open(configuration_path, "w") as f:
+                json.dump({"part_size": "5MB"}, f)
+            configuration = s3_response_time.read_configuration(configuration_path)
+            self.assertEqual(configuration["part_size"], "5MB")
+
+            # Test a part size below the S3 minimum is rejected up front
+            with open(configuration_path, "w") as f:
+                json.dump({"part_size": "1MB"}, f)
+            with patch("sys.stdout.write") as mock_write:
+                with self.assertRaises(SystemExit) as se:
+                    s3_response_time.read_configuration(configuration_path)
+            self.assertEqual(se.exception.code, 2)
+            output = "".join(call[0][0] for call in mock_write.call_args_list)
+            self.assertIn("CRITICAL - Invalid part size: 1MB", output)
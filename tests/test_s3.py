@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 
 import boto3
+import botocore
+import hashlib
+import math
 import unittest
 from mock import patch
 from moto import mock_s3
@@ -93,6 +96,21 @@ class S3TestCase(unittest.TestCase):
             )
         self.assertEqual(se.exception.code, 2)
 
+        # Test uploading an object from memory
+        uploaded_object = s3_response_time.upload_object(
+            s3, "test-bucket", "md5.txt", _body=b"fake"
+        )
+        self.assertEqual(uploaded_object.key, "md5.txt")
+
+        # Test downloading an object into an md5 hash
+        md5_hash = s3_response_time.download_object_md5(s3, "test-bucket", "md5.txt")
+        self.assertEqual(md5_hash, s3_response_time.md5_data(b"fake"))
+
+        # Test ClientError when downloading an object into an md5 hash
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.download_object_md5(s3, "missing-bucket", "md5.txt")
+        self.assertEqual(se.exception.code, 2)
+
         # Test deleting an object
         s3_response_time.delete_object(uploaded_object)
         num_objects = len([obj.key for obj in bucket.objects.all()])
@@ -103,3 +121,220 @@ class S3TestCase(unittest.TestCase):
             bad_object = s3.Object("bucket_name", "key")
             s3_response_time.delete_object(bad_object)
         self.assertEqual(se.exception.code, 2)
+
+    @mock_s3
+    def test_multipart_object(self):
+        # moto does not decode the aws-chunked parts sent with default checksums
+        s3 = boto3.resource(
+            "s3",
+            region_name="us-east-1",
+            config=botocore.client.Config(request_checksum_calculation="when_required"),
+        )
+
+        s3_response_time.create_bucket(s3, "test-bucket")
+
+        part_size = 5 * 1024 * 1024
+        data = s3_response_time.create_random_payload(6)
+        part_timings = []
+        local_timings = []
+
+        # Test uploading an object in two parts
+        uploaded_object, expected_etag = s3_response_time.multipart_upload_object(
+            s3,
+            "test-bucket",
+            "multipart",
+            len(data),
+            s3_response_time.memory_part_reader(data),
+            part_size,
+            2,
+            part_timings,
+            local_timings,
+        )
+        self.assertEqual(uploaded_object.key, "multipart")
+        self.assertEqual(len(part_timings), 2)
+        self.assertEqual(len(local_timings), 2)
+        self.assertTrue(expected_etag.endswith("-2"))
+
+        # Test known part digests are used instead of hashing the parts
+        digests = [b"a" * 16, b"b" * 16]
+        uploaded_object, known_etag = s3_response_time.multipart_upload_object(
+            s3,
+            "test-bucket",
+            "multipart-digests",
+            len(data),
+            s3_response_time.memory_part_reader(data),
+            part_size,
+            _part_digests=digests,
+        )
+        self.assertEqual(known_etag, s3_response_time.multipart_etag(digests))
+
+        # Test the expected etag matches the etag assigned by S3
+        etag = s3_response_time.get_object_etag(s3, "test-bucket", "multipart")
+        self.assertEqual(etag, expected_etag)
+
+        # Test the downloaded object matches the uploaded data
+        md5_hash = s3_response_time.download_object_md5(s3, "test-bucket", "multipart")
+        self.assertEqual(md5_hash, s3_response_time.md5_data(data))
+
+        # Test the streamed download matches the expected etag whatever the
+        # chunk size
+        for chunk_size in (1024 * 1024, 3 * 1024 * 1024):
+            self.assertEqual(
+                s3_response_time.download_object_multipart_etag(
+                    s3, "test-bucket", "multipart", part_size, chunk_size
+                ),
+                expected_etag,
+            )
+
+        # Test ClientError when uploading to a missing bucket
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.multipart_upload_object(
+                s3,
+                "missing-bucket",
+                "multipart",
+                len(data),
+                s3_response_time.memory_part_reader(data),
+                part_size,
+            )
+        self.assertEqual(se.exception.code, 2)
+
+    @mock_s3
+    def test_streaming_probe(self):
+        # moto does not decode the aws-chunked parts sent with default checksums
+        s3 = boto3.resource(
+            "s3",
+            region_name="us-east-1",
+            config=botocore.client.Config(request_checksum_calculation="when_required"),
+        )
+        configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+        configuration["streaming"] = "True"
+        configuration["object_size"] = "11MB"
+        configuration["part_size"] = "5MB"
+        configuration["bucket_name"] = "streaming-bucket"
+
+        # Test the object is uploaded and verified part by part, with the
+        # generation and hashing of the parts reported as local work
+        timings = {}
+        s3_response_time.probe(s3, configuration, timings)
+        self.assertIn("download_object", timings)
+        self.assertNotIn("create_random_file", timings)
+        self.assertGreater(timings["create_random_payload"], 0)
+        self.assertGreater(timings["md5_random_payload"], 0)
+        self.assertGreater(timings["peak_rss"], 0)
+
+        # Test a seeded payload is verified with its memoized part hashes
+        configuration["payload"] = "seeded"
+        s3_response_time.probe(s3, configuration, {})
+        s3_response_time.probe(s3, configuration, {})
+        self.assertIn(
+            (0, 11 * 1024 * 1024, 5 * 1024 * 1024),
+            s3_response_time.SeededPayload.part_digests,
+        )
+
+    @mock_s3
+    def test_in_memory_multipart_probe(self):
+        s3 = boto3.resource(
+            "s3",
+            region_name="us-east-1",
+            config=botocore.client.Config(request_checksum_calculation="when_required"),
+        )
+        configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+        configuration["in_memory"] = "True"
+        configuration["object_size"] = "11MB"
+        configuration["part_size"] = "5MB"
+        configuration["bucket_name"] = "in-memory-bucket"
+
+        # Test the payload is hashed once, part by part, and the download is
+        # verified with the multipart etag of those parts
+        timings = {}
+        with patch("s3_response_time.md5_data") as mock_md5_data:
+            s3_response_time.probe(s3, configuration, timings)
+        mock_md5_data.assert_not_called()
+        self.assertIn("upload_part_mean", timings)
+        self.assertGreater(timings["md5_random_payload"], 0)
+        self.assertGreater(timings["upload_object"], 0)
+
+    def test_separate_part_work(self):
+        timings = {"upload_object": 10.0, "md5_random_file": 1.0}
+
+        # Test the upload phase is the time requests were in flight and the
+        # local work is reported on its own
+        s3_response_time.separate_part_work(
+            timings,
+            [(1.0, 2.0), (1.0, 2.0), (1.0, 2.0)],
+            [(3.0, 4.0), (0.0, 1.0), (0.5, 2.0)],
+            "create_random_file",
+            "md5_random_file",
+        )
+        self.assertEqual(
+            timings,
+            {"upload_object": 3.0, "create_random_file": 3.0, "md5_random_file": 7.0},
+        )
+        self.assertEqual(s3_response_time.in_flight_seconds([]), 0.0)
+
+    def test_multipart_etag(self):
+        digests = [hashlib.md5(b"one").digest(), hashlib.md5(b"two").digest()]
+        self.assertEqual(
+            s3_response_time.multipart_etag(digests),
+            "%s-2" % hashlib.md5(b"".join(digests)).hexdigest(),
+        )
+
+    def test_part_readers(self):
+        read_part = s3_response_time.memory_part_reader(b"0123456789")
+        self.assertEqual(bytes(read_part(2, 3)), b"234")
+
+        read_part = s3_response_time.file_part_reader("./tests/test_files/md5.txt")
+        with open("./tests/test_files/md5.txt", "rb") as f:
+            self.assertEqual(read_part(1, 4), f.read()[1:5])
+
+        # Test reading a part of a missing file
+        read_part = s3_response_time.file_part_reader("/tmp/missing")
+        with self.assertRaises(SystemExit) as se:
+            read_part(0, 1)
+        self.assertEqual(se.exception.code, 2)
+
+    def test_payload_part_reader(self):
+        configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+
+        # Test random parts
+        read_part = s3_response_time.payload_part_reader(configuration, 100)
+        self.assertEqual(len(read_part(10, 20)), 20)
+
+        # Test seeded parts
+        configuration["payload"] = "seeded"
+        read_part = s3_response_time.payload_part_reader(configuration, 100)
+        self.assertEqual(
+            read_part(10, 20), s3_response_time.SeededPayload(0, 100).read(10, 20)
+        )
+
+    def test_streaming_part_size(self):
+        self.assertEqual(
+            s3_response_time.streaming_part_size(1024 * 1024 * 1024, 0),
+            8 * 1024 * 1024,
+        )
+        self.assertEqual(
+            s3_response_time.streaming_part_size(1024 * 1024 * 1024, 16 * 1024 * 1024),
+            16 * 1024 * 1024,
+        )
+
+        # Test the part size grows so there are at most 10000 parts
+        self.assertEqual(
+            s3_response_time.streaming_part_size(100 * 1024**3, 8 * 1024 * 1024),
+            math.ceil(100 * 1024**3 / 10000),
+        )
+
+    def test_peak_rss(self):
+        self.assertGreater(s3_response_time.peak_rss(), 1024 * 1024)
+
+    def test_part_statistics(self):
+        self.assertEqual(s3_response_time.part_statistics("upload_part", []), {})
+        self.assertEqual(
+            s3_response_time.part_statistics("upload_part", [1.0, 3.0]),
+            {"upload_part_mean": 2.0, "upload_part_max": 3.0},
+        )
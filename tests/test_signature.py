@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+import influxdb_client
+import sys
+import unittest
+from mock import patch
+from moto import mock_s3
+
+import s3_response_time
+
+
+class SignatureTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-influxdb.json"
+        )
+        # moto only intercepts requests to AWS hosts
+        self.configuration["s3_host"] = "https://s3.amazonaws.com"
+        self.configuration["sweep_sizes"] = "4KB,1MB"
+        self.configuration["sweep_iterations"] = "2"
+        self.configuration["bucket_name"] = "signature-bucket"
+
+    @patch("boto3.resource")
+    def test_s3_auth_signature(self, mock_boto3_resource):
+        for signature, version, payload_signing, checksum_calculation in (
+            ("s3", "s3", None, "when_required"),
+            ("s3v4", "s3v4", True, "when_required"),
+            ("s3v4-unsigned", "s3v4", False, "when_required"),
+            ("s3v4-streaming", "s3v4", False, "when_supported"),
+        ):
+            s3_response_time.s3_auth(
+                "fake", "fake", "https://fake.site", _signature=signature
+            )
+            config = mock_boto3_resource.call_args.kwargs["config"]
+            self.assertEqual(config.signature_version, version)
+            self.assertEqual(config.s3.get("payload_signing_enabled"), payload_signing)
+            self.assertEqual(config.s3["addressing_style"], "auto")
+            self.assertEqual(config.request_checksum_calculation, checksum_calculation)
+
+        # Test an unknown signature
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.s3_auth("fake", "fake", "fake.site", _signature="fake")
+        self.assertEqual(se.exception.code, 2)
+
+    @mock_s3
+    def test_signing_timer(self):
+        s3 = s3_response_time.endpoint_auth({**self.configuration, "signature": "s3v4"})
+        seconds = s3_response_time.signing_timer(s3.meta.client)
+
+        # Test each request is timed once
+        s3_response_time.create_bucket(s3, "signature-bucket")
+        s3.meta.client.list_objects(Bucket="signature-bucket")
+        self.assertEqual(len(seconds), 2)
+        self.assertGreater(min(seconds), 0.0)
+
+    @mock_s3
+    def test_signature_compare(self):
+        # moto does not decode the aws-chunked bodies of s3v4-streaming
+        self.configuration["signatures"] = "s3, s3v4,s3v4-unsigned"
+
+        results = s3_response_time.signature_compare(self.configuration)
+        self.assertEqual(
+            [(result["signature"], result["size"]) for result in results],
+            [
+                ("s3", 4096),
+                ("s3v4", 4096),
+                ("s3v4-unsigned", 4096),
+                ("s3", 1048576),
+                ("s3v4", 1048576),
+                ("s3v4-unsigned", 1048576),
+            ],
+        )
+        for result in results:
+            self.assertGreater(result["upload_signing"], 0.0)
+            self.assertGreater(result["download_signing"], 0.0)
+
+    @mock_s3
+    @patch("s3_response_time.download_object_md5")
+    def test_signature_compare_download_failed(self, mock_download_object_md5):
+        mock_download_object_md5.return_value = "fake"
+
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.signature_compare(self.configuration)
+        self.assertEqual(se.exception.code, 2)
+
+    @patch("s3_response_time.signature_compare")
+    @patch("s3_response_time.s3_auth")
+    @patch.object(influxdb_client.InfluxDBClient, "write_api")
+    def test_main_signature_compare(
+        self, fake_influxdb, mock_s3_auth, mock_signature_compare
+    ):
+        mock_signature_compare.return_value = [
+            {
+                "signature": "s3v4",
+                "size": 4096,
+                "upload_object": 1.0,
+                "upload_signing": 0.1,
+                "download_object": 1.0,
+                "download_signing": 0.1,
+            }
+        ]
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-influxdb.json",
+                "--mode",
+                "signature-compare",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
+        self.assertTrue(fake_influxdb.called)
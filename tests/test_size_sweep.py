@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+import boto3
+import influxdb_client
+import sys
+import unittest
+from mock import patch
+from moto import mock_s3
+
+import s3_response_time
+
+
+class SizeSweepTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-influxdb.json"
+        )
+        self.configuration["sweep_sizes"] = "4KB, 64KB,1"
+        self.configuration["sweep_iterations"] = "2"
+
+    def test_parse_size(self):
+        self.assertEqual(s3_response_time.parse_size("1"), 1048576)
+        self.assertEqual(s3_response_time.parse_size("0.5"), 524288)
+        self.assertEqual(s3_response_time.parse_size("4KB"), 4096)
+        self.assertEqual(s3_response_time.parse_size("64kb"), 65536)
+        self.assertEqual(s3_response_time.parse_size("16M"), 16777216)
+        self.assertEqual(s3_response_time.parse_size("256MiB"), 268435456)
+        self.assertEqual(s3_response_time.parse_size("1GB"), 1073741824)
+        self.assertEqual(s3_response_time.parse_size("10B"), 10)
+
+        # Test an invalid size
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.parse_size("fake")
+        self.assertEqual(se.exception.code, 2)
+
+    def test_format_size(self):
+        self.assertEqual(s3_response_time.format_size(4096), "4KB")
+        self.assertEqual(s3_response_time.format_size(1048576), "1MB")
+        self.assertEqual(s3_response_time.format_size(1073741824), "1GB")
+        self.assertEqual(s3_response_time.format_size(1000), "1000B")
+
+    @mock_s3
+    def test_size_sweep(self):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+
+        # Test each size is uploaded and downloaded
+        results = s3_response_time.size_sweep(s3, self.configuration)
+        self.assertEqual([result["size"] for result in results], [4096, 65536, 1048576])
+        for result in results:
+            self.assertGreater(result["upload_object_mbps"], 0)
+            self.assertGreater(result["download_object_mbps"], 0)
+
+        # Test the bucket was deleted
+        self.assertEqual(len(list(s3.buckets.all())), 0)
+
+    @mock_s3
+    @patch("s3_response_time.download_object_md5")
+    def test_size_sweep_download_failed(self, mock_download_object_md5):
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        mock_download_object_md5.return_value = "fake"
+
+        with self.assertRaises(SystemExit) as se:
+            s3_response_time.size_sweep(s3, self.configuration)
+        self.assertEqual(se.exception.code, 2)
+
+    @patch("s3_response_time.size_sweep")
+    @patch("s3_response_time.s3_auth")
+    @patch.object(influxdb_client.InfluxDBClient, "write_api")
+    def test_main_size_sweep(self, fake_influxdb, mock_s3_auth, mock_size_sweep):
+        mock_size_sweep.return_value = [
+            {
+                "size": 4096,
+                "upload_object": 1.0,
+                "upload_object_mbps": 1.0,
+                "download_object": 1.0,
+                "download_object_mbps": 1.0,
+            }
+        ]
+
+        with patch.object(
+            sys,
+            "argv",
+            [
+                "s3_response_time.py",
+                "-c",
+                "./tests/test_files/configuration-influxdb.json",
+                "--mode",
+                "size-sweep",
+            ],
+        ):
+            self.assertEqual(s3_response_time.main(), 0)
+        self.assertTrue(fake_influxdb.called)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+import contextlib
+import io
+import math
+import sys
+import unittest
+from mock import patch
+
+import s3_response_time
+
+
+class ThresholdsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.configuration = s3_response_time.read_configuration(
+            "./tests/test_files/configuration-good.json"
+        )
+        self.timings = {"upload_object": 0.25, "download_object": 0.5}
+
+    def test_parse_range(self):
+        self.assertEqual(s3_response_time.parse_range("10"), (0.0, 10.0, False))
+        self.assertEqual(s3_response_time.parse_range("10:"), (10.0, math.inf, False))
+        self.assertEqual(s3_response_time.parse_range("~:10"), (-math.inf, 10.0, False))
+        self.assertEqual(s3_response_time.parse_range("@5:10"), (5.0, 10.0, True))
+        for threshold in ["", "fast", "10:5", "@"]:
+            with self.assertRaises(SystemExit) as se:
+                s3_response_time.parse_range(threshold)
+            self.assertEqual(se.exception.code, 2)
+
+    def test_breached(self):
+        self.assertTrue(s3_response_time.breached("0.5", 0.75))
+        self.assertFalse(s3_response_time.breached("0.5", 0.25))
+        self.assertTrue(s3_response_time.breached("10:", 4.0))
+        self.assertFalse(s3_response_time.breached("10:", 40.0))
+        self.assertTrue(s3_response_time.breached("@5:10", 7.0))
+        self.assertFalse(s3_response_time.breached("@5:10", 12.0))
+
+    def test_parse_thresholds(self):
+        self.assertEqual(
+            s3_response_time.parse_thresholds("total_time=2, upload_object=0.5"),
+            {"total_time": "2", "upload_object": "0.5"},
+        )
+        self.assertEqual(s3_response_time.parse_thresholds(""), {})
+        with self.assertRaises(SystemExit):
+            s3_response_time.parse_thresholds("total_time")
+
+    def test_check_thresholds(self):
+        metrics = s3_response_time.probe_metrics(self.configuration, 0.75, self.timings)
+        self.assertIn(("download_object_mb_per_second", 2.0, ""), metrics)
+
+        # Test no thresholds is OK
+        self.assertEqual(
+            s3_response_time.check_thresholds(self.configuration, metrics), (0, [])
+        )
+
+        # Test a slow phase or low throughput is a WARNING
+        self.configuration["warning_thresholds"] = "upload_object=0.1"
+        self.assertEqual(
+            s3_response_time.check_thresholds(self.configuration, metrics),
+            (1, ["upload_object=0.25s (warning 0.1)"]),
+        )
+        self.configuration["warning_thresholds"] = "upload_object_mb_per_second=10:"
+        self.assertEqual(
+            s3_response_time.check_thresholds(self.configuration, metrics)[0], 1
+        )
+
+        # Test a critical breach wins over a warning
+        self.configuration["critical_thresholds"] = "total_time=0.5"
+        self.assertEqual(
+            s3_response_time.check_thresholds(self.configuration, metrics),
+            (2, ["total_time=0.75s (critical 0.5)"]),
+        )
+
+    def test_report(self):
+        self.configuration["warning_thresholds"] = "total_time=0.5"
+        self.configuration["critical_thresholds"] = "total_time=1"
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            exit_code = s3_response_time.report(self.configuration, 0.75, self.timings)
+
+        # Test the status line ends with perfdata of every metric
+        self.assertEqual(exit_code, 1)
+        status, perfdata = output.getvalue().strip().split(" | ")
+        self.assertTrue(status.startswith("WARNING - total_time=0.75s"))
+        self.assertEqual(
+            perfdata,
+            "total_time=0.75s;0.5;1;; upload_object=0.25s;;;; "
+            "download_object=0.5s;;;; upload_object_mb_per_second=4.0;;;; "
+            "download_object_mb_per_second=2.0;;;;",
+        )
+
+    @patch("s3_response_time.probe")
+    @patch("s3_response_time.endpoint_auth")
+    def test_main_warning(self, mock_endpoint_auth, mock_probe):
+        self.configuration["warning_thresholds"] = "upload_object=0.1"
+
+        def probe(_s3, _configuration, _timings):
+            _timings.update(self.timings)
+            return 0.75
+
+        mock_probe.side_effect = probe
+
+        # Test a breached threshold sets the exit code of a single probe and
+        # of several endpoints probed at once
+        with patch("s3_response_time.read_configuration") as mock_read_configuration:
+            mock_read_configuration.return_value = self.configuration
+            for files in (["a.json"], ["a.json", "b.json"]):
+                arguments = ["s3_response_time.py"]
+                for path in files:
+                    arguments += ["-c", path]
+                with patch("s3_response_time.find_configuration_files") as mock_find:
+                    mock_find.return_value = files
+                    with patch.object(sys, "argv", arguments):
+                        self.assertEqual(s3_response_time.main(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+
+import unittest
+
+import s3_response_time
+
+
+class TimingTestCase(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_time_phase(self):
+        timings = {}
+
+        # Test the return value is passed through and the phase is recorded
+        result = s3_response_time.time_phase(timings, "fake", max, 1, 2)
+        self.assertEqual(result, 2)
+        self.assertGreaterEqual(timings["fake"], 0.0)
+
+        # Test repeated phases are accumulated
+        timings["fake"] = 10.0
+        s3_response_time.time_phase(timings, "fake", max, 1, 2)
+        self.assertGreaterEqual(timings["fake"], 10.0)
+
+    def test_format_timings(self):
+        timings = {"md5_random_file": 0.5, "upload_object": 1.5, "unknown": 2.0}
+
+        # Test S3 phases come before local phases and unknown phases are skipped
+        self.assertEqual(
+            s3_response_time.format_timings(timings),
+            "upload_object: 1.5 md5_random_file: 0.5",
+        )